@@ -0,0 +1,83 @@
+"""
+Auto-dispatch benchmark.
+
+Scores N pending tasks against M available specialists with
+tasks.dispatch.match(), spread over a few cities and all in one city (once
+with a city code, once without), then runs a full database cycle
+(load, plan, batched conditional UPDATEs) at a smaller size.
+
+    python benchmarks/bench_dispatch.py --tasks 50000 --specialists 5000
+
+The matching step is pure NumPy and independent of the database; the
+database cycle on SQLite is only indicative.
+"""
+import argparse
+
+import numpy as np
+
+from common import make_fixtures, setup_django, timer
+
+CITIES = [("tehran", 35.70, 51.40), ("isfahan", 32.65, 51.67), ("shiraz", 29.61, 52.53), ("tabriz", 38.08, 46.29)]
+
+
+def scatter(rng, n, cities=len(CITIES)):
+    city = rng.integers(cities, size=n)
+    lat = np.array([CITIES[c][1] for c in city]) + rng.normal(0, 0.05, n)
+    lng = np.array([CITIES[c][2] for c in city]) + rng.normal(0, 0.05, n)
+    return city, lat.astype(np.float32), lng.astype(np.float32)
+
+
+def bench_match(tasks, specialists, cities=len(CITIES), city_codes=True):
+    from tasks.dispatch import match
+
+    rng = np.random.default_rng(0)
+    task_city, task_lat, task_lng = scatter(rng, tasks, cities)
+    spec_city, spec_lat, spec_lng = scatter(rng, specialists, cities)
+    load = rng.integers(0, 3, size=specialists).astype(np.float32)
+    if not city_codes:
+        task_city, spec_city = np.full(tasks, -1), np.full(specialists, -1)
+
+    label = f"{cities} {'cities' if cities > 1 else 'city'}{'' if city_codes else ', no codes'}"
+    with timer(f"match {tasks} x {specialists} ({label})"):
+        assigned = match(task_lat, task_lng, task_city + 1, spec_lat, spec_lng, spec_city + 1, load)
+    print(f"{'assigned':<40} {int((assigned >= 0).sum()):>10}")
+
+
+def bench_cycle(tasks, specialists):
+    from specialists.models import SpecialistProfile
+    from tasks import dispatch
+
+    _, _, specialist_rows = make_fixtures(customers=10, specialists=specialists, tasks=tasks, with_coords=True)
+    rng = np.random.default_rng(1)
+    SpecialistProfile.objects.bulk_create(
+        SpecialistProfile(
+            user=user,
+            is_available=True,
+            latitude=round(35.60 + rng.random() * 0.2, 6),
+            longitude=round(51.30 + rng.random() * 0.2, 6),
+        )
+        for user in specialist_rows
+    )
+
+    with timer(f"db cycle {tasks} x {specialists}"):
+        assigned = dispatch.run()
+    print(f"{'assigned':<40} {assigned:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--specialists", type=int, default=5000)
+    parser.add_argument("--db-tasks", type=int, default=5000)
+    parser.add_argument("--db-specialists", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    bench_match(args.tasks, args.specialists)
+    bench_match(args.tasks, args.specialists, cities=1)
+    bench_match(args.tasks, args.specialists, cities=1, city_codes=False)
+    bench_cycle(args.db_tasks, args.db_specialists)
+
+
+if __name__ == "__main__":
+    main()
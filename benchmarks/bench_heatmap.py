@@ -0,0 +1,36 @@
+"""
+Demand heatmap benchmark: building the per-type grid from PENDING coordinates
+(tasks.heatmap.compute) against the cached read the endpoint serves.
+
+    python benchmarks/bench_heatmap.py --tasks 300000
+"""
+import argparse
+
+from common import make_fixtures, setup_django, timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=300000)
+    args = parser.parse_args()
+
+    setup_django()
+    make_fixtures(customers=100, tasks=args.tasks, with_coords=True)
+
+    from tasks import heatmap
+
+    with timer("query + float cast"):
+        data = heatmap.coordinates()
+    with timer("np.unique binning"):
+        heatmap.bin_counts(data, 0.01)
+    for cell in ("0.005", "0.01", "0.1"):
+        with timer(f"compute cell={cell}"):
+            result = heatmap.compute(cell)
+        print(f"  {result['total']} tasks in {sum(len(t['cells']) for t in result['types'])} cells")
+    heatmap.get("0.01")
+    with timer("cached get"):
+        heatmap.get("0.01")
+
+
+if __name__ == "__main__":
+    main()
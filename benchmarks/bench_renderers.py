@@ -0,0 +1,46 @@
+"""
+Renderer benchmark: DRF's stdlib JSONRenderer against the orjson and MessagePack
+renderers, on task list pages of increasing size (TaskRowSerializer output).
+
+    python benchmarks/bench_renderers.py --sizes 10 100 500 1000
+"""
+import argparse
+
+from common import make_fixtures, setup_django, timer
+
+REPEAT = 50
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500, 1000])
+    args = parser.parse_args()
+
+    setup_django()
+    make_fixtures(customers=10, tasks=max(args.sizes), with_coords=True)
+
+    from rest_framework.renderers import JSONRenderer
+
+    from kaaro.renderers import MessagePackRenderer, ORJSONRenderer
+    from tasks.models import Task
+    from tasks.serializers import TaskRowSerializer
+
+    queryset = TaskRowSerializer.prepare(Task.objects.order_by("-created_at", "-id"))
+    renderers = {"JSONRenderer": JSONRenderer(), "ORJSONRenderer": ORJSONRenderer(), "MessagePackRenderer": MessagePackRenderer()}
+    for size in args.sizes:
+        data = {"count": size, "next": None, "previous": None, "results": TaskRowSerializer(list(queryset[:size])).data}
+        assert renderers["ORJSONRenderer"].render(data) == renderers["JSONRenderer"].render(data)
+
+        results = {}
+        for name, renderer in renderers.items():
+            with timer(f"page {size:>4}  {name} x{REPEAT}", results):
+                for _ in range(REPEAT):
+                    body = renderer.render(data)
+            print(f"  {len(body)} bytes")
+
+        base, *others = (t / REPEAT * 1e6 for t in results.values())
+        print(f"  render per page: {base:.0f} us -> " + ", ".join(f"{t:.0f} us ({base / t:.1f}x)" for t in others))
+
+
+if __name__ == "__main__":
+    main()
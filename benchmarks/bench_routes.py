@@ -0,0 +1,47 @@
+"""
+Route planning benchmark: nearest neighbour + 2-opt (tasks.routes.plan) for one
+specialist's stops, against the nearest-neighbour tour alone.
+
+    python benchmarks/bench_routes.py --stops 50 100 200
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kaaro.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from common import timer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stops", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--budget", type=float, default=None, help="seconds; defaults to the production budget")
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+    from tasks import routes
+    from tasks.defaults import TASK_ROUTE_TIME_BUDGET_SECONDS
+
+    budget = TASK_ROUTE_TIME_BUDGET_SECONDS if args.budget is None else args.budget
+    rng = np.random.default_rng(0)
+    for n in args.stops:
+        points = rng.uniform([35.6, 51.2], [35.8, 51.6], size=(n, 2))
+        dist = np.zeros((n + 1, n + 1))
+        dist[1:, 1:] = routes.haversine_matrix(points[:, 0], points[:, 1])
+        with timer(f"{n} stops nearest neighbour"):
+            greedy = routes.nearest_neighbour(dist)
+        with timer(f"{n} stops nn + 2-opt"):
+            _, km, converged = routes.plan([tuple(p) for p in points], budget=budget)
+        greedy_km = dist[greedy[:-1], greedy[1:]].sum()
+        print(f"  {greedy_km:.1f} km -> {km:.1f} km ({'converged' if converged else 'budget hit'})")
+
+
+if __name__ == "__main__":
+    main()
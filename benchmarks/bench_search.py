@@ -0,0 +1,39 @@
+"""
+Task search benchmark: the full-text index (tasks.search) against the
+icontains scan that search_fields would have produced.
+
+    python benchmarks/bench_search.py --tasks 200000
+"""
+import argparse
+
+from common import make_fixtures, setup_django, timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=200000)
+    args = parser.parse_args()
+
+    setup_django(file_db=True)
+    make_fixtures(customers=100, tasks=args.tasks)
+
+    from django.db.models import Q
+
+    from tasks.models import Task
+    from tasks.search import search
+
+    needle = f"Contact {args.tasks // 2}"
+    Task.objects.filter(contact_name=needle).update(note="leaking kitchen sink")
+
+    for label, term in (("rare term", "leaking"), ("exact name", needle), ("phone prefix", "0912")):
+        with timer(f"fts   {label} (first page)"):
+            list(search(Task.objects.all(), term)[:20])
+        with timer(f"scan  {label} (first page)"):
+            q = Q()
+            for field in ("contact_name", "contact_phone", "address", "note"):
+                q |= Q(**{f"{field}__icontains": term})
+            list(Task.objects.filter(q).order_by("-created_at", "-id")[:20])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+List serialization benchmark: TaskSerializer over model instances against the
+TaskRowSerializer fast path over .values() rows, per page size.
+
+    python benchmarks/bench_serializer.py --sizes 10 50 100 250 500
+"""
+import argparse
+
+from common import make_fixtures, setup_django, timer
+
+REPEAT = 20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 250, 500])
+    args = parser.parse_args()
+
+    setup_django()
+    make_fixtures(customers=10, tasks=max(args.sizes), with_coords=True)
+
+    from rest_framework.renderers import JSONRenderer
+
+    from tasks.models import Task
+    from tasks.serializers import TaskRowSerializer, TaskSerializer
+
+    queryset = Task.objects.select_related("service", "customer", "specialist").order_by("-created_at", "-id")
+    for size in args.sizes:
+        results = {}
+        with timer(f"page {size:>3}  TaskSerializer x{REPEAT}", results):
+            for _ in range(REPEAT):
+                slow = TaskSerializer(list(queryset[:size]), many=True).data
+        with timer(f"page {size:>3}  TaskRowSerializer x{REPEAT}", results):
+            for _ in range(REPEAT):
+                fast = TaskRowSerializer(list(TaskRowSerializer.prepare(queryset)[:size])).data
+        assert JSONRenderer().render(fast) == JSONRenderer().render(slow)
+
+        slow_us, fast_us = (t / REPEAT / size * 1e6 for t in results.values())
+        print(f"  query + serialize per row: {slow_us:.1f} us -> {fast_us:.1f} us ({slow_us / fast_us:.1f}x)")
+
+        rows = list(TaskRowSerializer.prepare(queryset)[:size])
+        instances = list(queryset[:size])
+        with timer(f"page {size:>3}  serialize only, instances", results):
+            for _ in range(REPEAT):
+                TaskSerializer(instances, many=True).data
+        with timer(f"page {size:>3}  serialize only, rows", results):
+            for _ in range(REPEAT):
+                TaskRowSerializer(rows).data
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Contention benchmark for task acceptance.
+
+Every worker plays an approved specialist who keeps grabbing the oldest
+PENDING task, which is what a crowd of clients polling the same first page of
+/tasks/task/available/ does. The legacy path (select_for_update + save +
+refresh_from_db + lazy relation loads) is compared with the conditional
+UPDATE in tasks.state_machine.
+
+    python benchmarks/bench_task_contention.py --tasks 300 --workers 8
+
+SQLite serialises writers, so absolute numbers are only meaningful on the
+production database; the query counts per accept hold everywhere.
+"""
+import argparse
+import threading
+import time
+
+from common import make_fixtures, setup_django
+
+
+def legacy_accept(task_id, specialist):
+    from django.db import transaction
+
+    from tasks.models import Task
+    from tasks.serializers import TaskSerializer
+
+    with transaction.atomic():
+        task = Task.objects.select_for_update().get(pk=task_id)
+        if task.status != Task.Status.PENDING or task.specialist_id is not None:
+            return None
+        task.status = Task.Status.ACCEPTED
+        task.specialist = specialist
+        task.save(update_fields=["status", "specialist"])
+
+    task.refresh_from_db()
+    return TaskSerializer(task).data
+
+
+def cas_accept(task_id, specialist):
+    from tasks import state_machine
+    from tasks.serializers import TaskSerializer
+
+    try:
+        task = state_machine.accept(task_id, specialist)
+    except state_machine.TransitionError:
+        return None
+    return TaskSerializer(task).data
+
+
+def run(accept, specialists, window):
+    from django.db import OperationalError, connection
+    from django.test.utils import CaptureQueriesContext
+
+    from tasks.models import Task
+
+    stats = {"won": 0, "lost": 0, "errors": 0, "queries": 0}
+    lock = threading.Lock()
+
+    def worker(specialist):
+        won = lost = errors = queries = 0
+        while True:
+            ids = list(
+                Task.objects.filter(status=Task.Status.PENDING, specialist__isnull=True)
+                .order_by("created_at", "id")
+                .values_list("id", flat=True)[:window]
+            )
+            if not ids:
+                break
+            try:
+                with CaptureQueriesContext(connection) as captured:
+                    result = accept(ids[0], specialist)
+            except OperationalError:
+                errors += 1
+                continue
+            queries += sum(1 for q in captured if q["sql"] not in ("BEGIN", "COMMIT"))
+            if result is None:
+                lost += 1
+            else:
+                won += 1
+        with lock:
+            stats["won"] += won
+            stats["lost"] += lost
+            stats["errors"] += errors
+            stats["queries"] += queries
+        connection.close()
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in specialists]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--window", type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django(file_db=True)
+    from tasks.models import Task
+
+    _, _, specialists = make_fixtures(specialists=args.workers, tasks=args.tasks)
+
+    for name, accept in (("legacy select_for_update", legacy_accept), ("conditional UPDATE", cas_accept)):
+        Task.objects.update(status=Task.Status.PENDING, specialist=None)
+        stats = run(accept, specialists, args.window)
+        attempts = stats["won"] + stats["lost"]
+        print(
+            f"{name:<26} {stats['seconds'] * 1000:9.1f} ms  "
+            f"accepted={stats['won']} conflicts={stats['lost']} db_errors={stats['errors']} "
+            f"accepts/s={stats['won'] / stats['seconds']:8.1f} "
+            f"queries/attempt={stats['queries'] / max(attempts, 1):.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django(file_db=False):
+    # Boots Django against a throwaway test database and an in-process cache so
+    # benchmarks never touch the development database or Redis.
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kaaro.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "benchmark",
+        }
+    }
+
+    from django.db import connection
+
+    if file_db and connection.vendor == "sqlite":
+        # threads need a shared on-disk file; in-memory sqlite fails fast on table locks
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+@contextmanager
+def timer(label, results=None):
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if results is not None:
+        results[label] = elapsed
+    print(f"{label:<40} {elapsed * 1000:10.1f} ms")
+
+
+def make_fixtures(customers=1, specialists=0, tasks=0, with_coords=False):
+    from django.contrib.auth import get_user_model
+
+    from services.models import Service
+    from specialists.models import SpecialistRequest
+    from tasks.models import Task
+
+    User = get_user_model()
+    service = Service.objects.create(title="Cleaning", service_type=Service.Type.CLEANING)
+
+    customer_rows = User.objects.bulk_create(
+        User(phone_number=f"+98912{i:07d}", first_name="C", last_name=str(i)) for i in range(customers)
+    )
+    specialist_rows = User.objects.bulk_create(
+        User(
+            phone_number=f"+98913{i:07d}",
+            first_name="S",
+            last_name=str(i),
+            role=User.RoleChoices.SPECIALIST,
+        )
+        for i in range(specialists)
+    )
+    SpecialistRequest.objects.bulk_create(
+        SpecialistRequest(user=u, status=SpecialistRequest.Status.APPROVED) for u in specialist_rows
+    )
+
+    task_rows = []
+    for i in range(tasks):
+        task = Task(
+            customer=customer_rows[i % len(customer_rows)],
+            service=service,
+            contact_name=f"Contact {i}",
+            contact_phone="09120000000",
+            address=f"Street {i}",
+        )
+        if with_coords:
+            task.latitude = round(35.60 + (i % 200) * 0.001, 6)
+            task.longitude = round(51.30 + (i // 200 % 200) * 0.001, 6)
+            task.geohash = task.compute_geohash()
+        task_rows.append(task)
+    Task.objects.bulk_create(task_rows, batch_size=2000)
+
+    return service, customer_rows, specialist_rows
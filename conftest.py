@@ -1,7 +1,10 @@
 import pytest
+from django.core.cache import cache
 from django.test import override_settings
 from rest_framework.test import APIClient
 
+from users import snapshots
+
 TEST_CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
@@ -16,4 +19,6 @@ def api_client():
 @pytest.fixture(autouse=True)
 def _use_test_cache():
     with override_settings(CACHES=TEST_CACHES):
+        cache.clear()
+        snapshots.local.clear()
         yield
@@ -0,0 +1,74 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+FIELDS_PARAM = "fields"
+EXCLUDE_PARAM = "exclude"
+
+
+def split(value):
+    return [name for name in (part.strip() for part in (value or "").split(",")) if name]
+
+
+def trim(items, selected):
+    # a requested_fields() selection applied to payloads built outside the serializer; like the
+    # serializer, fields the payload skipped (e.g. a display of a null relation) stay absent
+    if selected is None:
+        return items
+    return [{name: item[name] for name in selected if name in item} for item in items]
+
+
+class SparseFieldsetMixin:
+    # ?fields=id,status / ?exclude=note on read requests. The same selection trims the
+    # serializer's fields and, through project(), the queryset's only()/select_related().
+    # Meta.field_sources maps output fields to the model paths they read; any field not
+    # listed reads the model field of the same name.
+
+    @classmethod
+    def requested_fields(cls, request):
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        params = request.query_params
+        if FIELDS_PARAM not in params and EXCLUDE_PARAM not in params:
+            return None
+
+        available = cls.Meta.fields
+        fields, exclude = split(params.get(FIELDS_PARAM)), split(params.get(EXCLUDE_PARAM))
+        errors = {}
+        for param, names in ((FIELDS_PARAM, fields), (EXCLUDE_PARAM, exclude)):
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                errors[param] = f"Unknown field(s): {', '.join(unknown)}."
+        if errors:
+            raise ValidationError(errors)
+
+        selected = tuple(name for name in available if (not fields or name in fields) and name not in exclude)
+        if not selected:
+            raise ValidationError({FIELDS_PARAM: "Select at least one field."})
+        return selected
+
+    @classmethod
+    def project(cls, queryset, request=None):
+        # load only what the selected fields read, plus the ordering keys the paginator needs
+        sources = getattr(cls.Meta, "field_sources", {})
+        paths = set()
+        for name in cls.requested_fields(request) or cls.Meta.fields:
+            paths.update(sources.get(name, (name,)))
+        for name in queryset.query.order_by:
+            name = name.lstrip("-")
+            if name not in queryset.query.annotations:
+                paths.add(name)
+
+        relations = sorted({path.split("__")[0] for path in paths if "__" in path})
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*sorted(paths))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if parent is None or (isinstance(parent, ListSerializer) and parent.parent is None):
+            selected = self.requested_fields(self.context.get("request"))
+            if selected is not None:
+                fields = {name: fields[name] for name in selected}
+        return fields
@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+import msgpack
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Project-wide JSON (orjson) and MessagePack renderers/parsers. Output is byte-for-byte what
+# DRF's JSONRenderer produces for compact, unicode JSON: datetimes as ISO 8601 with "Z" for
+# UTC, Decimal as a number (COERCE_DECIMAL_TO_STRING is off), and anything orjson doesn't
+# know natively goes through DRF's own encoder.
+
+# non-str keys: ListField/ListSerializer validation errors are keyed by item index
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# DRF escapes these two so the output stays valid JavaScript; orjson leaves them raw
+LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+fallback = JSONEncoder().default
+
+
+def default(obj):
+    # Decimal lat/lng is on every task row, so it skips DRF's isinstance chain
+    if type(obj) is Decimal:
+        return float(obj)
+    return fallback(obj)
+
+
+def dumps(data):
+    ret = orjson.dumps(data, default=default, option=ORJSON_OPTIONS)
+    if b"\xe2\x80" in ret:
+        for raw, escaped in LINE_SEPARATORS:
+            ret = ret.replace(raw, escaped)
+    return ret
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        # indented output (browsable API, "; indent=" in Accept) stays on the stdlib encoder
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=default, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     "drf_spectacular",
     'rest_framework_simplejwt',
     'phonenumber_field',
+    'django_filters',
     
     # apps
     'users',
@@ -98,6 +99,17 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "users.authentications.CookieJWTAuthentication",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": (
+        "kaaro.renderers.ORJSONRenderer",
+        "kaaro.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "kaaro.renderers.ORJSONParser",
+        "kaaro.renderers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "COERCE_DECIMAL_TO_STRING": False,
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
@@ -132,6 +144,23 @@ CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://127.0.0.1:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://127.0.0.1:6379/0")
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+CELERY_BEAT_SCHEDULE = {
+    "dispatch-pending-tasks": {
+        "task": "tasks.tasks.dispatch_pending_tasks",
+        "schedule": 60.0,
+    },
+    "sweep-pending-tasks": {
+        "task": "tasks.tasks.sweep_pending_tasks",
+        "schedule": 5 * 60.0,
+    },
+    "archive-terminal-tasks": {
+        "task": "tasks.tasks.archive_terminal_tasks",
+        "schedule": 60.0 * 60 * 24,
+    },
+}
+
+# Auto-dispatch of PENDING tasks to available specialists (off by default)
+TASK_DISPATCH_ENABLED = os.getenv("TASK_DISPATCH_ENABLED") == 'True'
 
 
 # Swager Settings
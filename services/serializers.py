@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from kaaro.fieldsets import SparseFieldsetMixin
 from services.models import Service
 
 
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     service_type_display = serializers.CharField(source="get_service_type_display", read_only=True)
 
     class Meta:
@@ -16,4 +17,5 @@ class ServiceSerializer(serializers.ModelSerializer):
             "base_duration_minutes",
             "is_active",
         )
-        read_only_fields = fields
\ No newline at end of file
+        read_only_fields = fields
+        field_sources = {"service_type_display": ("service_type",)}
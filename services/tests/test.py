@@ -30,3 +30,17 @@ class TestServiceEndpoints:
     def test_create_service_not_allowed(self, api_client):
         res = api_client.post(reverse("service-list"), data={"title": "X"}, format="json")
         assert res.status_code in (401, 403, 405)
+
+    def test_sparse_fieldset(self, api_client):
+        s1 = Service.objects.create(title="Moving", service_type=Service.Type.MOVING, is_active=True, base_duration_minutes=90)
+
+        res = api_client.get(reverse("service-list"), {"fields": "id,service_type_display"})
+        assert res.status_code == 200
+        assert res.json()["results"] == [{"id": s1.id, "service_type_display": s1.get_service_type_display()}]
+
+        res = api_client.get(reverse("service-detail", kwargs={"pk": s1.id}), {"exclude": "description,is_active"})
+        assert set(res.json()) == {"id", "title", "service_type", "service_type_display", "base_duration_minutes"}
+
+        res = api_client.get(reverse("service-list"), {"fields": "id,price"})
+        assert res.status_code == 400
+        assert "price" in res.json()["fields"]
@@ -10,4 +10,5 @@ class ServiceViewSet(ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
 
     def get_queryset(self):
-        return Service.objects.filter(is_active=True).order_by("service_type", "title")
+        queryset = Service.objects.filter(is_active=True).order_by("service_type", "title")
+        return ServiceSerializer.project(queryset, self.request)
@@ -46,9 +46,10 @@ class SpecialistProfileAdmin(admin.ModelAdmin):
         "user",
         "national_code",
         "city",
+        "is_available",
         "is_verified",
         "created_at",
     )
-    list_filter = ("is_verified", "created_at", "city")
+    list_filter = ("is_verified", "is_available", "created_at", "city")
     search_fields = ("user__phone_number", "national_code", "city")
     autocomplete_fields = ("user",)
\ No newline at end of file
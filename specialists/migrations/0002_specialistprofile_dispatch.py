@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('specialists', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='specialistprofile',
+            name='is_available',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='specialistprofile',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='specialistprofile',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+    ]
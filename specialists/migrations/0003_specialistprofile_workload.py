@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-18 12:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = {2: "accepted_count", 3: "in_progress_count", 4: "done_count"}  # Task.Status values
+
+
+def backfill_counts(apps, schema_editor):
+    SpecialistProfile = apps.get_model("specialists", "SpecialistProfile")
+    Task = apps.get_model("tasks", "Task")
+
+    changes = {}
+    for status, field in COUNTERS.items():
+        rows = (
+            Task.objects
+            .filter(specialist_id=OuterRef("user_id"), status=status)
+            .order_by()
+            .values("specialist_id")
+            .annotate(n=Count("id"))
+            .values("n")
+        )
+        changes[field] = Coalesce(Subquery(rows[:1]), 0)
+    SpecialistProfile.objects.update(**changes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('specialists', '0002_specialistprofile_dispatch'),
+        ('tasks', '0006_task_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='specialistprofile',
+            name='accepted_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='specialistprofile',
+            name='done_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='specialistprofile',
+            name='in_progress_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
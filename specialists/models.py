@@ -27,6 +27,16 @@ class SpecialistProfile(models.Model):
     bio = models.TextField(null=True, blank=True)
     city = models.CharField(max_length=50, null=True, blank=True)
 
+    # base location and opt-in used by the auto-dispatcher
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    is_available = models.BooleanField(default=False)
+
+    # maintained by task transitions (tasks.workload); rebuilt by `manage.py reconcile_workload`
+    accepted_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+
     is_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
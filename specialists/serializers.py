@@ -31,5 +31,8 @@ class SpecialistRequestSerializer(serializers.ModelSerializer):
 class SpecialistProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = SpecialistProfile
-        fields = ("national_code", "bio", "city", "is_verified", "created_at")
-        read_only_fields = ("is_verified", "created_at")
+        fields = (
+            "national_code", "bio", "city", "latitude", "longitude", "is_available", "is_verified",
+            "accepted_count", "in_progress_count", "done_count", "created_at",
+        )
+        read_only_fields = ("is_verified", "accepted_count", "in_progress_count", "done_count", "created_at")
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from tasks.models import Task
+from django.db.models import Q
+
+from tasks.models import Task, TaskArchive
+from tasks.search import search
 
 
 @admin.register(Task)
@@ -10,11 +13,12 @@ class TaskAdmin(admin.ModelAdmin):
         "customer",
         "specialist",
         "status",
+        "escalation_level",
         "contact_name",
         "contact_phone",
         "created_at",
     )
-    list_filter = ("status", "service", "created_at")
+    list_filter = ("status", "escalation_level", "service", "created_at")
     search_fields = (
         "contact_name",
         "contact_phone",
@@ -23,3 +27,29 @@ class TaskAdmin(admin.ModelAdmin):
         "address",
     )
     ordering = ("-created_at",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # contact fields go through the full-text index; user phones stay exact lookups
+        if not search_term.strip():
+            return queryset, False
+        matches = search(Task.objects.all(), search_term).values("id")
+        term = search_term.strip()
+        return queryset.filter(
+            Q(id__in=matches) | Q(customer__phone_number=term) | Q(specialist__phone_number=term)
+        ), False
+
+
+@admin.register(TaskArchive)
+class TaskArchiveAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "service",
+        "customer",
+        "specialist",
+        "status",
+        "created_at",
+        "archived_at",
+    )
+    list_filter = ("status", "service", "archived_at")
+    search_fields = ("contact_name", "contact_phone", "customer__phone_number", "specialist__phone_number")
+    ordering = ("-created_at",)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TasksConfig(AppConfig):
     name = 'tasks'
+
+    def ready(self):
+        from tasks import dashboard, feeds, streams  # noqa: F401  (connects signal receivers)
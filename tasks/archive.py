@@ -0,0 +1,45 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from tasks.defaults import TASK_ARCHIVE_AFTER_DAYS, TASK_ARCHIVE_BATCH
+from tasks.models import Task, TaskArchive
+
+logger = logging.getLogger(__name__)
+
+# Moves DONE/CANCELED/EXPIRED tasks from the hot table into TaskArchive, oldest id first. Each
+# batch copies and deletes in one transaction, so an interrupted run simply resumes from
+# whatever is still in the hot table.
+
+TERMINAL = (Task.Status.DONE, Task.Status.CANCELED, Task.Status.EXPIRED)
+FIELDS = [field.attname for field in TaskArchive._meta.concrete_fields if field.name != "archived_at"]
+
+
+def candidates(cutoff):
+    return Task.objects.filter(status__in=TERMINAL, updated_at__lt=cutoff).order_by("id")
+
+
+def archive_batch(cutoff, batch_size=TASK_ARCHIVE_BATCH):
+    with transaction.atomic():
+        ids = list(candidates(cutoff).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return 0
+        rows = Task.objects.filter(id__in=ids, status__in=TERMINAL).values(*FIELDS)
+        TaskArchive.objects.bulk_create((TaskArchive(**row) for row in rows), ignore_conflicts=True)
+        Task.objects.filter(id__in=ids, status__in=TERMINAL).delete()
+    return len(ids)
+
+
+def archive(older_than_days=TASK_ARCHIVE_AFTER_DAYS, batch_size=TASK_ARCHIVE_BATCH, max_batches=None):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            break
+        total += moved
+        batches += 1
+    logger.info("Archived %s tasks in %s batches", total, batches)
+    return total
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.db import transaction
+
+from services.models import Service
+from tasks import events
+from tasks.defaults import TASK_BULK_CREATE_BATCH, TASK_BULK_CREATE_MAX_ITEMS
+from tasks.models import Task
+from tasks.serializers import TaskBulkItemSerializer, TaskSerializer
+from tasks.signals import send_created
+
+# Batch creation for partner accounts: every item is validated in one pass against services
+# loaded with a single query, and the valid ones go in with bulk_create. In atomic mode one
+# invalid item rejects the whole batch; in partial mode the valid items are still created.
+
+
+def max_items():
+    return getattr(settings, "TASK_BULK_CREATE_MAX_ITEMS", TASK_BULK_CREATE_MAX_ITEMS)
+
+
+def service_ids(items):
+    ids = set()
+    for item in items:
+        if isinstance(item, dict):
+            try:
+                ids.add(int(item.get("service")))
+            except (TypeError, ValueError):
+                pass
+    return ids
+
+
+def validate(items):
+    services = Service.objects.in_bulk(service_ids(items))
+    serializers = [TaskBulkItemSerializer(data=item, context={"services": services}) for item in items]
+    for serializer in serializers:
+        serializer.is_valid()
+    return serializers
+
+
+def insert(validated, customer):
+    tasks = [Task(customer=customer, **data) for data in validated]
+    for task in tasks:
+        # bulk_create skips Task.save()
+        task.geohash = task.compute_geohash()
+        task.scheduled_end = task.compute_scheduled_end()
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks, batch_size=TASK_BULK_CREATE_BATCH)
+        events.record_created(tasks, actor=customer)
+    send_created(*tasks)
+    return tasks
+
+
+def create(items, customer, partial=False):
+    # -> (created count, one result per item in request order)
+    serializers = validate(items)
+    ok = [not serializer.errors for serializer in serializers]
+    if not partial and not all(ok):
+        return 0, [
+            {"index": i, "status": "skipped"} if valid else {"index": i, "status": "invalid", "errors": s.errors}
+            for i, (s, valid) in enumerate(zip(serializers, ok))
+        ]
+
+    tasks = iter(insert([s.validated_data for s, valid in zip(serializers, ok) if valid], customer))
+    results = []
+    for i, (serializer, valid) in enumerate(zip(serializers, ok)):
+        if valid:
+            results.append({"index": i, "status": "created", "task": TaskSerializer(next(tasks)).data})
+        else:
+            results.append({"index": i, "status": "invalid", "errors": serializer.errors})
+    return sum(ok), results
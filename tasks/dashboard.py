@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db.models import Count
+from django.dispatch import receiver
+
+from tasks.defaults import TASK_SUMMARY_CACHE_TTL
+from tasks.models import Task, TaskArchive
+from tasks.signals import task_created, task_status_changed
+
+# Home-screen counters for one user: tasks per status and per service, computed with a
+# single GROUP BY (status, service) per table (hot and archive, one UNION ALL query) and
+# cached until one of the user's tasks changes.
+
+
+def summary_key(user_id):
+    return f"task_summary_{user_id}"
+
+
+def user_tasks(user, model=Task):
+    if user.role == user.RoleChoices.CUSTOMER:
+        return model.objects.filter(customer=user)
+    if user.role == user.RoleChoices.SPECIALIST:
+        return model.objects.filter(specialist=user)
+    return model.objects.none()
+
+
+def grouped(queryset):
+    return queryset.order_by().values("status", "service_id", "service__title").annotate(count=Count("id"))
+
+
+def compute(user):
+    rows = grouped(user_tasks(user)).union(grouped(user_tasks(user, TaskArchive)), all=True)
+
+    by_status = {status: 0 for status in Task.Status.values}
+    by_service = {}
+    for row in rows:
+        by_status[row["status"]] += row["count"]
+        service = by_service.setdefault(
+            row["service_id"], {"service": row["service_id"], "service_title": row["service__title"], "count": 0}
+        )
+        service["count"] += row["count"]
+
+    return {
+        "total": sum(by_status.values()),
+        "by_status": [
+            {"status": status, "status_display": Task.Status(status).label, "count": count}
+            for status, count in by_status.items()
+        ],
+        "by_service": sorted(by_service.values(), key=lambda s: (-s["count"], s["service"])),
+    }
+
+
+def get(user):
+    key = summary_key(user.id)
+    data = cache.get(key)
+    if data is None:
+        data = compute(user)
+        cache.set(key, data, timeout=TASK_SUMMARY_CACHE_TTL)
+    return data
+
+
+def invalidate(*user_ids):
+    cache.delete_many([summary_key(user_id) for user_id in user_ids if user_id is not None])
+
+
+@receiver(task_created)
+def on_task_created(sender, tasks, **kwargs):
+    invalidate(*{task.customer_id for task in tasks})
+
+
+@receiver(task_status_changed)
+def on_task_status_changed(sender, task, previous_status, **kwargs):
+    invalidate(task.customer_id, task.specialist_id)
@@ -0,0 +1,55 @@
+GEOHASH_PRECISION = 7  # ~150m x 150m cells
+NEAR_DEFAULT_RADIUS_KM = 5
+NEAR_MAX_RADIUS_KM = 50
+TASK_PAGE_MAX_LIMIT = 500
+CLAIM_WINDOW = 10  # head-of-queue rows raced over when the database has no SKIP LOCKED
+CLAIM_ATTEMPTS = 3
+TASK_LEASE_SECONDS = 30
+TASK_STREAM_CHANNEL = "tasks:available"
+TASK_STREAM_KEEPALIVE_SECONDS = 15
+TASK_STREAM_QUEUE_SIZE = 100
+TASK_FEED_DELTA_OVERLAP_SECONDS = 5  # re-sent window that covers commits landing after the cursor was issued
+TASK_FEED_DELTA_MAX_ROWS = 500  # above this a delta asks the client to reload the feed
+TASK_FEED_AREA_PRECISION = 4  # geohash cells of roughly 39km x 20km
+TASK_FEED_CACHE_SIZE = 1000  # newest tasks kept per materialized feed
+TASK_FEED_CACHE_TTL = 10 * 60
+TASK_FEED_VERSION_TTL = 24 * 60 * 60  # counters expire; a re-seed from the clock only moves forward
+TASK_FEED_BUILD_LOCK_SECONDS = 10
+TASK_FEED_BUILD_WAIT_SECONDS = 0.5
+DISPATCH_MAX_ACTIVE_TASKS = 3  # ACCEPTED + IN_PROGRESS a specialist may hold before dispatch skips them
+DISPATCH_MAX_DISTANCE_KM = 15
+DISPATCH_LOAD_PENALTY_KM = 2  # each active task weighs like 2 extra km of travel
+DISPATCH_TASK_CHUNK = 2000  # tasks scored per matrix; 2000 x 5000 float32 is 40MB
+DISPATCH_ROUNDS = 4  # conflict-resolution passes per chunk
+DISPATCH_BLOCK_ROWS = 256  # nearby tasks scored together; 256 x 5000 float32 is 5MB
+DISPATCH_UPDATE_BATCH = 1000
+DISPATCH_LOCK_SECONDS = 5 * 60
+TASK_EVENT_BATCH = 500
+TASK_EVENT_GAP_SECONDS = 60  # how long a missing id is re-read; ids are allocated before commit
+TASK_EVENT_MAX_GAPS = 500  # missing ids tracked per consumer, newest first
+TASK_SUMMARY_CACHE_TTL = 5 * 60  # safety net; transitions delete the entry right away
+TASK_ARCHIVE_AFTER_DAYS = 30  # terminal tasks untouched this long move to TaskArchive
+TASK_ARCHIVE_BATCH = 1000
+TASK_SEARCH_MAX_TERMS = 8
+TASK_EXPORT_CHUNK_SIZE = 2000
+TASK_IDEMPOTENCY_TTL = 24 * 60 * 60  # how long a stored response answers retries of the same key
+TASK_IDEMPOTENCY_LOCK_SECONDS = 10
+TASK_IDEMPOTENCY_WAIT_SECONDS = 2  # a duplicate waits this long for the first request before getting 409
+TASK_IDEMPOTENCY_KEY_MAX_LENGTH = 255
+TASK_BULK_CREATE_MAX_ITEMS = 500  # override with settings.TASK_BULK_CREATE_MAX_ITEMS
+TASK_BULK_CREATE_BATCH = 250  # rows per INSERT statement
+TASK_SCHEDULE_MAX_WINDOW_DAYS = 31  # widest calendar / free-slot window per request
+TASK_FREE_SLOTS_MAX_SPECIALISTS = 500
+TASK_HEATMAP_CELL_SIZES = ("0.005", "0.01", "0.05", "0.1")  # degrees; roughly 0.5km to 11km cells
+TASK_HEATMAP_DEFAULT_CELL = "0.01"
+TASK_HEATMAP_CACHE_TTL = 60
+TASK_HEATMAP_BUILD_LOCK_SECONDS = 30
+TASK_HEATMAP_BUILD_WAIT_SECONDS = 2
+TASK_HEATMAP_MAX_CELLS = 5000  # densest cells returned per service type
+TASK_ROUTE_TIME_BUDGET_SECONDS = 0.2  # 2-opt stops improving the route after this
+TASK_ROUTE_CACHE_TTL = 24 * 60 * 60  # entries are keyed by the stop set, so a changed set never reads a stale route
+TASK_REBROADCAST_AFTER_MINUTES = 30  # unaccepted PENDING tasks are pushed to the live stream again
+TASK_ESCALATE_AFTER_HOURS = 6  # ... then flagged for operations
+TASK_EXPIRE_AFTER_HOURS = 72  # ... then moved to EXPIRED, out of the available feed
+TASK_SWEEP_BATCH = 500
+TASK_SWEEP_MAX_BATCHES = 20  # per stage and run, so one beat run stays short
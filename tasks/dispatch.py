@@ -0,0 +1,224 @@
+import logging
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import F
+
+from specialists.models import SpecialistProfile, SpecialistRequest
+from tasks import schedule, state_machine
+from tasks.defaults import (
+    DISPATCH_BLOCK_ROWS,
+    DISPATCH_LOAD_PENALTY_KM,
+    DISPATCH_LOCK_SECONDS,
+    DISPATCH_MAX_ACTIVE_TASKS,
+    DISPATCH_MAX_DISTANCE_KM,
+    DISPATCH_ROUNDS,
+    DISPATCH_TASK_CHUNK,
+    DISPATCH_UPDATE_BATCH,
+)
+from tasks.models import Task
+from tasks.utils.geo import KM_PER_DEGREE_LAT, km_per_degree_lng
+
+logger = logging.getLogger(__name__)
+
+# Auto-dispatch: every PENDING task with coordinates is scored against the available
+# specialists that can be in range of it, a block of nearby tasks at a time:
+#
+#     cost = distance_km + DISPATCH_LOAD_PENALTY_KM * active_tasks
+#
+# with infinite cost past DISPATCH_MAX_DISTANCE_KM. Each task picks its
+# cheapest specialist; when more tasks pick a specialist than they have free slots, the
+# cheapest ones win and the rest retry in the next round against the updated loads.
+# Older tasks are scored first, so they get first pick.
+
+LOCK_KEY = "task_dispatch_lock"
+
+
+def city_codes(task_cities, specialist_cities):
+    # 0 means "unknown" and matches every city
+    codes = {}
+
+    def encode(city):
+        city = (city or "").strip().lower()
+        return codes.setdefault(city, len(codes) + 1) if city else 0
+
+    return (
+        np.array([encode(c) for c in task_cities], dtype=np.int32),
+        np.array([encode(c) for c in specialist_cities], dtype=np.int32),
+    )
+
+
+def distance_matrix(task_lat, task_lng, spec_lat, spec_lng):
+    # equirectangular, like TaskQuerySet.near(); sqrt of the squares is several times
+    # cheaper than np.hypot, and the coordinates are far from overflowing float32
+    km_lng = (KM_PER_DEGREE_LAT * np.cos(np.radians(task_lat))).astype(np.float32)
+    d_lat = (task_lat[:, None] - spec_lat[None, :]) * np.float32(KM_PER_DEGREE_LAT)
+    d_lng = (task_lng[:, None] - spec_lng[None, :]) * km_lng[:, None]
+    return np.sqrt(d_lat * d_lat + d_lng * d_lng)
+
+
+def blocks(rows, open_specs, task_lat, task_lng, spec_lat, spec_lng, max_distance_km, size):
+    # A chunk as blocks of `size` nearby tasks (sorted into max_distance_km latitude bands,
+    # then by longitude), each scored only against the open specialists inside its bounding
+    # box widened by max_distance_km: [(positions in rows, specialist indices, distances)].
+    band = np.floor(task_lat[rows] * KM_PER_DEGREE_LAT / max(max_distance_km, 1))
+    order = np.lexsort((task_lng[rows], band))
+    margin_lat = max_distance_km / KM_PER_DEGREE_LAT
+    result = []
+    for start in range(0, len(order), size):
+        positions = order[start:start + size]
+        lat, lng = task_lat[rows[positions]], task_lng[rows[positions]]
+        margin_lng = max_distance_km / km_per_degree_lng(min(np.abs(lat).max() + margin_lat, 90))
+        nearby = open_specs[
+            (spec_lat[open_specs] >= lat.min() - margin_lat) & (spec_lat[open_specs] <= lat.max() + margin_lat)
+            & (spec_lng[open_specs] >= lng.min() - margin_lng) & (spec_lng[open_specs] <= lng.max() + margin_lng)
+        ]
+        if nearby.size:
+            dist = distance_matrix(lat, lng, spec_lat[nearby], spec_lng[nearby])
+            dist[dist > max_distance_km] = np.inf
+            result.append((positions, nearby, dist))
+    return result
+
+
+def match(
+    task_lat, task_lng, task_city, spec_lat, spec_lng, spec_city, load,
+    capacity=DISPATCH_MAX_ACTIVE_TASKS,
+    max_distance_km=DISPATCH_MAX_DISTANCE_KM,
+    load_penalty_km=DISPATCH_LOAD_PENALTY_KM,
+    chunk=DISPATCH_TASK_CHUNK,
+    rounds=DISPATCH_ROUNDS,
+    block=DISPATCH_BLOCK_ROWS,
+):
+    # Returns the chosen specialist index for every task, -1 where none fits.
+    task_lat = np.asarray(task_lat, dtype=np.float32)
+    task_lng = np.asarray(task_lng, dtype=np.float32)
+    spec_lat = np.asarray(spec_lat, dtype=np.float32)
+    spec_lng = np.asarray(spec_lng, dtype=np.float32)
+    task_city, spec_city = np.asarray(task_city), np.asarray(spec_city)
+    load = np.asarray(load, dtype=np.float32).copy()
+    remaining = np.maximum(capacity - load, 0).astype(np.int64)
+    assigned = np.full(len(task_lat), -1, dtype=np.int64)
+
+    # Tasks only compete inside their city (plus specialists without one), so each city is
+    # its own, much smaller matrix. Tasks without a city go last against everyone.
+    for code in sorted(np.unique(task_city), key=lambda c: c == 0):
+        tasks = np.flatnonzero(task_city == code)
+        specs = np.arange(len(spec_lat)) if code == 0 else np.flatnonzero((spec_city == code) | (spec_city == 0))
+        for start in range(0, len(tasks), chunk):
+            open_specs = specs[remaining[specs] > 0]
+            if not open_specs.size:
+                break  # every slot is taken; the remaining tasks stay unassigned
+            rows = tasks[start:start + chunk]
+            scored = blocks(rows, open_specs, task_lat, task_lng, spec_lat, spec_lng, max_distance_km, block)
+            assigned[rows] = _resolve(len(rows), scored, load, remaining, load_penalty_km, rounds)
+    return assigned
+
+
+def _resolve(size, scored, load, remaining, load_penalty_km, rounds):
+    # one chunk: specialist per row (-1 if none), updating load/remaining in place
+    chosen = np.full(size, -1, dtype=np.int64)
+    pending = np.ones(size, dtype=bool)
+    for _ in range(rounds):
+        candidates, spec, spec_cost = [], [], []
+        for positions, specs, dist in scored:
+            live = pending[positions]
+            if not live.any():
+                continue
+            penalty = np.float32(load_penalty_km) * load[specs]
+            penalty[remaining[specs] <= 0] = np.inf
+            # only the rows still pending are costed; the first round needs no copy at all
+            cost = dist + penalty if live.all() else dist[live] + penalty
+            best = cost.argmin(axis=1)
+            best_cost = cost[np.arange(len(cost)), best]
+            fits = np.isfinite(best_cost)
+            candidates.append(positions[live][fits])
+            spec.append(specs[best[fits]])
+            spec_cost.append(best_cost[fits])
+        if not candidates:
+            break
+        candidates, spec, spec_cost = np.concatenate(candidates), np.concatenate(spec), np.concatenate(spec_cost)
+        if not candidates.size:
+            break
+
+        # rank the candidates of each specialist by cost; ranks below the free slots win
+        order = np.lexsort((spec_cost, spec))
+        spec_sorted = spec[order]
+        group_start = np.r_[True, spec_sorted[1:] != spec_sorted[:-1]]
+        rank = np.arange(len(order)) - np.maximum.accumulate(np.where(group_start, np.arange(len(order)), 0))
+        wins = rank < remaining[spec_sorted]
+
+        winners, winner_specs = candidates[order][wins], spec_sorted[wins]
+        chosen[winners] = winner_specs
+        taken = np.bincount(winner_specs, minlength=len(remaining))
+        remaining -= taken
+        load += taken
+
+        pending[winners] = False
+        if not pending.any() or not remaining.any():
+            break
+    return chosen
+
+
+def pending_tasks():
+    return list(
+        Task.objects
+        .filter(status=Task.Status.PENDING, specialist__isnull=True, latitude__isnull=False, longitude__isnull=False)
+        .order_by("created_at", "id")
+        .values_list("id", "latitude", "longitude", "city")
+    )
+
+
+def available_specialists():
+    return list(
+        SpecialistProfile.objects
+        .filter(
+            is_available=True,
+            latitude__isnull=False,
+            longitude__isnull=False,
+            user__is_active=True,
+            user__specialist_request__status=SpecialistRequest.Status.APPROVED,
+        )
+        .annotate(load=F("accepted_count") + F("in_progress_count"))
+        .values_list("user_id", "latitude", "longitude", "city", "load")
+    )
+
+
+def plan():
+    # {task_id: specialist_id} for one dispatch cycle
+    tasks = pending_tasks()
+    specialists = available_specialists()
+    if not tasks or not specialists:
+        return {}
+
+    task_ids, task_lat, task_lng, task_cities = zip(*tasks)
+    spec_ids, spec_lat, spec_lng, spec_cities, loads = zip(*specialists)
+    task_city, spec_city = city_codes(task_cities, spec_cities)
+
+    assigned = match(
+        np.array(task_lat, dtype=np.float32),
+        np.array(task_lng, dtype=np.float32),
+        task_city,
+        np.array(spec_lat, dtype=np.float32),
+        np.array(spec_lng, dtype=np.float32),
+        spec_city,
+        np.array(loads, dtype=np.float32),
+    )
+    chosen = np.flatnonzero(assigned >= 0)
+    return schedule.drop_conflicts({task_ids[i]: spec_ids[assigned[i]] for i in chosen})
+
+
+def run():
+    # one cycle; overlapping runs (slow cycle, several beat workers) are skipped
+    if not cache.add(LOCK_KEY, 1, timeout=DISPATCH_LOCK_SECONDS):
+        logger.info("Dispatch already running, skipping")
+        return 0
+
+    try:
+        assignments = list(plan().items())
+        assigned = 0
+        for i in range(0, len(assignments), DISPATCH_UPDATE_BATCH):
+            assigned += len(state_machine.assign_batch(dict(assignments[i:i + DISPATCH_UPDATE_BATCH])))
+        logger.info("Dispatched %s of %s planned tasks", assigned, len(assignments))
+        return assigned
+    finally:
+        cache.delete(LOCK_KEY)
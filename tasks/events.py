@@ -0,0 +1,71 @@
+import time
+
+from django.db import transaction
+from django.db.models import Q
+
+from tasks.defaults import TASK_EVENT_BATCH, TASK_EVENT_GAP_SECONDS, TASK_EVENT_MAX_GAPS
+from tasks.models import Task, TaskEvent, TaskEventOffset
+
+# Consumer side of the TaskEvent log. A consumer is a name with a stored position (the
+# last event id it handled); consume() hands it the next id-ordered batch and advances
+# the position in the same transaction, so a batch is either fully acknowledged or
+# redelivered. Handlers should therefore be idempotent.
+#
+# Ids are allocated at insert, not at commit, so a slow transaction can land an id below
+# one already consumed. Ids skipped over are kept as the consumer's gaps and re-read on
+# every call until they show up (delivered late, out of id order) or TASK_EVENT_GAP_SECONDS
+# pass (a rolled-back insert never fills its id).
+
+
+def record_created(tasks, actor=None):
+    TaskEvent.objects.bulk_create(
+        TaskEvent(task_id=task.id, actor=actor, from_status=None, to_status=Task.Status.PENDING) for task in tasks
+    )
+
+
+def read(after_id=0, limit=TASK_EVENT_BATCH, gaps=()):
+    # events past after_id, plus any that have filled one of the gaps, in id order
+    return list(
+        TaskEvent.objects
+        .filter(Q(id__gt=after_id) | Q(id__in=list(gaps)))
+        .order_by("id")[:limit]
+    )
+
+
+def track_gaps(gaps, position, events, now):
+    # gaps still open after this batch, plus the ids it skipped past position
+    found = {event.id for event in events}
+    gaps = [[gap, give_up] for gap, give_up in gaps if gap not in found and give_up > now]
+    newest = max([position, *found])
+    if position:  # a new consumer starts at the first event, not at id 1
+        known = {gap for gap, _ in gaps}
+        stop = max(position, newest - 1 - TASK_EVENT_MAX_GAPS - len(found))  # never walk a huge id jump
+        skipped = [i for i in range(newest - 1, stop, -1) if i not in found and i not in known]
+        gaps += [[gap, now + TASK_EVENT_GAP_SECONDS] for gap in skipped[:TASK_EVENT_MAX_GAPS]]
+    return sorted(gaps, reverse=True)[:TASK_EVENT_MAX_GAPS], newest
+
+
+def position(consumer):
+    return TaskEventOffset.objects.filter(consumer=consumer).values_list("position", flat=True).first() or 0
+
+
+def consume(consumer, handler, limit=TASK_EVENT_BATCH):
+    # handler(events) for the next batch; returns how many events were handled
+    with transaction.atomic():
+        TaskEventOffset.objects.get_or_create(consumer=consumer)
+        offset = TaskEventOffset.objects.select_for_update().get(consumer=consumer)
+        now = time.time()
+        events = read(offset.position, limit, [gap for gap, give_up in offset.gaps if give_up > now])
+        if not events:
+            return 0
+        handler(events)
+        offset.gaps, offset.position = track_gaps(offset.gaps, offset.position, events, now)
+        offset.save(update_fields=["position", "gaps", "updated_at"])
+    return len(events)
+
+
+def drain(consumer, handler, limit=TASK_EVENT_BATCH):
+    total = 0
+    while handled := consume(consumer, handler, limit):
+        total += handled
+    return total
@@ -0,0 +1,106 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from tasks import feeds
+from tasks.defaults import (
+    TASK_ESCALATE_AFTER_HOURS,
+    TASK_EXPIRE_AFTER_HOURS,
+    TASK_REBROADCAST_AFTER_MINUTES,
+    TASK_SWEEP_BATCH,
+    TASK_SWEEP_MAX_BATCHES,
+)
+from tasks.models import Task, TaskEvent
+from tasks.signals import send_escalated, send_status_changed
+
+logger = logging.getLogger(__name__)
+
+# Ages unaccepted PENDING tasks out of the available feed in three steps: re-broadcast to
+# the live stream, escalate to operations, then expire. Each step walks the
+# (status, created_at) index oldest first in bounded batches; a batch is one short
+# transaction whose conditional UPDATE only touches rows still PENDING and unassigned,
+# so a task accepted meanwhile is simply skipped.
+
+UNASSIGNED = {"status": Task.Status.PENDING, "specialist__isnull": True}
+
+
+def stale(cutoff):
+    return Task.objects.filter(created_at__lt=cutoff, **UNASSIGNED).order_by("created_at", "id")
+
+
+def reload(ids, now, **filters):
+    return list(
+        Task.objects
+        .select_related("service", "customer", "specialist")
+        .filter(pk__in=ids, updated_at=now, **filters)
+    )
+
+
+def escalate_batch(level, cutoff, batch_size=TASK_SWEEP_BATCH):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(stale(cutoff).filter(escalation_level__lt=level).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return 0
+        # updated_at moves too, and feeds.on_task_escalated bumps the feed versions, so ETag
+        # polls and delta clients of the available feed receive the task again
+        Task.objects.filter(pk__in=ids, escalation_level__lt=level, **UNASSIGNED).update(
+            escalation_level=level, updated_at=now
+        )
+        tasks = reload(ids, now, escalation_level=level)
+    send_escalated(tasks, level)
+    return len(ids)
+
+
+def expire_batch(cutoff, batch_size=TASK_SWEEP_BATCH):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(stale(cutoff).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return 0
+        Task.objects.filter(pk__in=ids, **UNASSIGNED).update(status=Task.Status.EXPIRED, updated_at=now)
+        expired = reload(ids, now, status=Task.Status.EXPIRED)
+        TaskEvent.objects.bulk_create(
+            TaskEvent(task_id=task.id, from_status=Task.Status.PENDING, to_status=Task.Status.EXPIRED)
+            for task in expired
+        )
+
+    for task in expired:
+        feeds.discard_item(task.id)
+        send_status_changed(task, Task.Status.PENDING)
+    return len(ids)
+
+
+def _drain(step, max_batches):
+    total = batches = 0
+    while batches < max_batches:
+        done = step()
+        if not done:
+            break
+        total += done
+        batches += 1
+    return total
+
+
+def sweep(batch_size=TASK_SWEEP_BATCH, max_batches=TASK_SWEEP_MAX_BATCHES):
+    # oldest first: what expires now is not escalated or re-broadcast in the same run
+    now = timezone.now()
+    expire_cutoff = now - timedelta(hours=TASK_EXPIRE_AFTER_HOURS)
+    escalate_cutoff = now - timedelta(hours=TASK_ESCALATE_AFTER_HOURS)
+    rebroadcast_cutoff = now - timedelta(minutes=TASK_REBROADCAST_AFTER_MINUTES)
+
+    counts = {
+        "expired": _drain(lambda: expire_batch(expire_cutoff, batch_size), max_batches),
+        "escalated": _drain(lambda: escalate_batch(Task.Escalation.ESCALATED, escalate_cutoff, batch_size), max_batches),
+        "rebroadcast": _drain(
+            lambda: escalate_batch(Task.Escalation.REBROADCAST, rebroadcast_cutoff, batch_size), max_batches
+        ),
+    }
+    if counts["escalated"]:
+        logger.warning(
+            "%s PENDING task(s) escalated after %sh without a specialist", counts["escalated"], TASK_ESCALATE_AFTER_HOURS
+        )
+    logger.info("Swept PENDING tasks: %s", counts)
+    return counts
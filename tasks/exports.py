@@ -0,0 +1,124 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from tasks.defaults import TASK_EXPORT_CHUNK_SIZE
+from tasks.models import Task
+
+# Flat task rows for ops/finance exports. Rows come from .values() through iterator(), so
+# memory stays flat however many tasks are exported; nothing is rendered ahead of the
+# client reading it. Under ASGI a sync iterator would be drained with sync_to_async(list)
+# before the first byte, so async_lines() reads one chunk at a time in a worker thread.
+
+VALUES = (
+    "id", "status",
+    "service_id", "service__title",
+    "customer_id", "customer__first_name", "customer__last_name",
+    "specialist_id", "specialist__first_name", "specialist__last_name",
+    "contact_name", "contact_phone", "address", "city",
+    "latitude", "longitude",
+    "note",
+    "scheduled_start", "scheduled_end",
+    "created_at", "updated_at",
+)
+
+COLUMNS = (
+    "id", "status", "status_display",
+    "service", "service_title",
+    "customer", "customer_name",
+    "specialist", "specialist_name",
+    "contact_name", "contact_phone", "address", "city",
+    "latitude", "longitude",
+    "note",
+    "scheduled_start", "scheduled_end",
+    "created_at", "updated_at",
+)
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _name(first, last):
+    return f"{first or ''} {last or ''}".strip() or None
+
+
+def _time(value):
+    return timezone.localtime(value).isoformat() if value else None
+
+
+def record(row):
+    return {
+        "id": row["id"],
+        "status": row["status"],
+        "status_display": Task.Status(row["status"]).label,
+        "service": row["service_id"],
+        "service_title": row["service__title"],
+        "customer": row["customer_id"],
+        "customer_name": _name(row["customer__first_name"], row["customer__last_name"]),
+        "specialist": row["specialist_id"],
+        "specialist_name": _name(row["specialist__first_name"], row["specialist__last_name"]) if row["specialist_id"] else None,
+        "contact_name": row["contact_name"],
+        "contact_phone": row["contact_phone"],
+        "address": row["address"],
+        "city": row["city"],
+        "latitude": float(row["latitude"]) if row["latitude"] is not None else None,
+        "longitude": float(row["longitude"]) if row["longitude"] is not None else None,
+        "note": row["note"],
+        "scheduled_start": _time(row["scheduled_start"]),
+        "scheduled_end": _time(row["scheduled_end"]),
+        "created_at": _time(row["created_at"]),
+        "updated_at": _time(row["updated_at"]),
+    }
+
+
+def records(*querysets):
+    # querysets are exported one after another (e.g. hot tasks, then the archive), each by id
+    for queryset in querysets:
+        rows = queryset.order_by("id").values(*VALUES).iterator(chunk_size=TASK_EXPORT_CHUNK_SIZE)
+        for row in rows:
+            yield record(row)
+
+
+def chunks(*querysets):
+    # records() in lists of up to TASK_EXPORT_CHUNK_SIZE, i.e. one database fetch each
+    rows = records(*querysets)
+    while chunk := list(islice(rows, TASK_EXPORT_CHUNK_SIZE)):
+        yield chunk
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+class Echo:
+    # csv.writer target that hands each formatted line straight back
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, header=True):
+    writer = csv.writer(Echo())
+    if header:
+        yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow([row[column] for column in COLUMNS])
+
+
+def lines(rows, output, header=True):
+    return csv_lines(rows, header) if output == "csv" else ndjson_lines(rows)
+
+
+async def async_lines(querysets, output):
+    # one yield per chunk; the cursor stays on the single thread sync_to_async runs it on
+    batches = chunks(*querysets)
+    fetch = sync_to_async(next)
+    if output == "csv":
+        yield "".join(csv_lines([]))
+    while (batch := await fetch(batches, None)) is not None:
+        yield "".join(lines(batch, output, header=False))
@@ -0,0 +1,357 @@
+import base64
+import binascii
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from tasks.defaults import (
+    TASK_FEED_AREA_PRECISION,
+    TASK_FEED_BUILD_LOCK_SECONDS,
+    TASK_FEED_BUILD_WAIT_SECONDS,
+    TASK_FEED_CACHE_SIZE,
+    TASK_FEED_CACHE_TTL,
+    TASK_FEED_DELTA_OVERLAP_SECONDS,
+    TASK_FEED_VERSION_TTL,
+    TASK_LEASE_SECONDS,
+)
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+from tasks.signals import task_created, task_escalated, task_status_changed
+from tasks.utils.geo import GEOHASH_ALPHABET, geohash_prefix_range
+
+# Every available-feed scope ("all", one per service, one per area cell) has a version
+# counter in the cache that is bumped whenever a task enters or leaves it. An unchanged
+# version means an unchanged feed, which lets polls be answered without reading the
+# tasks table.
+#
+# Each scope is also materialized: an ordered list of its newest TASK_FEED_CACHE_SIZE
+# (created_at, id) keys tagged with the version it reflects, plus one pre-serialized
+# payload per task. Creations and status changes patch the lists in place; a list whose
+# version no longer matches the counter is rebuilt by a single caller under a lock.
+
+ALL_FEED = "all"
+LEASES = "leases"  # leases only change what individual callers see, not the feed lists
+LEASES_ACTIVE_KEY = "task_feed_leases_active"  # present while any lease may still be running
+CACHEABLE_PARAMS = {"service", "area", "cursor", "limit", "fields", "exclude"}  # fields/exclude trim the page after
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def service_feed(service_id):
+    return f"service_{service_id}"
+
+
+def area_feed(cell):
+    return f"area_{cell}"
+
+
+def feeds_for(task):
+    feeds = [ALL_FEED, service_feed(task.service_id)]
+    if task.geohash:
+        feeds.append(area_feed(task.geohash[:TASK_FEED_AREA_PRECISION]))
+    return feeds
+
+
+def feed_for_params(params):
+    # only well-formed values get a scope of their own, so junk params can't mint cache keys
+    services = params.getlist("service")
+    area = params.get("area", "").lower()  # as TaskFilter.filter_area reads it
+    if len(services) == 1 and services[0].isdigit() and not area:
+        return service_feed(services[0])
+    if (
+        area and not services and len(area) == TASK_FEED_AREA_PRECISION
+        and all(ch in GEOHASH_ALPHABET for ch in area)
+    ):
+        return area_feed(area)
+    return ALL_FEED
+
+
+def is_cacheable(params, feed):
+    if not set(params) <= CACHEABLE_PARAMS:
+        return False
+    # "all" also covers combinations (service + area, several services) that have no list of their own
+    return feed != ALL_FEED or not (params.get("service") or params.get("area"))
+
+
+def version_key(feed):
+    return f"task_feed_version_{feed}"
+
+
+def list_key(feed):
+    return f"task_feed_list_{feed}"
+
+
+def item_key(task_id):
+    return f"task_feed_item_{task_id}"
+
+
+def _seed():
+    # a fresh counter starts from the clock so a flushed cache never reissues an old version
+    return int(time.time() * 1000)
+
+
+def current_version(feed):
+    key = version_key(feed)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), timeout=TASK_FEED_VERSION_TTL)
+        version = cache.get(key)
+    return version
+
+
+def bump_one(feed):
+    key = version_key(feed)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _seed(), timeout=TASK_FEED_VERSION_TTL)
+        return None
+
+
+def leases_changed():
+    bump_one(LEASES)
+    cache.set(LEASES_ACTIVE_KEY, 1, timeout=TASK_LEASE_SECONDS)
+
+
+def lease_state():
+    # Changes on every lease and release. Expiries bump nothing, so while any lease may still
+    # be running the state also moves to a new TASK_LEASE_SECONDS bucket, and once more when
+    # the last one has run out: a lapsed lease is visible within one lease period.
+    version = current_version(LEASES)
+    if cache.get(LEASES_ACTIVE_KEY) is None:
+        return str(version)
+    return f"{version}.{int(time.time()) // TASK_LEASE_SECONDS}"
+
+
+def etag(feed, version, leases, user_id, params):
+    canonical = "&".join(f"{k}={v}" for k, values in sorted(params.lists()) for v in sorted(values))
+    digest = hashlib.sha1(f"{feed}:{version}:{leases}:{user_id}:{canonical}".encode()).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def etag_matches(request, tag):
+    header = request.headers.get("If-None-Match", "")
+    return tag in (t.strip() for t in header.split(","))
+
+
+def encode_cursor(version, leases, issued_at=None):
+    issued_at = issued_at or timezone.now()
+    raw = f"{version}|{leases}|{issued_at.isoformat()}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    # (version, lease state, issued_at); cursors from before lease states carry None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        parts = raw.split("|")
+        if len(parts) == 2:
+            parts.insert(1, None)
+        version, leases, issued_at = parts
+        issued_at = parse_datetime(issued_at)
+        if issued_at is None:
+            raise ValueError
+        return int(version), leases, issued_at
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValidationError({"since": "Invalid cursor."})
+
+
+def delta_window_start(issued_at):
+    return issued_at - timedelta(seconds=TASK_FEED_DELTA_OVERLAP_SECONDS)
+
+
+def sort_key(created_at, task_id):
+    return [(created_at - EPOCH) // timedelta(microseconds=1), task_id]
+
+
+def key_to_position(key):
+    return [EPOCH + timedelta(microseconds=key[0]), key[1]]
+
+
+def feed_queryset(feed):
+    qs = (
+        Task.objects
+        .select_related("service", "customer", "specialist")
+        .filter(status=Task.Status.PENDING, specialist__isnull=True)
+        .order_by("-created_at", "-id")
+    )
+    if feed.startswith("service_"):
+        return qs.filter(service_id=feed.removeprefix("service_"))
+    if feed.startswith("area_"):
+        low, high = geohash_prefix_range(feed.removeprefix("area_"))
+        return qs.filter(geohash__gte=low, geohash__lt=high)
+    return qs
+
+
+def build(feed):
+    version = current_version(feed)
+    rows = list(feed_queryset(feed)[: TASK_FEED_CACHE_SIZE + 1])
+    complete = len(rows) <= TASK_FEED_CACHE_SIZE
+    rows = rows[:TASK_FEED_CACHE_SIZE]
+
+    store_items(rows)
+    value = {"version": version, "rows": [sort_key(t.created_at, t.id) for t in rows], "complete": complete}
+    cache.set(list_key(feed), value, timeout=TASK_FEED_CACHE_TTL)
+    return value
+
+
+def get_feed(feed, version):
+    cached = cache.get(list_key(feed))
+    if cached is not None and cached["version"] == version:
+        return cached
+
+    build_lock = f"task_feed_build_{feed}"
+    if cache.add(build_lock, 1, timeout=TASK_FEED_BUILD_LOCK_SECONDS):
+        try:
+            return build(feed)
+        finally:
+            cache.delete(build_lock)
+
+    # Someone else is rebuilding: wait briefly for their result, then let the caller hit the database.
+    deadline = time.monotonic() + TASK_FEED_BUILD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        cached = cache.get(list_key(feed))
+        if cached is not None and cached["version"] == version:
+            return cached
+    return None
+
+
+def store_items(tasks):
+    if tasks:
+        cache.set_many({item_key(t.id): TaskSerializer(t).data for t in tasks}, timeout=TASK_FEED_CACHE_TTL)
+
+
+def discard_item(task_id):
+    cache.delete(item_key(task_id))
+
+
+def load_items(task_ids):
+    found = cache.get_many([item_key(task_id) for task_id in task_ids])
+    missing = [task_id for task_id in task_ids if item_key(task_id) not in found]
+    if missing:
+        # a missing payload may belong to a task that just left the feed, so re-check availability
+        tasks = list(
+            Task.objects
+            .select_related("service", "customer", "specialist")
+            .filter(id__in=missing, status=Task.Status.PENDING, specialist__isnull=True)
+        )
+        store_items(tasks)
+        found.update({item_key(t.id): TaskSerializer(t).data for t in tasks})
+    return [found[item_key(task_id)] for task_id in task_ids if item_key(task_id) in found]
+
+
+def _start_index(rows, position):
+    # rows are sorted descending; first index whose key is strictly below position
+    if position is None:
+        return 0
+    key = sort_key(*position)
+    low, high = 0, len(rows)
+    while low < high:
+        mid = (low + high) // 2
+        if rows[mid] < key:
+            high = mid
+        else:
+            low = mid + 1
+    return low
+
+
+def cached_page(feed, version, position, limit, page_filter=None):
+    # (payloads, next_position), or None when the page has to come from the database
+    cached = get_feed(feed, version)
+    if cached is None:
+        return None
+
+    rows = cached["rows"]
+    start = _start_index(rows, position)
+    page = rows[start:start + limit]
+    if len(page) < limit and not cached["complete"]:
+        return None
+
+    has_next = start + limit < len(rows) or not cached["complete"]
+    next_position = key_to_position(page[-1]) if has_next and page else None
+
+    ids = [task_id for _, task_id in page]
+    if page_filter is not None:
+        ids = page_filter(ids)
+    return load_items(ids), next_position
+
+
+def patch(feed, version, add=None, remove=None):
+    # add: new tasks to insert, remove: the id of one task that left the feed
+    key = list_key(feed)
+    patch_lock = f"task_feed_patch_{feed}"
+    if version is None or not cache.add(patch_lock, 1, timeout=TASK_FEED_BUILD_LOCK_SECONDS):
+        cache.delete(key)
+        return
+
+    try:
+        cached = cache.get(key)
+        if cached is None:
+            return
+        if cached["version"] != version - 1:
+            # missed another change; a rebuild is cheaper than guessing
+            cache.delete(key)
+            return
+
+        rows = cached["rows"]
+        if remove is not None:
+            rows = [row for row in rows if row[1] != remove]
+        present = {row[1] for row in rows}
+        for task in add or ():
+            new_key = sort_key(task.created_at, task.id)
+            in_window = cached["complete"] or (rows and new_key > rows[-1])
+            if in_window and task.id not in present:
+                rows.insert(_start_index(rows, key_to_position(new_key)), new_key)
+                present.add(task.id)
+        complete = cached["complete"]
+        if len(rows) > TASK_FEED_CACHE_SIZE:
+            rows, complete = rows[:TASK_FEED_CACHE_SIZE], False
+
+        cache.set(key, {"version": version, "rows": rows, "complete": complete}, timeout=TASK_FEED_CACHE_TTL)
+    finally:
+        cache.delete(patch_lock)
+
+
+def _is_available(task):
+    return task.status == Task.Status.PENDING and task.specialist_id is None
+
+
+@receiver(task_created)
+def on_task_created(sender, tasks, **kwargs):
+    # a bulk insert touches each scope once: one bump and one patch with all of its new tasks
+    added = {}
+    for task in tasks:
+        for feed in feeds_for(task):
+            added.setdefault(feed, [])
+            if _is_available(task):
+                added[feed].append(task)
+    store_items([t for t in tasks if _is_available(t)])
+    for feed, feed_tasks in added.items():
+        patch(feed, bump_one(feed), add=feed_tasks)
+
+
+@receiver(task_status_changed)
+def on_task_status_changed(sender, task, previous_status, **kwargs):
+    if previous_status != Task.Status.PENDING and not _is_available(task):
+        return  # e.g. ACCEPTED -> IN_PROGRESS never touches the available feed
+
+    left_feed = not _is_available(task)
+    for feed in feeds_for(task):
+        version = bump_one(feed)
+        patch(feed, version, remove=task.id if left_feed else None)
+    if left_feed:
+        discard_item(task.id)
+
+
+@receiver(task_escalated)
+def on_task_escalated(sender, tasks, level, **kwargs):
+    # the tasks stay in the feed with a new updated_at; one bump per scope lets ETag polls
+    # and delta clients pick them up again
+    for feed in {feed for task in tasks for feed in feeds_for(task)}:
+        patch(feed, bump_one(feed))
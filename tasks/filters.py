@@ -1,10 +1,17 @@
 import django_filters
-from tasks.models import Task
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from tasks.defaults import NEAR_DEFAULT_RADIUS_KM, NEAR_MAX_RADIUS_KM
+from tasks.models import Task, TaskArchive
+from tasks.search import search
+from tasks.utils.geo import GEOHASH_ALPHABET, geohash_prefix_range
 
 
 class TaskFilter(django_filters.FilterSet):
     created_from = django_filters.DateTimeFilter(field_name="created_at", lookup_expr="gte")
     created_to = django_filters.DateTimeFilter(field_name="created_at", lookup_expr="lte")
+    area = django_filters.CharFilter(method="filter_area")  # geohash cell prefix
 
     class Meta:
         model = Task
@@ -12,4 +19,70 @@ class TaskFilter(django_filters.FilterSet):
             "status": ["exact"],
             "service": ["exact"],
             "specialist": ["isnull"],  # specialist__isnull=true/false
-        }
\ No newline at end of file
+        }
+
+    def filter_area(self, queryset, name, value):
+        value = value.lower()
+        if not value or any(ch not in GEOHASH_ALPHABET for ch in value):
+            raise ValidationError({"area": "Expected a geohash prefix."})
+        low, high = geohash_prefix_range(value)
+        return queryset.filter(geohash__gte=low, geohash__lt=high)
+
+
+class TaskArchiveFilter(TaskFilter):
+    class Meta(TaskFilter.Meta):
+        model = TaskArchive
+
+
+class TaskSearchFilter(BaseFilterBackend):
+    # ?search= over the full-text index; replaces the view's ordering with relevance
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text:
+            return queryset
+        return search(queryset, text)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Full-text search over contact name, phone, address and note.",
+                "schema": {"type": "string"},
+            },
+        ]
+
+
+def parse_point(params, name):
+    # ?<name>=lat,lng -> (lat, lng), or None when the parameter is absent
+    value = params.get(name)
+    if not value:
+        return None
+
+    try:
+        lat, lng = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValidationError({name: "Expected 'lat,lng'."})
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValidationError({name: "Coordinates are out of range."})
+    return lat, lng
+
+
+def parse_near_params(params):
+    # ?near=lat,lng&radius_km=5 -> (lat, lng, radius_km), or None when near is absent
+    near = parse_point(params, "near")
+    if near is None:
+        return None
+    lat, lng = near
+
+    try:
+        radius_km = float(params.get("radius_km", NEAR_DEFAULT_RADIUS_KM))
+    except ValueError:
+        raise ValidationError({"radius_km": "Must be a number."})
+    if not (0 < radius_km <= NEAR_MAX_RADIUS_KM):
+        raise ValidationError({"radius_km": f"Must be between 0 and {NEAR_MAX_RADIUS_KM}."})
+
+    return lat, lng, radius_km
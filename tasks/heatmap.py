@@ -0,0 +1,107 @@
+import time
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from services.models import Service
+from tasks.defaults import (
+    TASK_HEATMAP_BUILD_LOCK_SECONDS,
+    TASK_HEATMAP_BUILD_WAIT_SECONDS,
+    TASK_HEATMAP_CACHE_TTL,
+    TASK_HEATMAP_MAX_CELLS,
+)
+from tasks.models import Task
+
+# PENDING demand binned into lat/lng grid cells per Service.Type. Coordinates come out of
+# one values_list() query already cast to floats and are binned with a single np.unique
+# over packed (type, row, col) keys, a sparse histogram, so a country-wide grid costs
+# memory only for the cells that hold tasks. Results are cached for a short TTL.
+
+
+def heatmap_key(cell):
+    return f"task_heatmap_{cell}"
+
+
+def coordinates():
+    rows = (
+        Task.objects
+        .filter(status=Task.Status.PENDING, latitude__isnull=False, longitude__isnull=False)
+        .order_by()
+        .values_list(
+            F("service__service_type"),
+            Cast("latitude", FloatField()),
+            Cast("longitude", FloatField()),
+        )
+    )
+    return np.array(list(rows), dtype=np.float64).reshape(-1, 3)
+
+
+def bin_counts(data, cell):
+    # -> (types, rows, cols, counts) of the non-empty cells; rows/cols are floor(coordinate / cell)
+    types = data[:, 0].astype(np.int64)
+    lat_min, lng_min = int(np.floor(-90 / cell)), int(np.floor(-180 / cell))
+    n_rows, n_cols = int(np.floor(90 / cell)) - lat_min + 1, int(np.floor(180 / cell)) - lng_min + 1
+    rows = np.floor(data[:, 1] / cell).astype(np.int64) - lat_min
+    cols = np.floor(data[:, 2] / cell).astype(np.int64) - lng_min
+
+    keys, counts = np.unique((types * n_rows + rows) * n_cols + cols, return_counts=True)
+    cell_types, rest = np.divmod(keys, n_rows * n_cols)
+    cell_rows, cell_cols = np.divmod(rest, n_cols)
+    return cell_types, cell_rows + lat_min, cell_cols + lng_min, counts
+
+
+def compute(cell):
+    size = float(cell)
+    cell_types, rows, cols, counts = bin_counts(coordinates(), size)
+
+    types = []
+    for service_type in Service.Type:
+        mask = cell_types == service_type.value
+        order = np.argsort(-counts[mask], kind="stable")[:TASK_HEATMAP_MAX_CELLS]
+        lat = np.round((rows[mask][order] + 0.5) * size, 6)
+        lng = np.round((cols[mask][order] + 0.5) * size, 6)
+        type_counts = counts[mask]
+        types.append({
+            "service_type": service_type.value,
+            "service_type_display": service_type.label,
+            "total": int(type_counts.sum()),
+            "cells": [
+                {"latitude": float(a), "longitude": float(b), "count": int(c)}
+                for a, b, c in zip(lat, lng, type_counts[order])
+            ],
+        })
+
+    return {
+        "cell": size,
+        "generated_at": timezone.now(),
+        "total": int(counts.sum()),
+        "types": types,
+    }
+
+
+def get(cell):
+    key = heatmap_key(cell)
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    build_lock = f"{key}_lock"
+    if cache.add(build_lock, 1, timeout=TASK_HEATMAP_BUILD_LOCK_SECONDS):
+        try:
+            data = compute(cell)
+            cache.set(key, data, timeout=TASK_HEATMAP_CACHE_TTL)
+            return data
+        finally:
+            cache.delete(build_lock)
+
+    # another request is building it; wait for that instead of running the same scan
+    deadline = time.monotonic() + TASK_HEATMAP_BUILD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        data = cache.get(key)
+        if data is not None:
+            return data
+    return compute(cell)
@@ -0,0 +1,128 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from tasks.defaults import (
+    TASK_IDEMPOTENCY_KEY_MAX_LENGTH,
+    TASK_IDEMPOTENCY_LOCK_SECONDS,
+    TASK_IDEMPOTENCY_TTL,
+    TASK_IDEMPOTENCY_WAIT_SECONDS,
+)
+
+# Retries that carry the same Idempotency-Key get the first response back, byte for byte, from the cache.
+# Keys are scoped per user; the fingerprint (method, path, body) catches a key reused for another request.
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+POLL_SECONDS = 0.05
+
+
+def response_key(user_id, key):
+    return f"task_idempotency_{user_id}_{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def lock_key(user_id, key):
+    return f"{response_key(user_id, key)}_lock"
+
+
+def fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}\n".encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def store(cache_key, request_fingerprint, response):
+    cache.set(
+        cache_key,
+        {
+            "fingerprint": request_fingerprint,
+            "status": response.status_code,
+            "headers": list(response.items()),
+            "content": response.content,
+        },
+        timeout=TASK_IDEMPOTENCY_TTL,
+    )
+
+
+def replay(stored, request_fingerprint):
+    if stored["fingerprint"] != request_fingerprint:
+        return Response(
+            {"detail": f"{HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = HttpResponse(stored["content"], status=stored["status"])
+    for name, value in stored["headers"]:
+        response[name] = value
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def wait_for(cache_key):
+    deadline = time.monotonic() + TASK_IDEMPOTENCY_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(POLL_SECONDS)
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return stored
+    return None
+
+
+def idempotent(view):
+    # wraps a viewset write action; requests without the header run as before
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(self, request, *args, **kwargs)
+        if not key or len(key) > TASK_IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be 1-{TASK_IDEMPOTENCY_KEY_MAX_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = response_key(request.user.id, key)
+        request_fingerprint = fingerprint(request)
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return replay(stored, request_fingerprint)
+
+        lock = lock_key(request.user.id, key)
+        if not cache.add(lock, 1, timeout=TASK_IDEMPOTENCY_LOCK_SECONDS):
+            # a concurrent duplicate is running; answer with its response once it lands
+            stored = wait_for(cache_key)
+            if stored is None:
+                return Response(
+                    {"detail": f"A request with this {HEADER} is still in progress."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            return replay(stored, request_fingerprint)
+
+        try:
+            response = view(self, request, *args, **kwargs)
+        except Exception as exc:
+            try:
+                # 4xx answers are part of the outcome and are replayed too; anything else re-raises
+                response = self.handle_exception(exc)
+            except Exception:
+                cache.delete(lock)
+                raise
+
+        if response.status_code >= 500:
+            cache.delete(lock)
+            return response
+
+        def remember(rendered):
+            store(cache_key, request_fingerprint, rendered)
+            cache.delete(lock)
+
+        # the body only exists once DRF has picked a renderer and rendered it
+        response.add_post_render_callback(remember)
+        return response
+
+    return wrapper
@@ -0,0 +1,77 @@
+from django.core.cache import cache
+
+from tasks.defaults import TASK_LEASE_SECONDS
+
+# A lease is a short reservation a specialist places on a PENDING task while reviewing it.
+# It lives only in the cache (one key per task holding the specialist id), never as a row lock.
+
+# deletes KEYS[1] only while it still holds ARGV[1], in one step on the server
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def lease_key(task_id):
+    return f"task_lease_{task_id}"
+
+
+def acquire(task_id, specialist_id, timeout=TASK_LEASE_SECONDS):
+    key = lease_key(task_id)
+    if cache.add(key, specialist_id, timeout=timeout):
+        return True
+
+    if cache.get(key) == specialist_id:
+        cache.touch(key, timeout)
+        return True
+    return False
+
+
+def release(task_id, specialist_id):
+    key = lease_key(task_id)
+    client = getattr(cache, "client", None)
+    if hasattr(client, "get_client"):  # django_redis
+        encoded = client.encode(specialist_id)
+        return bool(client.get_client(write=True).eval(RELEASE_SCRIPT, 1, client.make_key(key), encoded))
+
+    # Other backends have no conditional delete: a lease that expires and is taken by
+    # someone else between the get and the delete is dropped too. Those backends are
+    # per-process (tests, local runs), where the window is a few instructions wide.
+    if cache.get(key) != specialist_id:
+        return False
+    cache.delete(key)
+    return True
+
+
+def holder(task_id):
+    return cache.get(lease_key(task_id))
+
+
+def holders(task_ids):
+    # {task_id: specialist_id} for the leased ids, one cache round trip for the whole batch
+    keys = {lease_key(task_id): task_id for task_id in task_ids}
+    found = cache.get_many(keys.keys()) if keys else {}
+    return {keys[key]: specialist_id for key, specialist_id in found.items()}
+
+
+def is_leased_by_other(task_id, specialist_id):
+    current = holder(task_id)
+    return current is not None and current != specialist_id
+
+
+def exclude_leased(tasks, specialist_id):
+    leased = holders([task.id for task in tasks])
+    return [task for task in tasks if leased.get(task.id, specialist_id) == specialist_id]
+
+
+def exclude_leased_rows(rows, specialist_id):
+    # same as exclude_leased for .values() rows
+    leased = holders([row["id"] for row in rows])
+    return [row for row in rows if leased.get(row["id"], specialist_id) == specialist_id]
+
+
+def exclude_leased_ids(task_ids, specialist_id):
+    leased = holders(task_ids)
+    return [task_id for task_id in task_ids if leased.get(task_id, specialist_id) == specialist_id]
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tasks import archive
+from tasks.defaults import TASK_ARCHIVE_AFTER_DAYS, TASK_ARCHIVE_BATCH
+
+
+class Command(BaseCommand):
+    help = "Move old DONE/CANCELED/EXPIRED tasks into the archive table in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=TASK_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=TASK_ARCHIVE_BATCH)
+        parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches.")
+
+    def handle(self, *args, **options):
+        moved = archive.archive(options["days"], options["batch_size"], options["max_batches"])
+        self.stdout.write(self.style.SUCCESS(f"{moved} task(s) archived."))
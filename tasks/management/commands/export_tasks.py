@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from tasks import exports
+from tasks.filters import TaskArchiveFilter, TaskFilter
+from tasks.models import Task, TaskArchive
+
+
+class Command(BaseCommand):
+    help = "Stream tasks as NDJSON or CSV, filtered like the task list (e.g. --filter status=4)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", choices=sorted(exports.FORMATS), default="ndjson")
+        parser.add_argument("--file", help="Write here instead of stdout.")
+        parser.add_argument("--filter", action="append", default=[], metavar="NAME=VALUE")
+        parser.add_argument("--history", action="store_true", help="Append archived tasks.")
+
+    def filtered(self, filterset_class, queryset, params):
+        filterset = filterset_class(params, queryset=queryset)
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_json())
+        return filterset.qs
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        for item in options["filter"]:
+            name, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"Expected NAME=VALUE, got {item!r}.")
+            params.appendlist(name, value)
+
+        querysets = [self.filtered(TaskFilter, Task.objects.all(), params)]
+        if options["history"]:
+            querysets.append(self.filtered(TaskArchiveFilter, TaskArchive.objects.all(), params))
+
+        lines = exports.lines(exports.records(*querysets), options["output"])
+        if not options["file"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        with open(options["file"], "w", newline="", encoding="utf-8") as out:
+            out.writelines(lines)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tasks import workload
+
+
+class Command(BaseCommand):
+    help = "Rebuild SpecialistProfile task counters from the tasks table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many profiles drifted.")
+
+    def handle(self, *args, **options):
+        drifted = workload.reconcile(dry_run=options["dry_run"])
+        verb = "would be fixed" if options["dry_run"] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"{drifted} specialist profile(s) {verb}."))
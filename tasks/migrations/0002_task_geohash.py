@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 06:48
+
+from django.db import migrations, models
+
+from tasks.defaults import GEOHASH_PRECISION
+from tasks.utils.geo import encode_geohash
+
+
+def backfill_geohash(apps, schema_editor):
+    Task = apps.get_model("tasks", "Task")
+    qs = (
+        Task.objects
+        .filter(latitude__isnull=False, longitude__isnull=False)
+        .only("id", "latitude", "longitude")
+        .order_by("id")
+    )
+
+    batch = []
+    for task in qs.iterator(chunk_size=2000):
+        task.geohash = encode_geohash(task.latitude, task.longitude, GEOHASH_PRECISION)
+        batch.append(task)
+        if len(batch) >= 2000:
+            Task.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    if batch:
+        Task.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'geohash'], name='task_status_geohash_idx'),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
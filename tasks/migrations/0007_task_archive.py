@@ -0,0 +1,41 @@
+# Generated by Django 6.0 on 2026-10-18 13:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0001_initial'),
+        ('tasks', '0006_task_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.IntegerField(choices=[(1, 'Pending'), (2, 'Accepted'), (3, 'In Progress'), (4, 'Done'), (5, 'Canceled')])),
+                ('contact_name', models.CharField(max_length=80)),
+                ('contact_phone', models.CharField(max_length=20)),
+                ('address', models.TextField()),
+                ('city', models.CharField(blank=True, default='', max_length=50)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('geohash', models.CharField(blank=True, default='', max_length=12)),
+                ('note', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='services.service')),
+                ('specialist', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer', '-created_at', '-id'], name='taskarchive_customer_idx'), models.Index(fields=['specialist', '-created_at', '-id'], name='taskarchive_specialist_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 6.0 on 2026-10-18 14:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Full-text index over contact_name, contact_phone, address and note, maintained by the
+# database itself so every write path (save, update(), bulk_create, raw SQL) stays in sync.
+
+COLUMNS = "contact_name, contact_phone, address, note"
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE tasks_task_fts USING fts5(
+        {COLUMNS}, content='tasks_task', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER tasks_task_fts_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(rowid, {COLUMNS})
+        VALUES (new.id, new.contact_name, new.contact_phone, new.address, new.note);
+    END
+    """,
+    f"""
+    CREATE TRIGGER tasks_task_fts_ad AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, {COLUMNS})
+        VALUES ('delete', old.id, old.contact_name, old.contact_phone, old.address, old.note);
+    END
+    """,
+    f"""
+    CREATE TRIGGER tasks_task_fts_au AFTER UPDATE OF {COLUMNS} ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, {COLUMNS})
+        VALUES ('delete', old.id, old.contact_name, old.contact_phone, old.address, old.note);
+        INSERT INTO tasks_task_fts(rowid, {COLUMNS})
+        VALUES (new.id, new.contact_name, new.contact_phone, new.address, new.note);
+    END
+    """,
+    "INSERT INTO tasks_task_fts(tasks_task_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS tasks_task_fts_au",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_ad",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_ai",
+    "DROP TABLE IF EXISTS tasks_task_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE tasks_task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('simple',
+            coalesce(contact_name, '') || ' ' || coalesce(contact_phone, '') || ' ' ||
+            coalesce(address, '') || ' ' || coalesce(note, ''))
+    ) STORED
+    """,
+    "CREATE INDEX task_search_vector_idx ON tasks_task USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS task_search_vector_idx",
+    "ALTER TABLE tasks_task DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run(statements_by_vendor):
+    def operation(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}),
+            run({"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRES_BACKWARD}),
+        ),
+        migrations.CreateModel(
+            name='TaskSearchIndex',
+            fields=[
+                ('task', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='tasks.task')),
+                ('document', models.TextField(db_column='tasks_task_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'tasks_task_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.0 on 2026-10-18 15:40
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite rebuilds tasks_task to add a NOT NULL column, which drops the full-text
+# triggers created in 0008; they are put back once the column exists.
+search = import_module("tasks.migrations.0008_task_search")
+SQLITE_TRIGGERS = search.SQLITE_FORWARD[1:4]
+SQLITE_DROP_TRIGGERS = search.SQLITE_BACKWARD[:3]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_schedule'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search.run({"sqlite": SQLITE_DROP_TRIGGERS}),
+            search.run({"sqlite": SQLITE_TRIGGERS}),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='escalation_level',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'None'), (1, 'Re-broadcast'), (2, 'Escalated')], default=0),
+        ),
+        migrations.RunPython(
+            search.run({"sqlite": SQLITE_TRIGGERS}),
+            search.run({"sqlite": SQLITE_DROP_TRIGGERS}),
+        ),
+        migrations.AddField(
+            model_name='taskarchive',
+            name='escalation_level',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'None'), (1, 'Re-broadcast'), (2, 'Escalated')], default=0),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='status',
+            field=models.IntegerField(choices=[(1, 'Pending'), (2, 'Accepted'), (3, 'In Progress'), (4, 'Done'), (5, 'Canceled'), (6, 'Expired')], default=1),
+        ),
+        migrations.AlterField(
+            model_name='taskarchive',
+            name='status',
+            field=models.IntegerField(choices=[(1, 'Pending'), (2, 'Accepted'), (3, 'In Progress'), (4, 'Done'), (5, 'Canceled'), (6, 'Expired')]),
+        ),
+        migrations.AlterField(
+            model_name='taskevent',
+            name='from_status',
+            field=models.PositiveSmallIntegerField(blank=True, choices=[(1, 'Pending'), (2, 'Accepted'), (3, 'In Progress'), (4, 'Done'), (5, 'Canceled'), (6, 'Expired')], null=True),
+        ),
+        migrations.AlterField(
+            model_name='taskevent',
+            name='to_status',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Pending'), (2, 'Accepted'), (3, 'In Progress'), (4, 'Done'), (5, 'Canceled'), (6, 'Expired')]),
+        ),
+    ]
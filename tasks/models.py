@@ -1,6 +1,41 @@
+from datetime import timedelta
+
 from django.conf import settings
 from django.db import models
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast
+
 from services.models import Service
+from tasks.defaults import GEOHASH_PRECISION
+from tasks.utils.geo import (
+    KM_PER_DEGREE_LAT,
+    bounding_box,
+    covering_cells,
+    encode_geohash,
+    geohash_prefix_range,
+    km_per_degree_lng,
+)
+
+
+class TaskQuerySet(models.QuerySet):
+    def near(self, latitude, longitude, radius_km):
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+
+        cells = Q()
+        for cell in covering_cells(min_lat, max_lat, min_lng, max_lng, GEOHASH_PRECISION):
+            low, high = geohash_prefix_range(cell)
+            cells |= Q(geohash__gte=low, geohash__lt=high)
+
+        # Equirectangular distance is accurate to well under 1% at city scale and needs no SQL trig functions.
+        d_lat = (Cast(F("latitude"), FloatField()) - Value(float(latitude))) * Value(KM_PER_DEGREE_LAT)
+        d_lng = (Cast(F("longitude"), FloatField()) - Value(float(longitude))) * Value(km_per_degree_lng(latitude))
+
+        return (
+            self.filter(cells)
+            .filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng))
+            .annotate(distance_sq=d_lat * d_lat + d_lng * d_lng)
+            .filter(distance_sq__lte=radius_km * radius_km)
+        )
 
 
 class Task(models.Model):
@@ -10,6 +45,12 @@ class Task(models.Model):
         IN_PROGRESS = 3, "In Progress"
         DONE = 4, "Done"
         CANCELED = 5, "Canceled"
+        EXPIRED = 6, "Expired"  # left PENDING too long; set by tasks.expiry
+
+    class Escalation(models.IntegerChoices):
+        NONE = 0, "None"
+        REBROADCAST = 1, "Re-broadcast"
+        ESCALATED = 2, "Escalated"
 
     customer = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -32,17 +73,163 @@ class Task(models.Model):
     )
 
     status = models.IntegerField(choices=Status.choices, default=Status.PENDING)
+    escalation_level = models.PositiveSmallIntegerField(choices=Escalation.choices, default=Escalation.NONE)
 
     contact_name = models.CharField(max_length=80)
     contact_phone = models.CharField(max_length=20)
     address = models.TextField()
+    city = models.CharField(max_length=50, blank=True, default="")
 
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
 
+    geohash = models.CharField(max_length=12, blank=True, default="", editable=False)
+
     note = models.TextField(null=True, blank=True)
 
+    # booked slot; the end follows from the service's base duration
+    scheduled_start = models.DateTimeField(null=True, blank=True)
+    scheduled_end = models.DateTimeField(null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "geohash"], name="task_status_geohash_idx"),
+            models.Index(fields=["status", "-created_at", "-id"], name="task_status_created_idx"),
+            models.Index(fields=["customer", "-created_at", "-id"], name="task_customer_created_idx"),
+            models.Index(fields=["specialist", "-created_at", "-id"], name="task_specialist_created_idx"),
+            models.Index(fields=["updated_at"], name="task_updated_idx"),
+            # overlap checks: specialist = ? AND scheduled_end > start AND scheduled_start < end
+            models.Index(
+                fields=["specialist", "scheduled_end", "scheduled_start"], name="task_specialist_schedule_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Task#{self.id} - {self.get_status_display()}"
+
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return ""
+        return encode_geohash(self.latitude, self.longitude, GEOHASH_PRECISION)
+
+    def compute_scheduled_end(self):
+        if self.scheduled_start is None:
+            return None
+        return self.scheduled_start + timedelta(minutes=self.service.base_duration_minutes)
+
+    def save(self, *args, **kwargs):
+        self.geohash = self.compute_geohash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = update_fields = {*update_fields, "geohash"}
+        # only touch the service when the slot can have changed
+        if update_fields is None or {"scheduled_start", "service"} & set(update_fields):
+            self.scheduled_end = self.compute_scheduled_end()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "scheduled_end"}
+        super().save(*args, **kwargs)
+
+
+class TaskEvent(models.Model):
+    # Append-only log of task creations and status changes, written in the same
+    # transaction as the change itself. Consumers read it in id order (tasks.events).
+    task = models.ForeignKey(Task, on_delete=models.DO_NOTHING, db_constraint=False, related_name="events")
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    from_status = models.PositiveSmallIntegerField(choices=Task.Status.choices, null=True, blank=True)
+    to_status = models.PositiveSmallIntegerField(choices=Task.Status.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["task", "id"], name="taskevent_task_idx"),
+        ]
+
+    def __str__(self):
+        return f"TaskEvent#{self.id} task={self.task_id} {self.from_status}->{self.to_status}"
+
+
+class TaskEventOffset(models.Model):
+    # last event id each named consumer has processed, and the ids below it still missing
+    consumer = models.CharField(max_length=50, primary_key=True)
+    position = models.BigIntegerField(default=0)
+    gaps = models.JSONField(default=list, blank=True)  # [[id, give up at (unix time)], ...]
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.consumer}@{self.position}"
+
+
+class TaskArchive(models.Model):
+    # Cold storage for DONE/CANCELED/EXPIRED tasks moved out of the hot table by tasks.archive.
+    # Rows keep their original Task id and field names, so TaskSerializer renders both.
+    id = models.BigIntegerField(primary_key=True)
+    customer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    service = models.ForeignKey(Service, on_delete=models.PROTECT, related_name="+")
+    specialist = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+
+    status = models.IntegerField(choices=Task.Status.choices)
+    escalation_level = models.PositiveSmallIntegerField(choices=Task.Escalation.choices, default=Task.Escalation.NONE)
+
+    contact_name = models.CharField(max_length=80)
+    contact_phone = models.CharField(max_length=20)
+    address = models.TextField()
+    city = models.CharField(max_length=50, blank=True, default="")
+
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default="")
+
+    note = models.TextField(null=True, blank=True)
+
+    scheduled_start = models.DateTimeField(null=True, blank=True)
+    scheduled_end = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["customer", "-created_at", "-id"], name="taskarchive_customer_idx"),
+            models.Index(fields=["specialist", "-created_at", "-id"], name="taskarchive_specialist_idx"),
+        ]
+
+    def __str__(self):
+        return f"TaskArchive#{self.id} - {self.get_status_display()}"
+
+
+class TaskSearchIndex(models.Model):
+    # Read-only view of the SQLite FTS5 table from migration 0008 (rowid = Task.id). The
+    # hidden column named after the table takes MATCH queries; "rank" is the bm25 score.
+    task = models.OneToOneField(
+        Task,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search_index",
+    )
+    document = models.TextField(db_column="tasks_task_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "tasks_task_fts"
@@ -0,0 +1,123 @@
+import hashlib
+import time
+
+import numpy as np
+from django.core.cache import cache
+
+from tasks.defaults import TASK_ROUTE_CACHE_TTL, TASK_ROUTE_TIME_BUDGET_SECONDS
+from tasks.models import Task
+from tasks.utils.geo import EARTH_RADIUS_KM
+
+# Visiting order for a specialist's ACCEPTED tasks: nearest neighbour for a first tour,
+# then 2-opt moves on a precomputed haversine matrix until nothing improves or the time
+# budget runs out. The route is an open path. It starts at the origin when one is known;
+# otherwise a zero-distance dummy node lets any stop come first. The order is cached
+# under a digest of the stops, so any change to the task set computes a new one.
+
+
+def route_key(specialist_id):
+    return f"task_route_{specialist_id}"
+
+
+def accepted_tasks(specialist):
+    return (
+        Task.objects
+        .select_related("service", "customer", "specialist")
+        .filter(specialist=specialist, status=Task.Status.ACCEPTED)
+        .order_by("created_at", "id")
+    )
+
+
+def haversine_matrix(lat, lng):
+    lat, lng = np.radians(lat), np.radians(lng)
+    d_lat = lat[:, None] - lat[None, :]
+    d_lng = lng[:, None] - lng[None, :]
+    a = np.sin(d_lat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(d_lng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def nearest_neighbour(dist):
+    # path from node 0 always moving to the closest unvisited node
+    n = len(dist)
+    path = [0]
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[path[-1]])
+        path.append(int(row.argmin()))
+        visited[path[-1]] = True
+    return np.array(path)
+
+
+def two_opt(dist, path, deadline):
+    # Reverses path[i:j+1] whenever that shortens the open path; node 0 stays first.
+    # Returns (path, converged). Each i scores every j at once.
+    path = path.copy()
+    n = len(path)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            if time.perf_counter() > deadline:
+                return path, False
+            a, b = path[i - 1], path[i]
+            c = path[i + 1:]
+            d = np.append(path[i + 2:], -1)
+            # closing edge (c, d) does not exist after the last stop
+            tail = np.where(d >= 0, dist[b, d] - dist[c, d], 0.0)
+            delta = dist[a, c] - dist[a, b] + tail
+            j = int(delta.argmin())
+            if delta[j] < -1e-9:
+                path[i:i + j + 2] = path[i:i + j + 2][::-1]
+                improved = True
+    return path, True
+
+
+def plan(points, origin=None, budget=TASK_ROUTE_TIME_BUDGET_SECONDS):
+    # points: [(lat, lng)] -> (visiting order as indexes into points, km travelled, converged)
+    deadline = time.perf_counter() + budget
+    coords = np.array(points, dtype=np.float64).reshape(-1, 2)
+    if origin is not None:
+        dist = haversine_matrix(
+            np.r_[origin[0], coords[:, 0]], np.r_[origin[1], coords[:, 1]]
+        )
+    else:
+        dist = np.zeros((len(coords) + 1, len(coords) + 1))
+        dist[1:, 1:] = haversine_matrix(coords[:, 0], coords[:, 1])
+
+    path, converged = two_opt(dist, nearest_neighbour(dist), deadline)
+    km = float(dist[path[:-1], path[1:]].sum())
+    return [int(node) - 1 for node in path[1:]], km, converged
+
+
+def digest(tasks, origin):
+    parts = [f"{origin}"] + [f"{t.id}:{t.latitude}:{t.longitude}" for t in tasks]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def get(specialist, origin=None):
+    # -> {"tasks": routed tasks in visiting order, "unrouted": tasks without coordinates,
+    #     "distance_km": ..., "optimized": False when the time budget cut 2-opt short}
+    tasks = list(accepted_tasks(specialist))
+    routable = [t for t in tasks if t.latitude is not None and t.longitude is not None]
+    unrouted = [t for t in tasks if t.latitude is None or t.longitude is None]
+
+    key = route_key(specialist.id)
+    signature = digest(routable, origin)
+    cached = cache.get(key)
+    if cached is not None and cached["digest"] == signature:
+        order, km, converged = cached["order"], cached["distance_km"], cached["optimized"]
+    else:
+        order, km, converged = plan([(t.latitude, t.longitude) for t in routable], origin) if routable else ([], 0.0, True)
+        cache.set(
+            key,
+            {"digest": signature, "order": order, "distance_km": km, "optimized": converged},
+            timeout=TASK_ROUTE_CACHE_TTL,
+        )
+
+    return {
+        "tasks": [routable[i] for i in order],
+        "unrouted": unrouted,
+        "distance_km": round(km, 3),
+        "optimized": converged,
+    }
@@ -0,0 +1,152 @@
+from bisect import bisect_right
+from datetime import timedelta
+
+from django.db.models import Exists, OuterRef
+
+from specialists.models import SpecialistProfile, SpecialistRequest
+from tasks.defaults import TASK_FREE_SLOTS_MAX_SPECIALISTS
+from tasks.models import Task
+
+# A specialist's calendar is the scheduled slots of their ACCEPTED/IN_PROGRESS tasks.
+# Overlap checks run as interval queries on task_specialist_schedule_idx
+# (specialist = ? AND scheduled_end > start AND scheduled_start < end), so only the
+# slots around the one being booked are ever read. Unscheduled tasks never conflict.
+
+ACTIVE = (Task.Status.ACCEPTED, Task.Status.IN_PROGRESS)
+
+
+def booked(specialist_ids, start, end):
+    return Task.objects.filter(
+        specialist_id__in=specialist_ids, status__in=ACTIVE, scheduled_end__gt=start, scheduled_start__lt=end
+    )
+
+
+def conflict_with(specialist):
+    # Exists() over the specialist's slots overlapping the outer task's slot; used as an UPDATE guard
+    return Exists(
+        Task.objects.filter(
+            specialist=specialist,
+            status__in=ACTIVE,
+            scheduled_end__gt=OuterRef("scheduled_start"),
+            scheduled_start__lt=OuterRef("scheduled_end"),
+        )
+    )
+
+
+def has_conflict(specialist_id, start, end, exclude_id=None):
+    if start is None:
+        return False
+    return booked([specialist_id], start, end).exclude(pk=exclude_id).exists()
+
+
+def calendar(specialist, start, end):
+    return (
+        booked([specialist.id], start, end)
+        .select_related("service", "customer", "specialist")
+        .order_by("scheduled_start", "id")
+    )
+
+
+class Calendar:
+    # In-memory slots per specialist for checking many bookings at once: merged, sorted
+    # intervals, so each check is one bisect.
+
+    def __init__(self, rows=()):
+        self.starts = {}
+        self.ends = {}
+        for specialist_id, start, end in sorted(rows, key=lambda row: (row[0], row[1])):
+            self.add(specialist_id, start, end)
+
+    @classmethod
+    def load(cls, specialist_ids, start, end):
+        return cls(booked(specialist_ids, start, end).values_list("specialist_id", "scheduled_start", "scheduled_end"))
+
+    def fits(self, specialist_id, start, end):
+        starts = self.starts.get(specialist_id, [])
+        i = bisect_right(starts, start)
+        if i and self.ends[specialist_id][i - 1] > start:
+            return False
+        return i == len(starts) or starts[i] >= end
+
+    def add(self, specialist_id, start, end):
+        starts = self.starts.setdefault(specialist_id, [])
+        ends = self.ends.setdefault(specialist_id, [])
+        i = bisect_right(starts, start)
+        # fold in every slot that touches [start, end)
+        if i and ends[i - 1] >= start:
+            i -= 1
+            start = starts[i]
+        j = i
+        while j < len(starts) and starts[j] <= end:
+            end = max(end, ends[j])
+            j += 1
+        starts[i:j] = [start]
+        ends[i:j] = [end]
+
+    def busy(self, specialist_id):
+        return list(zip(self.starts.get(specialist_id, []), self.ends.get(specialist_id, [])))
+
+
+def drop_conflicts(plan):
+    # {task_id: specialist_id} -> the same plan without bookings that overlap the specialist's
+    # calendar or an earlier booking of the same plan
+    rows = (
+        Task.objects
+        .filter(pk__in=plan, scheduled_start__isnull=False)
+        .values_list("id", "scheduled_start", "scheduled_end")
+    )
+    slots = {task_id: (start, end) for task_id, start, end in rows}
+    if not slots:
+        return plan
+
+    window_start = min(start for start, _ in slots.values())
+    window_end = max(end for _, end in slots.values())
+    cal = Calendar.load({plan[task_id] for task_id in slots}, window_start, window_end)
+
+    kept = {}
+    for task_id, specialist_id in plan.items():
+        if task_id in slots:
+            start, end = slots[task_id]
+            if not cal.fits(specialist_id, start, end):
+                continue
+            cal.add(specialist_id, start, end)
+        kept[task_id] = specialist_id
+    return kept
+
+
+def available_specialist_ids():
+    return list(
+        SpecialistProfile.objects
+        .filter(
+            is_available=True,
+            user__is_active=True,
+            user__specialist_request__status=SpecialistRequest.Status.APPROVED,
+        )
+        .order_by("user_id")
+        .values_list("user_id", flat=True)[:TASK_FREE_SLOTS_MAX_SPECIALISTS]
+    )
+
+
+def visible_specialist_ids(user):
+    # whose free slots a non-staff user may read: their own, and those of the specialists
+    # their ACCEPTED/IN_PROGRESS tasks are booked with
+    if user.role == user.RoleChoices.SPECIALIST:
+        return {user.id}
+    return set(Task.objects.filter(customer=user, status__in=ACTIVE).values_list("specialist_id", flat=True))
+
+
+def free_slots(specialist_ids, start, end, minutes):
+    # {specialist_id: [(slot_start, slot_end), ...]}: gaps of at least `minutes` in [start, end), one query
+    length = timedelta(minutes=minutes)
+    cal = Calendar.load(specialist_ids, start, end)
+    result = {}
+    for specialist_id in specialist_ids:
+        gaps, cursor = [], start
+        for busy_start, busy_end in cal.busy(specialist_id):
+            if busy_start - cursor >= length:
+                gaps.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+        if end - cursor >= length:
+            gaps.append((cursor, end))
+        result[specialist_id] = gaps
+    return result
@@ -0,0 +1,62 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, F, FloatField, Lookup, Q, Value
+from django.db.models.expressions import RawSQL
+
+from tasks.defaults import TASK_SEARCH_MAX_TERMS
+from tasks.models import Task, TaskSearchIndex
+
+# Ranked full-text search over contact_name, contact_phone, address and note, backed by
+# the FTS5 table (SQLite) or the tsvector column + GIN index (Postgres) created in
+# migration 0008. Every term is a prefix match and all terms must match. Results are
+# annotated with "search_rank", where lower is better on every backend.
+
+SEARCH_FIELDS = ("contact_name", "contact_phone", "address", "note")
+TERM_RE = re.compile(r"\w+")
+
+
+@TaskSearchIndex._meta.get_field("document").register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", (*lhs_params, *rhs_params)
+
+
+def terms(text):
+    return TERM_RE.findall(text or "")[:TASK_SEARCH_MAX_TERMS]
+
+
+def _sqlite(queryset, words):
+    # joined through the FTS table so SQLite drives the query from the MATCH and scores each hit once
+    query = " ".join(f'"{word}"*' for word in words)
+    return queryset.filter(search_index__document__match=query).annotate(search_rank=F("search_index__rank"))
+
+
+def _postgres(queryset, words):
+    query = " & ".join(f"{word}:*" for word in words)
+    table = Task._meta.db_table
+    matches = RawSQL(f"{table}.search_vector @@ to_tsquery('simple', %s)", [query], output_field=BooleanField())
+    rank = RawSQL(f"-ts_rank({table}.search_vector, to_tsquery('simple', %s))", [query], output_field=FloatField())
+    return queryset.alias(search_match=matches).filter(search_match=True).annotate(search_rank=rank)
+
+
+def _fallback(queryset, words):
+    for word in words:
+        q = Q()
+        for field in SEARCH_FIELDS:
+            q |= Q(**{f"{field}__icontains": word})
+        queryset = queryset.filter(q)
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def search(queryset, text):
+    # filtered and ranked queryset, best match first (ties by id)
+    words = terms(text)
+    if not words:
+        return queryset.none()
+    backend = {"sqlite": _sqlite, "postgresql": _postgres}.get(connection.vendor, _fallback)
+    return backend(queryset, words).order_by("search_rank", "id")
@@ -1,4 +1,9 @@
+from django.utils import timezone
 from rest_framework import serializers
+
+from kaaro.fieldsets import SparseFieldsetMixin
+from services.models import Service
+from tasks.defaults import TASK_FREE_SLOTS_MAX_SPECIALISTS, TASK_SCHEDULE_MAX_WINDOW_DAYS
 from tasks.models import Task
 
 
@@ -11,18 +16,25 @@ class TaskCreateSerializer(serializers.ModelSerializer):
             "contact_name",
             "contact_phone",
             "address",
+            "city",
             "latitude",
             "longitude",
             "note",
+            "scheduled_start",
         )
         read_only_fields = ("id",)
 
+    def validate_scheduled_start(self, value):
+        if value is not None and value <= timezone.now():
+            raise serializers.ValidationError("Must be in the future.")
+        return value
+
     def create(self, validated_data):
         validated_data["customer"] = self.context["request"].user
         return super().create(validated_data)
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     status_display = serializers.CharField(source="get_status_display", read_only=True)
     service_title = serializers.CharField(source="service.title", read_only=True)
     specialist_display = serializers.CharField(source="specialist.full_name", read_only=True)
@@ -46,6 +58,127 @@ class TaskSerializer(serializers.ModelSerializer):
             "latitude",
             "longitude",
             "note",
+            "scheduled_start",
+            "scheduled_end",
             "created_at",
         )
         read_only_fields = fields
+        field_sources = {
+            "service_title": ("service__title",),
+            "customer_display": ("customer__first_name", "customer__last_name"),
+            "specialist_display": ("specialist__first_name", "specialist__last_name"),
+            "status_display": ("status",),
+        }
+
+
+class TaskRowSerializer:
+    # Read-only fast path for list pages: TaskSerializer's payload built straight from .values()
+    # rows, without model instances or per-field serializer dispatch. Datetimes still go through
+    # DRF's DateTimeField.to_representation, so their format (microseconds, "Z", timezone)
+    # follows DATETIME_FORMAT exactly as TaskSerializer's does.
+    VALUES = (
+        "id",
+        "service_id", "service__title",
+        "customer_id", "customer__first_name", "customer__last_name",
+        "specialist_id", "specialist__first_name", "specialist__last_name",
+        "status",
+        "contact_name", "contact_phone", "address",
+        "latitude", "longitude",
+        "note",
+        "scheduled_start", "scheduled_end",
+        "created_at",
+    )
+    STATUS_LABELS = {status.value: str(status.label) for status in Task.Status}
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def prepare(cls, queryset):
+        # ordering keys outside VALUES (search_rank, distance_sq) ride along for the paginator's cursor
+        extra = [name.lstrip("-") for name in queryset.query.order_by if name.lstrip("-") not in cls.VALUES]
+        return queryset.values(*cls.VALUES, *extra)
+
+    @property
+    def data(self):
+        labels = self.STATUS_LABELS
+        to_datetime = serializers.DateTimeField().to_representation
+        data = []
+        for row in self.rows:
+            item = {
+                "id": row["id"],
+                "service": row["service_id"],
+                "service_title": row["service__title"],
+                "customer": row["customer_id"],
+                "customer_display": f"{row['customer__first_name']} {row['customer__last_name']}",
+                "specialist": row["specialist_id"],
+                "specialist_display": f"{row['specialist__first_name']} {row['specialist__last_name']}",
+                "status": row["status"],
+                "status_display": labels[row["status"]],
+                "contact_name": row["contact_name"],
+                "contact_phone": row["contact_phone"],
+                "address": row["address"],
+                "latitude": row["latitude"],
+                "longitude": row["longitude"],
+                "note": row["note"],
+                "scheduled_start": to_datetime(row["scheduled_start"]),
+                "scheduled_end": to_datetime(row["scheduled_end"]),
+                "created_at": to_datetime(row["created_at"]),
+            }
+            if row["specialist_id"] is None:
+                # TaskSerializer skips a dotted source through a missing relation
+                del item["specialist_display"]
+            data.append(item)
+        return data
+
+
+class TaskBulkItemSerializer(TaskCreateSerializer):
+    # services come from context["services"] ({id: Service}), loaded once for the whole batch
+    service = serializers.IntegerField()
+
+    def validate_service(self, value):
+        service = self.context["services"].get(value)
+        if service is None:
+            raise serializers.ValidationError(f'Invalid pk "{value}" - object does not exist.')
+        return service
+
+
+class TaskBulkCreateSerializer(serializers.Serializer):
+    MODES = ("atomic", "partial")
+
+    tasks = serializers.ListField(allow_empty=False)  # items are validated one by one in tasks.bulk
+    mode = serializers.ChoiceField(choices=MODES, default="atomic")
+
+    def validate_tasks(self, value):
+        max_items = self.context["max_items"]
+        if len(value) > max_items:
+            raise serializers.ValidationError(f"At most {max_items} tasks per request.")
+        return value
+
+
+class ScheduleWindowSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+    def validate(self, attrs):
+        if attrs["end"] <= attrs["start"]:
+            raise serializers.ValidationError({"end": "Must be after start."})
+        if (attrs["end"] - attrs["start"]).days >= TASK_SCHEDULE_MAX_WINDOW_DAYS:
+            raise serializers.ValidationError({"end": f"Window is limited to {TASK_SCHEDULE_MAX_WINDOW_DAYS} days."})
+        return attrs
+
+
+class FreeSlotsQuerySerializer(ScheduleWindowSerializer):
+    minutes = serializers.IntegerField(min_value=1, required=False)
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.all(), required=False)
+    specialist = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate_specialist(self, value):
+        if len(value) > TASK_FREE_SLOTS_MAX_SPECIALISTS:
+            raise serializers.ValidationError(f"At most {TASK_FREE_SLOTS_MAX_SPECIALISTS} specialists.")
+        return value
+
+
+class SlotSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.dispatch import Signal
+
+from tasks.models import Task
+
+# Both signals fire only after the surrounding transaction commits.
+task_created = Signal()  # kwargs: tasks (list of Task)
+task_status_changed = Signal()  # kwargs: task, previous_status
+task_escalated = Signal()  # kwargs: tasks (list of Task), level (Task.Escalation)
+
+
+def send_created(*tasks):
+    transaction.on_commit(lambda: task_created.send(sender=Task, tasks=list(tasks)))
+
+
+def send_status_changed(task, previous_status):
+    transaction.on_commit(
+        lambda: task_status_changed.send(sender=Task, task=task, previous_status=previous_status)
+    )
+
+
+def send_escalated(tasks, level):
+    transaction.on_commit(lambda: task_escalated.send(sender=Task, tasks=list(tasks), level=level))
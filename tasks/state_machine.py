@@ -0,0 +1,195 @@
+import random
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, PermissionDenied
+
+from tasks import feeds, leases, schedule, workload
+from tasks.defaults import CLAIM_ATTEMPTS, CLAIM_WINDOW
+from tasks.models import Task, TaskEvent
+from tasks.signals import send_status_changed
+
+# Every transition is a single conditional "UPDATE ... WHERE id = %s AND status = %s".
+# The row count tells us whether we won; only the losing path pays for a second
+# read to explain why. No row lock is held across the request. A won transition
+# appends its TaskEvent and shifts the specialist's workload counters in the same
+# transaction.
+
+
+class TransitionError(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Task cannot move to this status."
+    default_code = "invalid_transition"
+
+
+class ScheduleConflict(TransitionError):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Task overlaps another of your scheduled tasks."
+    default_code = "schedule_conflict"
+
+
+def load(task_id):
+    return Task.objects.select_related("service", "customer", "specialist").get(pk=task_id)
+
+
+def _changed(task_id, previous_status):
+    task = load(task_id)
+    send_status_changed(task, previous_status)
+    return task
+
+
+def _apply(task_id, guard, changes, actor, previous_status, *conditions):
+    with transaction.atomic(savepoint=False):
+        applied = Task.objects.filter(*conditions, pk=task_id, **guard).update(**changes, updated_at=timezone.now()) == 1
+        if applied:
+            TaskEvent.objects.create(
+                task_id=task_id, actor=actor, from_status=previous_status, to_status=changes["status"]
+            )
+            workload.shift(task_id, previous_status, changes["status"])
+    if applied:
+        # the feed lists are patched on commit; dropping the payload now keeps cached pages from showing it meanwhile
+        feeds.discard_item(task_id)
+    return applied
+
+
+def _current(task_id):
+    row = (
+        Task.objects.filter(pk=task_id)
+        .values("status", "customer_id", "specialist_id", "scheduled_start", "scheduled_end")
+        .first()
+    )
+    if row is None:
+        raise NotFound("Task not found.")
+    return row
+
+
+def accept(task_id, specialist):
+    # someone else's lease turns the request away before it costs a write
+    if leases.is_leased_by_other(task_id, specialist.id):
+        raise TransitionError("Task is not available.")
+
+    guard = {"status": Task.Status.PENDING, "specialist__isnull": True}
+    changes = {"status": Task.Status.ACCEPTED, "specialist": specialist}
+    # the slot check rides in the same UPDATE, so it costs no extra query on success
+    if not _apply(task_id, guard, changes, specialist, Task.Status.PENDING, ~schedule.conflict_with(specialist)):
+        row = _current(task_id)
+        if row["status"] == Task.Status.PENDING and row["specialist_id"] is None and schedule.has_conflict(
+            specialist.id, row["scheduled_start"], row["scheduled_end"], exclude_id=task_id
+        ):
+            raise ScheduleConflict()
+        raise TransitionError("Task is not available.")
+
+    leases.release(task_id, specialist.id)
+    return _changed(task_id, Task.Status.PENDING)
+
+
+def start(task_id, specialist):
+    guard = {"status": Task.Status.ACCEPTED, "specialist": specialist}
+    if not _apply(task_id, guard, {"status": Task.Status.IN_PROGRESS}, specialist, Task.Status.ACCEPTED):
+        row = _current(task_id)
+        if row["specialist_id"] != specialist.id:
+            raise PermissionDenied("You can only start your own accepted task.")
+        raise TransitionError("Task must be in ACCEPTED status to start.")
+    return _changed(task_id, Task.Status.ACCEPTED)
+
+
+def complete(task_id, specialist):
+    guard = {"status": Task.Status.IN_PROGRESS, "specialist": specialist}
+    if not _apply(task_id, guard, {"status": Task.Status.DONE}, specialist, Task.Status.IN_PROGRESS):
+        row = _current(task_id)
+        if row["specialist_id"] != specialist.id:
+            raise PermissionDenied("You can only complete your own task.")
+        raise TransitionError("Task must be IN_PROGRESS to be completed.")
+    return _changed(task_id, Task.Status.IN_PROGRESS)
+
+
+def cancel(task_id, customer):
+    # one guard per source status so the event records exactly which one we left
+    for previous in (Task.Status.PENDING, Task.Status.ACCEPTED):
+        guard = {"status": previous, "customer": customer}
+        if _apply(task_id, guard, {"status": Task.Status.CANCELED}, customer, previous):
+            return _changed(task_id, previous)
+
+    row = _current(task_id)
+    if row["customer_id"] != customer.id:
+        raise PermissionDenied("You can only cancel your own task.")
+    raise TransitionError("Task cannot be canceled now.")
+
+
+def claim_next(specialist, candidates):
+    # candidates: a filtered, ordered queryset of PENDING tasks; returns the claimed task or None
+    guard = {"status": Task.Status.PENDING, "specialist__isnull": True}
+    changes = {"status": Task.Status.ACCEPTED, "specialist": specialist}
+    free = ~schedule.conflict_with(specialist)
+    candidates = candidates.filter(free, **guard)
+
+    if connection.features.has_select_for_update_skip_locked:
+        # Rows another specialist is claiming right now are skipped instead of waited on,
+        # so concurrent callers walk down the queue and each get a different task.
+        with transaction.atomic():
+            ids = list(candidates.select_for_update(skip_locked=True).values_list("id", flat=True)[:CLAIM_WINDOW])
+            ids = _unleased(ids, specialist.id)
+            if not ids or not _apply(ids[0], guard, changes, specialist, Task.Status.PENDING, free):
+                return None
+            task_id = ids[0]
+        leases.release(task_id, specialist.id)
+        return _changed(task_id, Task.Status.PENDING)
+
+    # No SKIP LOCKED (SQLite): race with conditional UPDATEs. The head of the queue is tried
+    # first; only after losing it does the caller move on to a shuffled window of the next
+    # rows, so colliding callers spread out instead of all retrying the same one.
+    for _ in range(CLAIM_ATTEMPTS):
+        ids = list(candidates.values_list("id", flat=True)[:CLAIM_WINDOW])
+        if not ids:
+            return None
+        ids = _unleased(ids, specialist.id)
+        rest = ids[1:]
+        random.shuffle(rest)
+        for task_id in ids[:1] + rest:
+            if _apply(task_id, guard, changes, specialist, Task.Status.PENDING, free):
+                leases.release(task_id, specialist.id)
+                return _changed(task_id, Task.Status.PENDING)
+    return None
+
+
+def _unleased(ids, specialist_id):
+    leased = leases.holders(ids)
+    return [task_id for task_id in ids if leased.get(task_id, specialist_id) == specialist_id]
+
+
+def assign_batch(plan, actor=None):
+    # plan: {task_id: specialist_id}. One conditional UPDATE for the whole batch; rows that
+    # were accepted, canceled or leased by someone else meanwhile are simply left out.
+    leased = leases.holders(plan)
+    plan = {task_id: sid for task_id, sid in plan.items() if leased.get(task_id, sid) == sid}
+    if not plan:
+        return []
+
+    now = timezone.now()
+    specialist = Case(*(When(pk=task_id, then=Value(sid)) for task_id, sid in plan.items()), output_field=IntegerField())
+    with transaction.atomic():
+        (
+            Task.objects
+            .filter(pk__in=plan, status=Task.Status.PENDING, specialist__isnull=True)
+            .update(status=Task.Status.ACCEPTED, specialist_id=specialist, updated_at=now)
+        )
+        won = [
+            task
+            for task in Task.objects.select_related("service", "customer", "specialist").filter(
+                pk__in=plan, status=Task.Status.ACCEPTED, updated_at=now
+            )
+            if task.specialist_id == plan[task.id]
+        ]
+        TaskEvent.objects.bulk_create(
+            TaskEvent(task_id=task.id, actor=actor, from_status=Task.Status.PENDING, to_status=Task.Status.ACCEPTED)
+            for task in won
+        )
+        workload.shift_many(Counter(task.specialist_id for task in won), Task.Status.PENDING, Task.Status.ACCEPTED)
+
+    for task in won:
+        feeds.discard_item(task.id)
+        send_status_changed(task, Task.Status.PENDING)
+    return won
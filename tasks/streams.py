@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.dispatch import receiver
+from rest_framework.renderers import BaseRenderer
+
+from kaaro import renderers
+from tasks.defaults import TASK_STREAM_CHANNEL, TASK_STREAM_KEEPALIVE_SECONDS, TASK_STREAM_QUEUE_SIZE
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+from tasks.signals import task_created, task_escalated, task_status_changed
+from tasks.utils.geo import haversine_km
+
+logger = logging.getLogger(__name__)
+
+# Server-Sent Events feed of the available-task queue. Each event is rendered to
+# its SSE frame once at publish time; subscribers only receive the shared bytes.
+
+
+class EventStreamRenderer(BaseRenderer):
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # only used for error bodies; the stream itself bypasses rendering
+        return b"data: " + renderers.dumps(data) + b"\n\n"
+
+
+class Subscription:
+    def __init__(self, loop, service_ids=None, near=None):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=TASK_STREAM_QUEUE_SIZE)
+        self.service_ids = set(service_ids or ())
+        self.near = near
+        self.lagged = False
+
+    def matches(self, meta):
+        if self.service_ids and meta["service"] not in self.service_ids:
+            return False
+        if self.near is None:
+            return True
+        if meta["lat"] is None:
+            return False
+        lat, lng, radius_km = self.near
+        return haversine_km(lat, lng, meta["lat"], meta["lng"]) <= radius_km
+
+    def deliver(self, frame):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # a slow client is told to refetch instead of holding an unbounded backlog
+            self.lagged = True
+
+
+class LocalBroker:
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, **filters):
+        subscription = Subscription(asyncio.get_running_loop(), **filters)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, meta, frame):
+        self.dispatch(meta, frame)
+
+    def dispatch(self, meta, frame):
+        # publishers run in worker threads, so hand frames to each subscriber's own loop
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if not subscription.matches(meta):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, frame)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+
+class RedisBroker(LocalBroker):
+    # One Redis pub/sub channel shared by all processes; each process runs a single
+    # listener thread that fans messages out to its local subscribers.
+    def __init__(self, channel=TASK_STREAM_CHANNEL):
+        super().__init__()
+        self.channel = channel
+        self._listener = None
+
+    def redis(self):
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+
+    def subscribe(self, **filters):
+        self._ensure_listener()
+        return super().subscribe(**filters)
+
+    def publish(self, meta, frame):
+        self.redis().publish(self.channel, json.dumps({"meta": meta, "frame": frame.decode()}))
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name="task-stream-listener", daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    payload = json.loads(message["data"])
+                    self.dispatch(payload["meta"], payload["frame"].encode())
+            except Exception:
+                logger.exception("Task stream listener lost Redis, reconnecting")
+                time.sleep(1)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        backend = getattr(settings, "TASK_STREAM_BACKEND", None)
+        if backend is None:
+            backend = "redis" if "django_redis" in settings.CACHES["default"]["BACKEND"] else "memory"
+        _broker = RedisBroker() if backend == "redis" else LocalBroker()
+    return _broker
+
+
+def event_frame(event, data):
+    return b"event: " + event.encode() + b"\ndata: " + renderers.dumps(data) + b"\n\n"
+
+
+def event_meta(task):
+    return {
+        "service": task.service_id,
+        "lat": float(task.latitude) if task.latitude is not None else None,
+        "lng": float(task.longitude) if task.longitude is not None else None,
+    }
+
+
+async def event_stream(broker=None, **filters):
+    broker = broker or get_broker()
+    subscription = broker.subscribe(**filters)
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscription.queue.get(), TASK_STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if subscription.lagged:
+                subscription.lagged = False
+                yield b"event: resync\ndata: {}\n\n"
+            yield frame
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@receiver(task_created)
+def publish_created(sender, tasks, **kwargs):
+    try:
+        broker = get_broker()
+        for task in tasks:
+            if task.status == Task.Status.PENDING:
+                broker.publish(event_meta(task), event_frame("task.created", TaskSerializer(task).data))
+    except Exception:
+        logger.exception("Failed to publish task.created")
+
+
+@receiver(task_status_changed)
+def publish_removed(sender, task, previous_status, **kwargs):
+    if previous_status != Task.Status.PENDING or task.status == Task.Status.PENDING:
+        return
+    try:
+        data = {"id": task.id, "status": task.status}
+        get_broker().publish(event_meta(task), event_frame("task.removed", data))
+    except Exception:
+        logger.exception("Failed to publish task.removed")
+
+
+@receiver(task_escalated)
+def publish_rebroadcast(sender, tasks, level, **kwargs):
+    if level != Task.Escalation.REBROADCAST:
+        return
+    try:
+        broker = get_broker()
+        for task in tasks:
+            broker.publish(event_meta(task), event_frame("task.rebroadcast", TaskSerializer(task).data))
+    except Exception:
+        logger.exception("Failed to publish task.rebroadcast")
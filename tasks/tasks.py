@@ -0,0 +1,21 @@
+from celery import shared_task
+from django.conf import settings
+
+from tasks import archive, dispatch, expiry
+
+
+@shared_task
+def dispatch_pending_tasks():
+    if not settings.TASK_DISPATCH_ENABLED:
+        return 0
+    return dispatch.run()
+
+
+@shared_task
+def archive_terminal_tasks():
+    return archive.archive()
+
+
+@shared_task
+def sweep_pending_tasks():
+    return expiry.sweep()
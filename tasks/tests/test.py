@@ -1,6 +1,7 @@
 import pytest
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from services.models import Service
@@ -147,7 +148,7 @@ class TestTaskEndpoints:
         approve_specialist(s2)
 
         c1 = auth_client(api_client, s1)
-        c2 = auth_client(api_client, s2)
+        c2 = auth_client(APIClient(), s2)
 
         # accepts successfully
         res1 = c1.post(reverse("task-accept", kwargs={"pk": task.id}), data={}, format="json")
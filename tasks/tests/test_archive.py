@@ -0,0 +1,109 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from specialists.models import SpecialistProfile
+from tasks import archive, dashboard, state_machine, workload
+from tasks.models import Task, TaskArchive, TaskEvent
+from tasks.tests.test import User, approve_specialist, auth_client, extract_items, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def setup():
+    customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+    specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(specialist)
+    service = make_service()
+    tasks = [
+        Task.objects.create(customer=customer, service=service, contact_name=f"T{i}", contact_phone="0912", address="x")
+        for i in range(6)
+    ]
+    for task in tasks[:3]:
+        state_machine.accept(task.id, specialist)
+        state_machine.start(task.id, specialist)
+        state_machine.complete(task.id, specialist)
+    state_machine.cancel(tasks[3].id, customer)
+    # tasks[4], tasks[5] stay PENDING
+    Task.objects.filter(id__in=[t.id for t in tasks]).update(updated_at=timezone.now() - timedelta(days=60))
+    return customer, specialist, tasks
+
+
+class TestArchiveJob:
+    def test_moves_only_old_terminal_tasks(self, setup):
+        _, _, tasks = setup
+        Task.objects.filter(pk=tasks[3].id).update(updated_at=timezone.now())  # canceled just now
+
+        assert archive.archive(older_than_days=30) == 3
+        assert set(TaskArchive.objects.values_list("id", flat=True)) == {t.id for t in tasks[:3]}
+        assert set(Task.objects.values_list("id", flat=True)) == {t.id for t in tasks[3:]}
+
+        archived = TaskArchive.objects.get(pk=tasks[0].id)
+        assert archived.status == Task.Status.DONE
+        assert archived.created_at == tasks[0].created_at
+        assert TaskEvent.objects.filter(task_id=tasks[0].id).count() == 3  # the log outlives the hot row
+
+    def test_batched_and_resumable(self, setup):
+        assert archive.archive(batch_size=1, max_batches=2) == 2
+        assert TaskArchive.objects.count() == 2
+
+        out = StringIO()
+        call_command("archive_tasks", "--batch-size", "1", stdout=out)
+        assert "2 task(s) archived." in out.getvalue()
+        assert TaskArchive.objects.count() == 4
+        assert not Task.objects.filter(status__in=archive.TERMINAL).exists()
+
+
+class TestHistoryReads:
+    def test_list_merges_archive_only_on_request(self, api_client, setup):
+        customer, _, tasks = setup
+        archive.archive()
+        client = auth_client(api_client, customer)
+
+        hot = extract_items(client.get(reverse("task-list")).json())
+        assert {i["id"] for i in hot} == {t.id for t in tasks[4:]}
+
+        ids, res = [], client.get(reverse("task-list"), {"history": 1, "limit": 4})
+        while True:
+            body = res.json()
+            ids += [i["id"] for i in body["results"]]
+            if not body["next"]:
+                break
+            res = client.get(body["next"])
+        assert ids == [t.id for t in reversed(tasks)]
+
+        done = client.get(reverse("task-list"), {"history": 1, "status": Task.Status.DONE}).json()["results"]
+        assert [i["id"] for i in done] == [t.id for t in reversed(tasks[:3])]
+        assert done[0]["status_display"] == "Done"
+        assert done[0]["specialist_display"]
+
+    def test_retrieve_archived(self, api_client, setup):
+        customer, _, tasks = setup
+        archive.archive()
+        client = auth_client(api_client, customer)
+        url = reverse("task-detail", kwargs={"pk": tasks[0].id})
+
+        assert client.get(url).status_code == 404
+        res = client.get(url, {"history": 1})
+        assert res.status_code == 200
+        assert res.json()["id"] == tasks[0].id
+
+        other = auth_client(type(api_client)(), make_user("+989125555555", role=User.RoleChoices.CUSTOMER))
+        assert other.get(url, {"history": 1}).status_code == 404
+
+    def test_summary_and_counters_include_archive(self, setup):
+        customer, specialist, _ = setup
+        SpecialistProfile.objects.create(user=specialist)
+        archive.archive()
+
+        body = dashboard.compute(customer)
+        assert body["total"] == 6
+        assert {r["status"]: r["count"] for r in body["by_status"]}[Task.Status.DONE] == 3
+
+        workload.reconcile()
+        assert SpecialistProfile.objects.get(user=specialist).done_count == 3
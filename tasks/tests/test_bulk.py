@@ -0,0 +1,83 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from services.models import Service
+from tasks.models import Task, TaskEvent
+from tasks.tests.test import User, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def customer():
+    return make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+
+
+@pytest.fixture
+def services():
+    return make_service(), Service.objects.create(title="Repair", service_type=Service.Type.REPAIR)
+
+
+def item(service, **extra):
+    return {"service": service.id, "contact_name": "A", "contact_phone": "0912", "address": "x", **extra}
+
+
+class TestBulkCreate:
+    def test_creates_all_with_few_queries(self, api_client, customer, services, django_capture_on_commit_callbacks):
+        cleaning, repair = services
+        items = [item(cleaning if i % 2 else repair, latitude="35.700000", longitude="51.400000") for i in range(50)]
+        client = auth_client(api_client, customer)
+
+        with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+            res = client.post(reverse("task-bulk"), {"tasks": items}, format="json")
+        assert res.status_code == 201
+        assert len([q for q in queries if "services_service" in q["sql"]]) == 1
+        assert len([q for q in queries if q["sql"].startswith("INSERT")]) == 2  # tasks + events
+
+        body = res.json()
+        assert body["created"] == 50
+        assert [r["index"] for r in body["results"]] == list(range(50))
+        assert body["results"][1]["task"]["service_title"] == "Cleaning"
+        assert body["results"][0]["task"]["customer"] == customer.id
+
+        assert Task.objects.filter(customer=customer).count() == 50
+        assert Task.objects.exclude(geohash="").count() == 50
+        assert TaskEvent.objects.filter(to_status=Task.Status.PENDING).count() == 50
+
+    def test_atomic_rejects_whole_batch(self, api_client, customer, services):
+        cleaning, _ = services
+        items = [item(cleaning), item(cleaning, contact_name=""), {"service": 9999}, "nope"]
+        res = auth_client(api_client, customer).post(reverse("task-bulk"), {"tasks": items}, format="json")
+        assert res.status_code == 400
+
+        results = res.json()["results"]
+        assert [r["status"] for r in results] == ["skipped", "invalid", "invalid", "invalid"]
+        assert "contact_name" in results[1]["errors"]
+        assert "does not exist" in results[2]["errors"]["service"][0]
+        assert Task.objects.count() == 0
+
+    def test_partial_keeps_valid_items(self, api_client, customer, services):
+        cleaning, repair = services
+        items = [item(cleaning), {"service": 9999}, item(repair)]
+        res = auth_client(api_client, customer).post(
+            reverse("task-bulk"), {"tasks": items, "mode": "partial"}, format="json"
+        )
+        assert res.status_code == 207
+        body = res.json()
+        assert body["created"] == 2
+        assert [r["status"] for r in body["results"]] == ["created", "invalid", "created"]
+        assert body["results"][2]["task"]["service"] == repair.id
+        assert Task.objects.count() == 2
+
+    def test_max_batch_size(self, api_client, customer, services, settings):
+        settings.TASK_BULK_CREATE_MAX_ITEMS = 2
+        cleaning, _ = services
+        client = auth_client(api_client, customer)
+        res = client.post(reverse("task-bulk"), {"tasks": [item(cleaning)] * 3}, format="json")
+        assert res.status_code == 400
+        assert "tasks" in res.json()
+        assert client.post(reverse("task-bulk"), {"tasks": []}, format="json").status_code == 400
+        assert client.post(reverse("task-bulk"), {"tasks": [item(cleaning)], "mode": "x"}, format="json").status_code == 400
+        assert Task.objects.count() == 0
@@ -0,0 +1,93 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from tasks import state_machine
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+def make_task(customer, service, **extra):
+    return Task.objects.create(
+        customer=customer,
+        service=service,
+        contact_name="A",
+        contact_phone="09120000001",
+        address="Addr",
+        **extra,
+    )
+
+
+@pytest.fixture
+def specialist():
+    user = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(user)
+    return user
+
+
+class TestClaimNext:
+    def test_claims_oldest_matching_task(self, api_client, specialist):
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        cleaning = make_service()
+        repair = make_service()
+        oldest = make_task(customer, cleaning)
+        make_task(customer, cleaning)
+        other_service = make_task(customer, repair)
+        Task.objects.filter(id=other_service.id).update(created_at=oldest.created_at.replace(year=2000))
+
+        client = auth_client(api_client, specialist)
+        # sqlite ignores FOR UPDATE, so this exercises the SKIP LOCKED path's query shape
+        with mock.patch.object(connection.features, "has_select_for_update_skip_locked", True):
+            res = client.post(reverse("task-claim-next") + f"?service={cleaning.id}")
+        assert res.status_code == 200
+        assert res.json()["id"] == oldest.id
+        assert res.json()["status"] == Task.Status.ACCEPTED
+        assert res.json()["specialist"] == specialist.id
+
+    def test_each_claim_gets_a_different_task_then_204(self, api_client, specialist):
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        service = make_service()
+        tasks = [make_task(customer, service) for _ in range(3)]
+
+        client = auth_client(api_client, specialist)
+        claimed = [client.post(reverse("task-claim-next")).json()["id"] for _ in tasks]
+        assert sorted(claimed) == sorted(t.id for t in tasks)
+        assert client.post(reverse("task-claim-next")).status_code == 204
+
+    def test_fallback_skips_rows_lost_to_a_race(self, specialist):
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        service = make_service()
+        first = make_task(customer, service)
+        second = make_task(customer, service)
+
+        real_apply = state_machine._apply
+
+        def racing_apply(task_id, *args):
+            if task_id == first.id:
+                return False  # another specialist got there first
+            return real_apply(task_id, *args)
+
+        candidates = Task.objects.order_by("created_at", "id")
+        with mock.patch.object(connection.features, "has_select_for_update_skip_locked", False), \
+                mock.patch.object(state_machine, "_apply", racing_apply):
+            task = state_machine.claim_next(specialist, candidates)
+        assert task.id == second.id
+
+    def test_fallback_claims_oldest_task(self, specialist):
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        service = make_service()
+        tasks = [make_task(customer, service) for _ in range(5)]
+
+        candidates = Task.objects.filter(status=Task.Status.PENDING).order_by("created_at", "id")
+        with mock.patch.object(connection.features, "has_select_for_update_skip_locked", False):
+            claimed = [state_machine.claim_next(specialist, candidates).id for _ in tasks]
+        assert claimed == [t.id for t in tasks]
+
+    def test_requires_approved_specialist(self, api_client):
+        user = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        client = auth_client(api_client, user)
+        assert client.post(reverse("task-claim-next")).status_code == 403
@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from services.models import Service
+from tasks import state_machine
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def setup():
+    customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+    specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(specialist)
+    cleaning = make_service()
+    repair = Service.objects.create(title="Repair", service_type=Service.Type.REPAIR)
+    tasks = [
+        Task.objects.create(customer=customer, service=service, contact_name="A", contact_phone="0912", address="x")
+        for service in (cleaning, cleaning, repair)
+    ]
+    return customer, specialist, cleaning, repair, tasks
+
+
+def counts_by_status(body):
+    return {row["status"]: row["count"] for row in body["by_status"]}
+
+
+class TestSummary:
+    def test_counts_per_status_and_service(self, api_client, setup):
+        customer, specialist, cleaning, repair, tasks = setup
+        state_machine.accept(tasks[0].id, specialist)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = auth_client(api_client, customer).get(reverse("task-summary"))
+        assert res.status_code == 200
+        assert len([q for q in queries if "tasks_task" in q["sql"]]) == 1
+
+        body = res.json()
+        assert body["total"] == 3
+        assert counts_by_status(body) == {
+            Task.Status.PENDING: 2, Task.Status.ACCEPTED: 1,
+            Task.Status.IN_PROGRESS: 0, Task.Status.DONE: 0, Task.Status.CANCELED: 0, Task.Status.EXPIRED: 0,
+        }
+        assert body["by_service"] == [
+            {"service": cleaning.id, "service_title": "Cleaning", "count": 2},
+            {"service": repair.id, "service_title": "Repair", "count": 1},
+        ]
+
+    def test_specialist_sees_own_tasks(self, api_client, setup):
+        _, specialist, _, _, tasks = setup
+        state_machine.accept(tasks[2].id, specialist)
+
+        body = auth_client(api_client, specialist).get(reverse("task-summary")).json()
+        assert body["total"] == 1
+        assert counts_by_status(body)[Task.Status.ACCEPTED] == 1
+
+    def test_cached_until_transition(self, api_client, setup, django_capture_on_commit_callbacks):
+        customer, specialist, _, _, tasks = setup
+        client = auth_client(api_client, customer)
+        specialist_client = auth_client(type(api_client)(), specialist)
+        client.get(reverse("task-summary"))
+        specialist_client.get(reverse("task-summary"))
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("task-summary"))
+        assert not [q for q in queries if "tasks_task" in q["sql"]]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            state_machine.accept(tasks[0].id, specialist)
+
+        assert counts_by_status(client.get(reverse("task-summary")).json())[Task.Status.ACCEPTED] == 1
+        assert specialist_client.get(reverse("task-summary")).json()["total"] == 1
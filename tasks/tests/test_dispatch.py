@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from django.core.cache import cache
+
+from specialists.models import SpecialistProfile
+from tasks import dispatch, leases
+from tasks.models import Task
+from tasks.tasks import dispatch_pending_tasks
+from tasks.tests.test import User, approve_specialist, make_service, make_user
+
+
+class TestMatch:
+    def test_nearest_specialist_wins(self):
+        assigned = dispatch.match(
+            task_lat=[35.70, 35.80], task_lng=[51.40, 51.40], task_city=[0, 0],
+            spec_lat=[35.80, 35.70], spec_lng=[51.40, 51.40], spec_city=[0, 0],
+            load=[0, 0],
+        )
+        assert assigned.tolist() == [1, 0]
+
+    def test_capacity_and_load(self):
+        # one free slot: the closer task gets it, the other stays unassigned
+        assigned = dispatch.match(
+            task_lat=[35.71, 35.70], task_lng=[51.40, 51.40], task_city=[0, 0],
+            spec_lat=[35.70], spec_lng=[51.40], spec_city=[0],
+            load=[2], capacity=3,
+        )
+        assert assigned.tolist() == [-1, 0]
+
+    def test_load_penalty_spreads_work(self):
+        # specialist 0 is 1km closer but already busy with two tasks
+        assigned = dispatch.match(
+            task_lat=[35.70], task_lng=[51.40], task_city=[0],
+            spec_lat=[35.70, 35.709], spec_lng=[51.40, 51.40], spec_city=[0, 0],
+            load=[2, 0], load_penalty_km=2,
+        )
+        assert assigned.tolist() == [1]
+
+    def test_distance_and_city_limits(self):
+        task_city, spec_city = dispatch.city_codes(["Tehran", "tehran ", ""], ["Isfahan", ""])
+        assigned = dispatch.match(
+            task_lat=[35.70, 35.70, 35.70], task_lng=[51.40, 51.40, 51.40], task_city=task_city,
+            spec_lat=[35.70, 36.70], spec_lng=[51.40, 51.40], spec_city=spec_city,
+            load=[0, 0], max_distance_km=15,
+        )
+        # the Isfahan specialist cannot take Tehran tasks, the other one is 111km away
+        assert assigned.tolist() == [-1, -1, 0]
+
+    def test_conflicts_resolved_across_rounds_and_chunks(self):
+        rng = np.random.default_rng(0)
+        tasks, specs = 300, 40
+        assigned = dispatch.match(
+            task_lat=35.7 + rng.random(tasks) * 0.05, task_lng=51.4 + rng.random(tasks) * 0.05,
+            task_city=np.zeros(tasks, dtype=int),
+            spec_lat=35.7 + rng.random(specs) * 0.05, spec_lng=51.4 + rng.random(specs) * 0.05,
+            spec_city=np.zeros(specs, dtype=int),
+            load=np.zeros(specs), capacity=3, chunk=50,
+        )
+        counts = np.bincount(assigned[assigned >= 0], minlength=specs)
+        assert counts.max() <= 3
+        assert counts.sum() == specs * 3
+
+
+@pytest.mark.django_db
+class TestDispatchRun:
+    @pytest.fixture
+    def setup(self):
+        service = make_service()
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        specialists = []
+        for i, lat in enumerate(["35.700000", "35.800000"]):
+            user = make_user(f"+98912333333{i}", role=User.RoleChoices.SPECIALIST)
+            approve_specialist(user)
+            SpecialistProfile.objects.create(user=user, is_available=True, latitude=lat, longitude="51.400000")
+            specialists.append(user)
+        tasks = [
+            Task.objects.create(
+                customer=customer, service=service, contact_name="A", contact_phone="0912", address="Addr",
+                latitude=lat, longitude="51.400000",
+            )
+            for lat in ["35.701000", "35.799000", "35.750000"]
+        ]
+        return specialists, tasks
+
+    def test_assigns_in_bulk(self, setup, django_capture_on_commit_callbacks, settings):
+        settings.TASK_DISPATCH_ENABLED = True
+        (near, far), tasks = setup
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            assert dispatch_pending_tasks() == 3
+        assert len(callbacks) == 3
+
+        rows = dict(Task.objects.values_list("id", "specialist_id"))
+        assert rows[tasks[0].id] == near.id
+        assert rows[tasks[1].id] == far.id
+        assert set(Task.objects.values_list("status", flat=True)) == {Task.Status.ACCEPTED}
+
+    def test_skips_leased_and_unavailable(self, setup):
+        (near, far), tasks = setup
+        SpecialistProfile.objects.filter(user=far).update(is_available=False)
+        leases.acquire(tasks[0].id, far.id)
+
+        assert dispatch.run() == 2
+        task = Task.objects.get(pk=tasks[0].id)
+        assert task.status == Task.Status.PENDING
+        assert set(Task.objects.exclude(pk=tasks[0].id).values_list("specialist_id", flat=True)) == {near.id}
+
+    def test_disabled_by_default(self, setup):
+        assert dispatch_pending_tasks() == 0
+        assert not Task.objects.filter(status=Task.Status.ACCEPTED).exists()
+
+    def test_overlapping_run_is_skipped(self, setup):
+        cache.add(dispatch.LOCK_KEY, 1)
+        assert dispatch.run() == 0
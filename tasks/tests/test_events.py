@@ -0,0 +1,133 @@
+import pytest
+from django.db import transaction
+from django.urls import reverse
+
+from tasks import events, state_machine
+from tasks.models import Task, TaskEvent
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def customer():
+    return make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+
+
+@pytest.fixture
+def specialist():
+    user = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(user)
+    return user
+
+
+@pytest.fixture
+def task(customer):
+    return Task.objects.create(
+        customer=customer, service=make_service(), contact_name="A", contact_phone="0912", address="Addr"
+    )
+
+
+def history(task_id):
+    return list(TaskEvent.objects.filter(task_id=task_id).order_by("id").values_list("from_status", "to_status", "actor_id"))
+
+
+class TestTaskEvents:
+    def test_create_and_lifecycle_are_logged(self, api_client, customer, specialist):
+        res = auth_client(api_client, customer).post(
+            reverse("task-list"),
+            data={"service": make_service().id, "contact_name": "A", "contact_phone": "0912", "address": "x"},
+            format="json",
+        )
+        task_id = res.json()["id"]
+        state_machine.accept(task_id, specialist)
+        state_machine.start(task_id, specialist)
+        state_machine.complete(task_id, specialist)
+
+        S = Task.Status
+        assert history(task_id) == [
+            (None, S.PENDING, customer.id),
+            (S.PENDING, S.ACCEPTED, specialist.id),
+            (S.ACCEPTED, S.IN_PROGRESS, specialist.id),
+            (S.IN_PROGRESS, S.DONE, specialist.id),
+        ]
+
+    def test_cancel_records_the_status_it_left(self, task, customer, specialist):
+        state_machine.accept(task.id, specialist)
+        state_machine.cancel(task.id, customer)
+        assert history(task.id)[-1] == (Task.Status.ACCEPTED, Task.Status.CANCELED, customer.id)
+
+    def test_failed_transition_writes_nothing(self, task, specialist):
+        state_machine.accept(task.id, specialist)
+        with pytest.raises(state_machine.TransitionError):
+            state_machine.complete(task.id, specialist)
+        assert len(history(task.id)) == 1
+
+    def test_event_rolls_back_with_the_transition(self, task, specialist):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                state_machine.accept(task.id, specialist)
+                raise RuntimeError
+
+        task.refresh_from_db()
+        assert task.status == Task.Status.PENDING
+        assert history(task.id) == []
+
+
+class TestConsume:
+    def test_batches_in_id_order_and_advances(self, task, customer, specialist):
+        state_machine.accept(task.id, specialist)
+        state_machine.start(task.id, specialist)
+        state_machine.complete(task.id, specialist)
+
+        seen = []
+        assert events.consume("rollup", lambda batch: seen.extend(e.id for e in batch), limit=2) == 2
+        assert events.drain("rollup", lambda batch: seen.extend(e.id for e in batch), limit=2) == 1
+        assert seen == sorted(seen) and len(seen) == 3
+        assert events.position("rollup") == seen[-1]
+        assert events.consume("rollup", seen.extend) == 0
+
+        # consumers are independent
+        assert events.drain("notifications", lambda batch: None) == 3
+
+    def test_failed_handler_redelivers(self, task, specialist):
+        state_machine.accept(task.id, specialist)
+
+        def boom(batch):
+            raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            events.consume("notifications", boom)
+        assert events.position("notifications") == 0
+        assert events.consume("notifications", lambda batch: None) == 1
+
+    def test_late_commit_below_the_position_is_delivered(self, task, specialist):
+        # ids 2 and 3 are allocated together; 3 commits and is consumed first, then 2
+        # commits with an older timestamp
+        state_machine.accept(task.id, specialist)
+        seen = []
+        events.drain("rollup", lambda batch: seen.extend(e.id for e in batch))
+        first = seen[-1]
+        late = TaskEvent(id=first + 1, task=task, from_status=Task.Status.ACCEPTED, to_status=Task.Status.IN_PROGRESS)
+        TaskEvent.objects.create(id=first + 2, task=task, from_status=Task.Status.IN_PROGRESS, to_status=Task.Status.DONE)
+
+        assert events.drain("rollup", lambda batch: seen.extend(e.id for e in batch)) == 1
+        assert events.position("rollup") == first + 2
+        assert events.consume("rollup", seen.extend) == 0
+
+        late.save()
+        TaskEvent.objects.filter(id=late.id).update(created_at=TaskEvent.objects.get(id=first).created_at)
+        assert events.drain("rollup", lambda batch: seen.extend(e.id for e in batch)) == 1
+        assert seen[-2:] == [first + 2, first + 1]
+        assert events.consume("rollup", seen.extend) == 0
+
+    def test_gaps_time_out(self, task, specialist, monkeypatch):
+        state_machine.accept(task.id, specialist)
+        events.drain("rollup", lambda batch: None)
+        first = events.position("rollup")
+        TaskEvent.objects.create(id=first + 2, task=task, to_status=Task.Status.DONE)
+        monkeypatch.setattr(events, "TASK_EVENT_GAP_SECONDS", 0)
+        events.drain("rollup", lambda batch: None)
+
+        TaskEvent.objects.create(id=first + 1, task=task, to_status=Task.Status.IN_PROGRESS)
+        assert events.consume("rollup", lambda batch: None) == 0
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tasks import expiry, feeds, state_machine
+from tasks.models import Task, TaskEvent
+from tasks.signals import task_escalated
+from tasks.tasks import sweep_pending_tasks
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def customer():
+    return make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+
+
+@pytest.fixture
+def make_task(customer):
+    service = make_service()
+
+    def make(age):
+        task = Task.objects.create(customer=customer, service=service, contact_name="A", contact_phone="0912", address="x")
+        Task.objects.filter(pk=task.id).update(created_at=timezone.now() - age)
+        return task
+
+    return make
+
+
+def state(task):
+    return Task.objects.values_list("status", "escalation_level").get(pk=task.id)
+
+
+class TestSweep:
+    def test_stages_by_age(self, make_task, customer):
+        fresh = make_task(timedelta(minutes=5))
+        quiet = make_task(timedelta(hours=1))
+        stuck = make_task(timedelta(hours=10))
+        abandoned = make_task(timedelta(days=4))
+
+        assert expiry.sweep() == {"expired": 1, "escalated": 1, "rebroadcast": 1}
+        assert state(fresh) == (Task.Status.PENDING, Task.Escalation.NONE)
+        assert state(quiet) == (Task.Status.PENDING, Task.Escalation.REBROADCAST)
+        assert state(stuck) == (Task.Status.PENDING, Task.Escalation.ESCALATED)
+        assert state(abandoned)[0] == Task.Status.EXPIRED
+
+        event = TaskEvent.objects.get(task_id=abandoned.id, to_status=Task.Status.EXPIRED)
+        assert event.from_status == Task.Status.PENDING and event.actor_id is None
+
+        # nothing is repeated on the next run
+        assert expiry.sweep() == {"expired": 0, "escalated": 0, "rebroadcast": 0}
+
+    def test_skips_taken_tasks(self, make_task):
+        specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(specialist)
+        accepted = make_task(timedelta(days=4))
+        state_machine.accept(accepted.id, specialist)
+        assert expiry.sweep()["expired"] == 0
+        assert state(accepted)[0] == Task.Status.ACCEPTED
+
+    def test_bounded_batches(self, make_task):
+        tasks = [make_task(timedelta(days=4)) for _ in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            assert expiry._drain(lambda: expiry.expire_batch(timezone.now() - timedelta(days=3), 2), 2) == 4
+        assert len([q for q in queries if q["sql"].startswith("UPDATE")]) == 2
+        # oldest first
+        assert [state(t)[0] for t in tasks] == [Task.Status.EXPIRED] * 4 + [Task.Status.PENDING]
+
+    def test_expired_leave_feed_and_rebroadcast(self, make_task, django_capture_on_commit_callbacks):
+        stale = make_task(timedelta(days=4))
+        quiet = make_task(timedelta(hours=1))
+        before = feeds.current_version(feeds.ALL_FEED)
+
+        received = []
+        handler = lambda sender, tasks, level, **kwargs: received.append(([t.id for t in tasks], level))  # noqa: E731
+        task_escalated.connect(handler)
+        try:
+            with django_capture_on_commit_callbacks(execute=True):
+                sweep_pending_tasks()
+        finally:
+            task_escalated.disconnect(handler)
+
+        assert received == [([quiet.id], Task.Escalation.REBROADCAST)]
+        assert feeds.current_version(feeds.ALL_FEED) != before
+        assert state(stale)[0] == Task.Status.EXPIRED
+
+    def test_rebroadcast_reaches_etag_and_delta(self, api_client, make_task, django_capture_on_commit_callbacks):
+        quiet = make_task(timedelta(hours=1))
+        specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(specialist)
+        client = auth_client(api_client, specialist)
+        first = client.get(reverse("task-available"))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            expiry.sweep()
+
+        res = client.get(reverse("task-available"), HTTP_IF_NONE_MATCH=first["ETag"])
+        assert res.status_code == 200
+        assert [t["id"] for t in res.json()["results"]] == [quiet.id]
+        delta = client.get(reverse("task-available"), {"since": first["X-Feed-Cursor"]}).json()
+        assert [t["id"] for t in delta["added"]] == [quiet.id]
@@ -0,0 +1,133 @@
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks import archive, exports, state_machine
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def setup():
+    customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+    customer.first_name, customer.last_name = "Mina", "Karimi"
+    customer.save()
+    specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(specialist)
+    service = make_service()
+    tasks = [
+        Task.objects.create(
+            customer=customer, service=service, contact_name=f"T{i}", contact_phone="0912", address="x",
+            latitude="35.700000", longitude="51.400000",
+        )
+        for i in range(3)
+    ]
+    state_machine.accept(tasks[0].id, specialist)
+    staff = make_user("+989129999999", role=User.RoleChoices.CUSTOMER)
+    staff.is_staff = True
+    staff.save()
+    return staff, customer, specialist, tasks
+
+
+def body(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class TestExportEndpoint:
+    def test_ndjson_with_filters(self, api_client, setup):
+        staff, customer, specialist, tasks = setup
+        res = auth_client(api_client, staff).get(reverse("task-export"), {"status": Task.Status.PENDING})
+        assert res.status_code == 200
+        assert res["Content-Type"] == "application/x-ndjson"
+        assert "attachment" in res["Content-Disposition"]
+
+        rows = [json.loads(line) for line in body(res).splitlines()]
+        assert [r["id"] for r in rows] == [tasks[1].id, tasks[2].id]
+        assert rows[0]["customer_name"] == "Mina Karimi"
+        assert rows[0]["service_title"] == "Cleaning"
+        assert rows[0]["status_display"] == "Pending"
+        assert rows[0]["latitude"] == 35.7
+        assert rows[0]["specialist_name"] is None
+
+    def test_csv_includes_archive_on_request(self, api_client, setup):
+        staff, customer, specialist, tasks = setup
+        state_machine.cancel(tasks[2].id, customer)
+        Task.objects.filter(pk=tasks[2].id).update(updated_at="2020-01-01T00:00:00Z")
+        archive.archive()
+
+        client = auth_client(api_client, staff)
+        rows = list(csv.DictReader(io.StringIO(body(client.get(reverse("task-export"), {"output": "csv"})))))
+        assert [int(r["id"]) for r in rows] == [tasks[0].id, tasks[1].id]
+
+        res = client.get(reverse("task-export"), {"output": "csv", "history": 1})
+        rows = list(csv.DictReader(io.StringIO(body(res))))
+        assert [int(r["id"]) for r in rows] == [tasks[0].id, tasks[1].id, tasks[2].id]
+        assert rows[0]["specialist"] == str(specialist.id)
+        assert rows[2]["status_display"] == "Canceled"
+
+    def test_staff_only_and_validates_output(self, api_client, setup):
+        staff, customer, _, _ = setup
+        assert auth_client(api_client, customer).get(reverse("task-export")).status_code == 403
+        res = auth_client(type(api_client)(), staff).get(reverse("task-export"), {"output": "xml"})
+        assert res.status_code == 400
+
+    def test_reads_in_chunks(self, setup, monkeypatch):
+        calls = []
+        real_iterator = type(Task.objects.all()).iterator
+
+        def spy(queryset, chunk_size=None):
+            calls.append(chunk_size)
+            return real_iterator(queryset, chunk_size=chunk_size)
+
+        monkeypatch.setattr(type(Task.objects.all()), "iterator", spy)
+        assert len(list(exports.records(Task.objects.all()))) == 3
+        assert calls == [exports.TASK_EXPORT_CHUNK_SIZE]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_streams_chunks_under_asgi(self, setup, monkeypatch):
+        staff, _, _, tasks = setup
+        monkeypatch.setattr(exports, "TASK_EXPORT_CHUNK_SIZE", 1)
+        read_rows = []
+        real_record = exports.record
+        monkeypatch.setattr(exports, "record", lambda row: read_rows.append(row["id"]) or real_record(row))
+        client = AsyncClient()
+        client.cookies["accessToken"] = str(RefreshToken.for_user(staff).access_token)
+
+        async def read():
+            res = await client.get(reverse("task-export"), {"output": "csv"})
+            assert res.status_code == 200
+            chunks = res.streaming_content.__aiter__()
+            first = [await chunks.__anext__(), await chunks.__anext__()]
+            read_before_rest = len(read_rows)
+            return first + [chunk async for chunk in chunks], read_before_rest
+
+        chunks, read_before_rest = asyncio.run(read())
+        # the header and the first row went out before the other rows were read
+        assert read_before_rest == 1
+        assert len(chunks) == 1 + len(tasks)
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+        assert [int(r["id"]) for r in rows] == [t.id for t in tasks]
+
+
+class TestExportCommand:
+    def test_filters_and_formats(self, setup, tmp_path):
+        _, _, _, tasks = setup
+        out = io.StringIO()
+        call_command("export_tasks", "--filter", f"status={Task.Status.ACCEPTED}", stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [r["id"] for r in rows] == [tasks[0].id]
+
+        path = tmp_path / "tasks.csv"
+        call_command("export_tasks", "--output", "csv", "--file", str(path))
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert lines[0].startswith("id,status,status_display")
+        assert len(lines) == 4
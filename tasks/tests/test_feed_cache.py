@@ -0,0 +1,164 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tasks import feeds
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, extract_items, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def setup():
+    service = make_service()
+    customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+    specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(specialist)
+    tasks = [
+        Task.objects.create(
+            customer=customer, service=service, contact_name=f"T{i}", contact_phone="0912", address="Addr",
+            latitude="35.700000", longitude="51.400000",
+        )
+        for i in range(5)
+    ]
+    return service, customer, specialist, tasks
+
+
+def task_queries(queries):
+    return [q for q in queries if "tasks_task" in q["sql"]]
+
+
+def walk(client, url, limit):
+    ids, res = [], client.get(url, {"limit": limit})
+    while True:
+        body = res.json()
+        ids += [item["id"] for item in body["results"]]
+        if not body["next"]:
+            return ids
+        res = client.get(body["next"])
+
+
+class TestCachedFeed:
+    def test_cached_pages_match_database(self, api_client, setup):
+        service, _, specialist, tasks = setup
+        client = auth_client(api_client, specialist)
+        url = reverse("task-available")
+
+        db_first = client.get(url, {"limit": 2, "status": Task.Status.PENDING}).json()  # extra param skips the cache
+        cached_first = client.get(url, {"limit": 2}).json()
+        assert cached_first["results"] == db_first["results"]
+
+        expected = [t.id for t in sorted(tasks, key=lambda t: (t.created_at, t.id), reverse=True)]
+        assert walk(client, url, 2) == expected
+        assert walk(client, f"{url}?service={service.id}", 2) == expected
+
+    def test_second_request_skips_tasks_table(self, api_client, setup):
+        _, _, specialist, _ = setup
+        client = auth_client(api_client, specialist)
+        client.get(reverse("task-available"))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = client.get(reverse("task-available"))
+        assert res.status_code == 200
+        assert len(extract_items(res.json())) == 5
+        assert task_queries(queries) == []
+
+    def test_create_and_accept_patch_the_list(self, api_client, setup, django_capture_on_commit_callbacks):
+        service, customer, specialist, tasks = setup
+        client = auth_client(api_client, specialist)
+        client.get(reverse("task-available"))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            res = auth_client(APIClient(), customer).post(
+                reverse("task-list"),
+                data={"service": service.id, "contact_name": "New", "contact_phone": "0912", "address": "x"},
+                format="json",
+            )
+            new_id = res.json()["id"]
+            client.post(reverse("task-accept", kwargs={"pk": tasks[0].id}))
+
+        cached = cache.get(feeds.list_key(feeds.ALL_FEED))
+        assert cached["version"] == feeds.current_version(feeds.ALL_FEED)
+
+        with CaptureQueriesContext(connection) as queries:
+            ids = [item["id"] for item in extract_items(client.get(reverse("task-available")).json())]
+        assert ids[0] == new_id
+        assert tasks[0].id not in ids
+        assert task_queries(queries) == []
+
+    def test_bulk_create_patches_each_feed_once(self, api_client, setup, django_capture_on_commit_callbacks):
+        service, customer, specialist, tasks = setup
+        client = auth_client(api_client, specialist)
+        client.get(reverse("task-available"))
+        before = feeds.current_version(feeds.ALL_FEED)
+
+        items = [
+            {"service": service.id, "contact_name": f"B{i}", "contact_phone": "0912", "address": "x"}
+            for i in range(20)
+        ]
+        with mock.patch.object(feeds, "patch", wraps=feeds.patch) as patch, \
+                django_capture_on_commit_callbacks(execute=True):
+            res = auth_client(APIClient(), customer).post(reverse("task-bulk"), {"tasks": items}, format="json")
+        assert res.status_code == 201
+        assert sorted(call.args[0] for call in patch.call_args_list) == sorted([feeds.ALL_FEED, feeds.service_feed(service.id)])
+        assert feeds.current_version(feeds.ALL_FEED) == before + 1
+
+        new_ids = sorted(r["task"]["id"] for r in res.json()["results"])
+        cached = cache.get(feeds.list_key(feeds.ALL_FEED))
+        assert cached["version"] == before + 1
+        assert sorted(task_id for _, task_id in cached["rows"][:20]) == new_ids
+        with CaptureQueriesContext(connection) as queries:
+            ids = [item["id"] for item in extract_items(client.get(reverse("task-available"), {"limit": 25}).json())]
+        assert sorted(ids[:20]) == new_ids and len(ids) == 25
+        assert task_queries(queries) == []
+
+    def test_accept_hides_task_before_commit(self, api_client, setup):
+        _, _, specialist, tasks = setup
+        client = auth_client(api_client, specialist)
+        client.get(reverse("task-available"))
+
+        client.post(reverse("task-accept", kwargs={"pk": tasks[0].id}))
+        ids = [item["id"] for item in extract_items(client.get(reverse("task-available")).json())]
+        assert tasks[0].id not in ids
+
+    def test_falls_back_to_database_while_rebuild_is_locked(self, api_client, setup):
+        _, _, specialist, _ = setup
+        client = auth_client(api_client, specialist)
+        cache.add(f"task_feed_build_{feeds.ALL_FEED}", 1)
+
+        with mock.patch.object(feeds, "TASK_FEED_BUILD_WAIT_SECONDS", 0):
+            res = client.get(reverse("task-available"))
+        assert res.status_code == 200
+        assert len(extract_items(res.json())) == 5
+        assert cache.get(feeds.list_key(feeds.ALL_FEED)) is None
+
+    def test_area_feed(self, api_client, setup):
+        _, _, specialist, tasks = setup
+        client = auth_client(api_client, specialist)
+        area = tasks[0].geohash[:4]
+
+        res = client.get(reverse("task-available"), {"area": area})
+        assert len(extract_items(res.json())) == 5
+        assert cache.get(feeds.list_key(feeds.area_feed(area))) is not None
+
+        res = client.get(reverse("task-available"), {"area": "zzzz"})
+        assert extract_items(res.json()) == []
+
+    def test_area_feed_is_case_insensitive(self, api_client, setup):
+        _, _, specialist, tasks = setup
+        client = auth_client(api_client, specialist)
+        area = tasks[0].geohash[:4]
+        expected = extract_items(client.get(reverse("task-available"), {"area": area}).json())
+
+        for params in ({"area": area.upper()}, {"area": area.upper(), "limit": 2}):
+            cached = extract_items(client.get(reverse("task-available"), params).json())
+            with mock.patch.object(feeds, "is_cacheable", return_value=False):
+                direct = extract_items(client.get(reverse("task-available"), params).json())
+            assert cached == direct == expected[: params.get("limit", 10)]
+        assert cache.get(feeds.list_key(feeds.area_feed(area.upper()))) is None
@@ -0,0 +1,146 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tasks import feeds, leases
+from tasks.defaults import TASK_LEASE_SECONDS
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def setup():
+    service = make_service()
+    customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+    specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(specialist)
+    task = Task.objects.create(
+        customer=customer, service=service, contact_name="A", contact_phone="0912", address="Addr"
+    )
+    return service, customer, specialist, task
+
+
+def create_task(customer, service):
+    res = auth_client(APIClient(), customer).post(
+        reverse("task-list"),
+        data={"service": service.id, "contact_name": "B", "contact_phone": "0912", "address": "x"},
+        format="json",
+    )
+    assert res.status_code == 201
+    return res.json()["id"]
+
+
+class TestAvailableETag:
+    def test_unchanged_feed_is_304_without_task_queries(self, api_client, setup):
+        _, _, specialist, _ = setup
+        client = auth_client(api_client, specialist)
+
+        first = client.get(reverse("task-available"))
+        assert first.status_code == 200
+        tag = first["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(reverse("task-available"), HTTP_IF_NONE_MATCH=tag)
+        assert second.status_code == 304
+        assert second["ETag"] == tag
+        assert not any("tasks_task" in q["sql"] for q in queries)
+
+    def test_status_change_invalidates_etag(self, api_client, setup, django_capture_on_commit_callbacks):
+        _, _, specialist, task = setup
+        client = auth_client(api_client, specialist)
+        tag = client.get(reverse("task-available"))["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("task-accept", kwargs={"pk": task.id}))
+
+        res = client.get(reverse("task-available"), HTTP_IF_NONE_MATCH=tag)
+        assert res.status_code == 200
+        assert res["ETag"] != tag
+        assert res.json()["results"] == []
+
+    def test_etag_depends_on_query(self, api_client, setup):
+        service, _, specialist, _ = setup
+        client = auth_client(api_client, specialist)
+        tag = client.get(reverse("task-available"))["ETag"]
+        res = client.get(reverse("task-available"), {"service": service.id}, HTTP_IF_NONE_MATCH=tag)
+        assert res.status_code == 200
+
+
+class TestAvailableDelta:
+    def test_since_returns_added_and_removed(self, api_client, setup, django_capture_on_commit_callbacks):
+        service, customer, specialist, task = setup
+        client = auth_client(api_client, specialist)
+        cursor = client.get(reverse("task-available"))["X-Feed-Cursor"]
+
+        unchanged = client.get(reverse("task-available"), {"since": cursor}).json()
+        assert unchanged["added"] == [] and unchanged["removed"] == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            new_id = create_task(customer, service)
+            client.post(reverse("task-accept", kwargs={"pk": task.id}))
+
+        delta = client.get(reverse("task-available"), {"since": cursor}).json()
+        assert [t["id"] for t in delta["added"]] == [new_id]
+        assert delta["removed"] == [task.id]
+        assert delta["reset"] is False
+        assert delta["cursor"] != cursor
+
+    def test_bad_cursor_is_400(self, api_client, setup):
+        _, _, specialist, _ = setup
+        client = auth_client(api_client, specialist)
+        assert client.get(reverse("task-available"), {"since": "nope"}).status_code == 400
+
+
+class TestLeaseState:
+    def test_lease_expiry_reaches_etag_and_delta(self, api_client, setup, monkeypatch):
+        _, _, specialist, task = setup
+        other = make_user("+989124444444", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(other)
+        auth_client(APIClient(), other).post(reverse("task-lease", kwargs={"pk": task.id}))
+
+        client = auth_client(api_client, specialist)
+        first = client.get(reverse("task-available"))
+        assert first.json()["results"] == []
+
+        # the lease runs out on its own: no release, no version bump
+        cache.delete(leases.lease_key(task.id))
+        now = time.time() + TASK_LEASE_SECONDS
+        monkeypatch.setattr(feeds.time, "time", lambda: now)
+
+        res = client.get(reverse("task-available"), HTTP_IF_NONE_MATCH=first["ETag"])
+        assert res.status_code == 200
+        assert [t["id"] for t in res.json()["results"]] == [task.id]
+        delta = client.get(reverse("task-available"), {"since": first["X-Feed-Cursor"]}).json()
+        assert [t["id"] for t in delta["added"]] == [task.id]
+
+    def test_delta_reports_lease_and_release(self, api_client, setup):
+        _, _, specialist, task = setup
+        other = make_user("+989124444444", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(other)
+        other_client = auth_client(APIClient(), other)
+        client = auth_client(api_client, specialist)
+        cursor = client.get(reverse("task-available"))["X-Feed-Cursor"]
+
+        other_client.post(reverse("task-lease", kwargs={"pk": task.id}))
+        delta = client.get(reverse("task-available"), {"since": cursor}).json()
+        assert delta["added"] == [] and delta["removed"] == [task.id]
+
+        other_client.delete(reverse("task-lease", kwargs={"pk": task.id}))
+        delta = client.get(reverse("task-available"), {"since": delta["cursor"]}).json()
+        assert [t["id"] for t in delta["added"]] == [task.id] and delta["removed"] == []
+
+
+class TestFeedKeys:
+    def test_junk_params_mint_no_version_keys(self, api_client, setup):
+        _, _, specialist, _ = setup
+        client = auth_client(api_client, specialist)
+        for i in range(3):
+            assert client.get(reverse("task-available"), {"service": f"junk{i}"}).status_code == 400
+            assert cache.get(feeds.version_key(f"service_junk{i}")) is None
@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks import archive, state_machine
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def setup():
+    customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+    specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(specialist)
+    service = make_service()
+    tasks = [
+        Task.objects.create(customer=customer, service=service, contact_name="A", contact_phone="0912", address=f"x{i}")
+        for i in range(3)
+    ]
+    state_machine.accept(tasks[0].id, specialist)
+    return customer, specialist, tasks
+
+
+def list_query(client, params):
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(reverse("task-list"), params)
+    assert res.status_code == 200
+    return res.json()["results"], [q["sql"] for q in ctx.captured_queries if "tasks_task" in q["sql"]]
+
+
+class TestSparseFieldsets:
+    def test_fields_trim_payload_and_sql(self, api_client, setup):
+        customer, _, tasks = setup
+        client = auth_client(api_client, customer)
+
+        rows, queries = list_query(client, {"fields": "status,id"})
+        assert rows == [{"id": t.id, "status": Task.Status.PENDING} for t in reversed(tasks[1:])] + [
+            {"id": tasks[0].id, "status": Task.Status.ACCEPTED}
+        ]
+        assert len(queries) == 1
+        assert "JOIN" not in queries[0]
+        assert "address" not in queries[0]
+
+        rows, queries = list_query(client, {"fields": "id,service_title"})
+        assert set(rows[0]) == {"id", "service_title"}
+        assert "services_service" in queries[0]
+        assert "users_user" not in queries[0]
+
+    def test_exclude_and_full_pages_match(self, api_client, setup):
+        customer, _, tasks = setup
+        client = auth_client(api_client, customer)
+        full = client.get(reverse("task-list")).json()["results"]
+
+        rows, _ = list_query(client, {"exclude": "note,specialist_display,customer_display"})
+        expected = [{k: v for k, v in row.items() if k not in ("note", "specialist_display", "customer_display")} for row in full]
+        assert rows == expected
+
+    def test_keyset_pages_with_deferred_ordering_fields(self, api_client, setup):
+        customer, _, tasks = setup
+        client = auth_client(api_client, customer)
+        first = client.get(reverse("task-list"), {"fields": "id", "limit": 2}).json()
+        with CaptureQueriesContext(connection) as ctx:
+            second = client.get(first["next"]).json()
+        assert [r["id"] for r in first["results"] + second["results"]] == [t.id for t in reversed(tasks)]
+        assert len([q for q in ctx.captured_queries if "tasks_task" in q["sql"]]) == 1
+
+    def test_retrieve_and_history(self, api_client, setup):
+        customer, _, tasks = setup
+        client = auth_client(api_client, customer)
+        res = client.get(reverse("task-detail", args=[tasks[1].id]), {"fields": "id,status_display"})
+        assert res.json() == {"id": tasks[1].id, "status_display": "Pending"}
+
+        state_machine.cancel(tasks[1].id, customer)
+        Task.objects.filter(pk=tasks[1].id).update(updated_at=timezone.now() - timedelta(days=60))
+        archive.archive()
+        rows = client.get(reverse("task-list"), {"history": 1, "fields": "id,status"}).json()["results"]
+        assert rows == [
+            {"id": tasks[2].id, "status": Task.Status.PENDING},
+            {"id": tasks[1].id, "status": Task.Status.CANCELED},
+            {"id": tasks[0].id, "status": Task.Status.ACCEPTED},
+        ]
+        res = client.get(reverse("task-detail", args=[tasks[1].id]), {"history": 1, "exclude": "note"})
+        assert res.status_code == 200
+        assert "note" not in res.json()
+
+    def test_invalid_selection(self, api_client, setup):
+        customer, _, _ = setup
+        client = auth_client(api_client, customer)
+        res = client.get(reverse("task-list"), {"fields": "id,secret", "exclude": "nope"})
+        assert res.status_code == 400
+        assert set(res.json()) == {"fields", "exclude"}
+
+        res = client.get(reverse("task-list"), {"fields": "id", "exclude": "id"})
+        assert res.status_code == 400
+
+    def test_ignored_outside_reads(self, api_client, setup):
+        customer, specialist, tasks = setup
+        # write responses and serializers without a request keep every field
+        res = auth_client(api_client, specialist).post(reverse("task-start", args=[tasks[0].id]) + "?fields=id")
+        assert res.status_code == 200
+        assert "status_display" in res.json()
+        assert set(TaskSerializer(Task.objects.get(pk=tasks[0].id)).data) == set(TaskSerializer.Meta.fields)
+
+    def test_available_feed(self, api_client, setup):
+        _, specialist, tasks = setup
+        client = auth_client(api_client, specialist)
+        assert client.get(reverse("task-available"), {"fields": "bogus"}).status_code == 400
+
+        first = client.get(reverse("task-available"), {"fields": "id,status"})
+        assert first.status_code == 200
+        assert first.json()["results"] == [{"id": t.id, "status": Task.Status.PENDING} for t in tasks[:0:-1]]
+        # ?ordering= is not served from the cached feed, so this goes through the .values() rows
+        rows = client.get(reverse("task-available"), {"exclude": "note", "ordering": "created_at"}).json()["results"]
+        assert rows and all("note" not in row and "status_display" in row for row in rows)
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from services.models import Service
+from tasks import heatmap, state_machine
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def staff():
+    user = make_user("+989129999999", role=User.RoleChoices.CUSTOMER)
+    user.is_staff = True
+    user.save()
+    return user
+
+
+@pytest.fixture
+def tasks():
+    customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+    cleaning = make_service()
+    repair = Service.objects.create(title="Repair", service_type=Service.Type.REPAIR)
+    coords = [
+        (cleaning, "35.701000", "51.401000"),
+        (cleaning, "35.709000", "51.409000"),  # same 0.01 cell
+        (cleaning, "35.721000", "51.401000"),
+        (repair, "35.701000", "51.401000"),
+        (repair, None, None),
+    ]
+    return [
+        Task.objects.create(
+            customer=customer, service=service, contact_name="A", contact_phone="0912", address="x",
+            latitude=lat, longitude=lng,
+        )
+        for service, lat, lng in coords
+    ]
+
+
+def by_type(body):
+    return {t["service_type"]: t for t in body["types"]}
+
+
+class TestBinning:
+    def test_negative_coordinates(self):
+        data = np.array([[1, -33.861, 151.201], [1, -33.869, 151.209], [2, 40.701, -73.999]])
+        types, rows, cols, counts = heatmap.bin_counts(data, 0.01)
+        assert list(types) == [1, 2]
+        assert list(counts) == [2, 1]
+        assert rows[0] == -3387 and cols[0] == 15120
+        assert rows[1] == 4070 and cols[1] == -7400
+
+
+class TestHeatmap:
+    def test_bins_pending_tasks_per_type(self, api_client, staff, tasks):
+        specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(specialist)
+        state_machine.accept(tasks[2].id, specialist)
+
+        res = auth_client(api_client, staff).get(reverse("task-heatmap"))
+        assert res.status_code == 200
+        body = res.json()
+        assert body["cell"] == 0.01
+        assert body["total"] == 3
+
+        types = by_type(body)
+        assert types[Service.Type.CLEANING]["total"] == 2
+        assert types[Service.Type.CLEANING]["cells"] == [{"latitude": 35.705, "longitude": 51.405, "count": 2}]
+        assert types[Service.Type.REPAIR]["cells"][0]["count"] == 1
+        assert types[Service.Type.MOVING] == {
+            "service_type": Service.Type.MOVING, "service_type_display": "Moving", "total": 0, "cells": [],
+        }
+
+    def test_cached_and_filtered(self, api_client, staff, tasks):
+        client = auth_client(api_client, staff)
+        client.get(reverse("task-heatmap"))
+        with CaptureQueriesContext(connection) as queries:
+            body = client.get(reverse("task-heatmap"), {"service_type": Service.Type.REPAIR}).json()
+        assert not [q for q in queries if "tasks_task" in q["sql"]]
+        assert [t["service_type"] for t in body["types"]] == [Service.Type.REPAIR]
+
+        coarse = client.get(reverse("task-heatmap"), {"cell": "0.1"}).json()
+        assert len(by_type(coarse)[Service.Type.CLEANING]["cells"]) == 1
+
+    def test_staff_only_and_validates_cell(self, api_client, staff, tasks):
+        customer = make_user("+989122222222", role=User.RoleChoices.CUSTOMER)
+        assert auth_client(api_client, customer).get(reverse("task-heatmap")).status_code == 403
+        res = auth_client(type(api_client)(), staff).get(reverse("task-heatmap"), {"cell": "0.3"})
+        assert res.status_code == 400
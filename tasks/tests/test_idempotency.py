@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from tasks import idempotency
+from tasks.models import Task, TaskEvent
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def customer():
+    return make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+
+
+@pytest.fixture
+def specialist():
+    user = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(user)
+    return user
+
+
+@pytest.fixture
+def payload():
+    return {"service": make_service().id, "contact_name": "Ramin", "contact_phone": "0912", "address": "Tehran"}
+
+
+def post(client, url, data=None, key="k-1"):
+    return client.post(url, data=data or {}, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+
+class TestIdempotentCreate:
+    def test_retry_replays_first_response(self, api_client, customer, payload):
+        client = auth_client(api_client, customer)
+        first = post(client, reverse("task-list"), payload)
+        assert first.status_code == 201
+
+        second = post(client, reverse("task-list"), payload)
+        assert second.status_code == 201
+        assert second.content == first.content
+        assert second["Content-Type"] == first["Content-Type"]
+        assert second[idempotency.REPLAYED_HEADER] == "true"
+        assert Task.objects.count() == 1
+
+        assert post(client, reverse("task-list"), payload, key="k-2").status_code == 201
+        assert client.post(reverse("task-list"), payload, format="json").status_code == 201
+        assert Task.objects.count() == 3
+
+    def test_replay_skips_database(self, api_client, customer, payload, django_assert_num_queries):
+        client = auth_client(api_client, customer)
+        post(client, reverse("task-list"), payload)
+        # the user comes from the authentication snapshot, so the replay reads nothing
+        with django_assert_num_queries(0):
+            assert post(client, reverse("task-list"), payload).status_code == 201
+
+    def test_key_reused_for_other_body(self, api_client, customer, payload):
+        client = auth_client(api_client, customer)
+        post(client, reverse("task-list"), payload)
+        res = post(client, reverse("task-list"), {**payload, "contact_name": "Other"})
+        assert res.status_code == 422
+        assert Task.objects.count() == 1
+
+    def test_keys_are_per_user(self, api_client, customer, payload):
+        other = make_user("+989122222222", role=User.RoleChoices.CUSTOMER)
+        post(auth_client(api_client, customer), reverse("task-list"), payload)
+        res = post(auth_client(type(api_client)(), other), reverse("task-list"), payload)
+        assert res.status_code == 201
+        assert res.get(idempotency.REPLAYED_HEADER) is None
+        assert Task.objects.filter(customer=other).count() == 1
+
+    def test_rejects_oversized_key(self, api_client, customer, payload):
+        res = post(auth_client(api_client, customer), reverse("task-list"), payload, key="x" * 256)
+        assert res.status_code == 400
+
+
+class TestIdempotentTransitions:
+    def test_retried_accept_is_not_a_400(self, api_client, customer, specialist):
+        task = Task.objects.create(
+            customer=customer, service=make_service(), contact_name="A", contact_phone="0912", address="x"
+        )
+        client = auth_client(api_client, specialist)
+        url = reverse("task-accept", args=[task.id])
+        first = post(client, url)
+        assert first.status_code == 200
+
+        retry = post(client, url)
+        assert retry.status_code == 200
+        assert retry.content == first.content
+        assert client.post(url, format="json").status_code == 400
+        assert TaskEvent.objects.filter(task_id=task.id).count() == 1
+
+    def test_client_errors_are_replayed(self, api_client, customer, specialist):
+        task = Task.objects.create(
+            customer=customer, service=make_service(), contact_name="A", contact_phone="0912", address="x"
+        )
+        client = auth_client(api_client, specialist)
+        url = reverse("task-start", args=[task.id])
+        first = post(client, url)
+        assert first.status_code == 403
+        assert post(client, url).content == first.content
+
+
+class TestConcurrentDuplicates:
+    def test_duplicate_waits_for_first_response(self, api_client, customer, payload, monkeypatch):
+        client = auth_client(api_client, customer)
+        first = post(client, reverse("task-list"), payload, key="k-0")
+        stored = cache.get(idempotency.response_key(customer.id, "k-0"))
+
+        # the first request holds the lock and lands its response while the duplicate polls
+        cache.add(idempotency.lock_key(customer.id, "k-1"), 1)
+        threading.Timer(0.1, cache.set, args=[idempotency.response_key(customer.id, "k-1"), stored]).start()
+        monkeypatch.setattr(idempotency, "TASK_IDEMPOTENCY_WAIT_SECONDS", 5)
+        res = post(client, reverse("task-list"), payload)
+        assert res.status_code == 201
+        assert res.content == first.content
+        assert Task.objects.count() == 1
+
+    def test_duplicate_gives_up_with_409(self, api_client, customer, payload, monkeypatch):
+        monkeypatch.setattr(idempotency, "TASK_IDEMPOTENCY_WAIT_SECONDS", 0.1)
+        cache.add(idempotency.lock_key(customer.id, "k-1"), 1)
+        res = post(auth_client(api_client, customer), reverse("task-list"), payload)
+        assert res.status_code == 409
+        assert Task.objects.count() == 0
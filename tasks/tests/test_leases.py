@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tasks import leases
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, extract_items, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def task():
+    customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+    return Task.objects.create(
+        customer=customer,
+        service=make_service(),
+        contact_name="A",
+        contact_phone="09120000001",
+        address="Addr1",
+    )
+
+
+def specialist_client(phone):
+    user = make_user(phone, role=User.RoleChoices.SPECIALIST)
+    approve_specialist(user)
+    return user, auth_client(APIClient(), user)
+
+
+class TestLeases:
+    def test_lease_is_exclusive_and_renewable(self):
+        assert leases.acquire(1, 10)
+        assert leases.acquire(1, 10)
+        assert not leases.acquire(1, 11)
+        assert leases.holders([1, 2]) == {1: 10}
+
+        assert not leases.release(1, 11)
+        assert leases.release(1, 10)
+        assert leases.acquire(1, 11)
+
+    def test_redis_release_is_one_conditional_delete(self, monkeypatch):
+        class Client:
+            # django_redis' client, with the Lua script run against a dict
+            store = {"task_lease_1": b"10"}
+
+            def encode(self, value):
+                return str(value).encode()
+
+            def make_key(self, key):
+                return key
+
+            def get_client(self, write):
+                return self
+
+            def eval(self, script, numkeys, key, value):
+                assert script == leases.RELEASE_SCRIPT
+                return int(self.store.get(key) == value and self.store.pop(key) is not None)
+
+        client = Client()
+        monkeypatch.setattr(leases, "cache", SimpleNamespace(client=client))
+        assert not leases.release(1, 11)
+        assert leases.release(1, 10)
+        assert client.store == {}
+
+    def test_leased_task_drops_out_of_other_feeds(self, task):
+        s1, c1 = specialist_client("+989123333333")
+        _, c2 = specialist_client("+989124444444")
+
+        res = c1.post(reverse("task-lease", kwargs={"pk": task.id}))
+        assert res.status_code == 200
+        assert res.json()["expires_in"] == 30
+
+        own_feed = extract_items(c1.get(reverse("task-available")).json())
+        other_feed = extract_items(c2.get(reverse("task-available")).json())
+        assert [i["id"] for i in own_feed] == [task.id]
+        assert other_feed == []
+
+        assert c2.post(reverse("task-lease", kwargs={"pk": task.id})).status_code == 409
+        assert c2.post(reverse("task-accept", kwargs={"pk": task.id})).status_code == 400
+        assert c2.post(reverse("task-claim-next")).status_code == 204
+
+        assert c1.delete(reverse("task-lease", kwargs={"pk": task.id})).status_code == 204
+        other_feed = extract_items(c2.get(reverse("task-available")).json())
+        assert [i["id"] for i in other_feed] == [task.id]
+
+    def test_holder_can_accept_and_lease_is_cleared(self, task):
+        s1, c1 = specialist_client("+989123333333")
+        c1.post(reverse("task-lease", kwargs={"pk": task.id}))
+
+        res = c1.post(reverse("task-accept", kwargs={"pk": task.id}))
+        assert res.status_code == 200
+        assert leases.holder(task.id) is None
+
+    def test_cannot_lease_unavailable_task(self, task):
+        task.status = Task.Status.CANCELED
+        task.save(update_fields=["status"])
+        _, c1 = specialist_client("+989123333333")
+        assert c1.post(reverse("task-lease", kwargs={"pk": task.id})).status_code == 400
+        assert c1.post(reverse("task-lease", kwargs={"pk": task.id + 100})).status_code == 404
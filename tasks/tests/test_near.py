@@ -0,0 +1,75 @@
+import pytest
+from django.urls import reverse
+
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, extract_items, make_service, make_user
+from tasks.utils.geo import covering_cells, encode_geohash, haversine_km
+
+pytestmark = pytest.mark.django_db
+
+
+def make_task(customer, service, lat, lng, **extra):
+    return Task.objects.create(
+        customer=customer,
+        service=service,
+        contact_name="A",
+        contact_phone="09120000001",
+        address="Addr",
+        latitude=lat,
+        longitude=lng,
+        **extra,
+    )
+
+
+class TestGeo:
+    def test_encode_geohash_known_value(self):
+        assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    def test_covering_cells_contain_point(self):
+        cells = covering_cells(35.60, 35.80, 51.30, 51.50, max_precision=7)
+        gh = encode_geohash(35.70, 51.40, 7)
+        assert any(gh.startswith(c) for c in cells)
+        assert len(cells) <= 16
+
+    def test_haversine(self):
+        # Tehran -> Karaj is roughly 36 km
+        assert 30 < haversine_km(35.6892, 51.3890, 35.8400, 50.9391) < 45
+
+
+class TestNearAvailable:
+    def test_task_save_sets_geohash(self):
+        service = make_service()
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        task = make_task(customer, service, "35.700000", "51.400000")
+        assert task.geohash == encode_geohash(35.7, 51.4, 7)
+
+        no_coords = Task.objects.create(
+            customer=customer, service=service, contact_name="A", contact_phone="0912", address="x"
+        )
+        assert no_coords.geohash == ""
+
+    def test_near_filters_by_radius_and_orders_nearest_first(self, api_client):
+        service = make_service()
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        far = make_task(customer, service, "35.840000", "50.939100")  # Karaj
+        mid = make_task(customer, service, "35.720000", "51.420000")
+        close = make_task(customer, service, "35.701000", "51.401000")
+        make_task(customer, service, None, None)
+
+        specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(specialist)
+        client = auth_client(api_client, specialist)
+
+        res = client.get(reverse("task-available"), {"near": "35.7,51.4", "radius_km": "10"})
+        assert res.status_code == 200
+        ids = [i["id"] for i in extract_items(res.json())]
+        assert ids == [close.id, mid.id]
+        assert far.id not in ids
+
+    def test_near_rejects_bad_params(self, api_client):
+        specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(specialist)
+        client = auth_client(api_client, specialist)
+
+        assert client.get(reverse("task-available"), {"near": "abc"}).status_code == 400
+        assert client.get(reverse("task-available"), {"near": "35.7,51.4", "radius_km": "500"}).status_code == 400
@@ -0,0 +1,79 @@
+import pytest
+from django.urls import reverse
+
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+def make_tasks(customer, service, count):
+    return [
+        Task.objects.create(
+            customer=customer,
+            service=service,
+            contact_name=f"C{i}",
+            contact_phone="09120000001",
+            address="Addr",
+        )
+        for i in range(count)
+    ]
+
+
+def walk(client, url, params):
+    ids, pages = [], 0
+    res = client.get(url, params)
+    while True:
+        assert res.status_code == 200
+        body = res.json()
+        ids.extend(i["id"] for i in body["results"])
+        pages += 1
+        if not body["next"]:
+            return ids, pages
+        res = client.get(body["next"])
+
+
+class TestKeysetPagination:
+    def test_list_walks_every_task_once_in_order(self, api_client):
+        service = make_service()
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        tasks = make_tasks(customer, service, 7)
+        # identical timestamps must still page deterministically via the id tie-breaker
+        Task.objects.filter(id__in=[t.id for t in tasks[2:5]]).update(created_at=tasks[2].created_at)
+
+        client = auth_client(api_client, customer)
+        ids, pages = walk(client, reverse("task-list"), {"limit": 3})
+
+        expected = list(Task.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        assert ids == expected
+        assert pages == 3
+
+    def test_available_pages_and_near_mode(self, api_client):
+        service = make_service()
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        for i in range(5):
+            Task.objects.create(
+                customer=customer,
+                service=service,
+                contact_name="A",
+                contact_phone="0912",
+                address="Addr",
+                latitude=f"35.70{i}000",
+                longitude="51.400000",
+            )
+
+        specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(specialist)
+        client = auth_client(api_client, specialist)
+
+        ids, _ = walk(client, reverse("task-available"), {"limit": 2})
+        assert len(ids) == len(set(ids)) == 5
+
+        near_ids, _ = walk(client, reverse("task-available"), {"limit": 2, "near": "35.7,51.4"})
+        expected = list(Task.objects.order_by("latitude").values_list("id", flat=True))
+        assert near_ids == expected
+
+    def test_invalid_cursor_is_404(self, api_client):
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        client = auth_client(api_client, customer)
+        assert client.get(reverse("task-list"), {"cursor": "garbage"}).status_code == 404
@@ -0,0 +1,118 @@
+import io
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from uuid import UUID
+
+import msgpack
+import numpy as np
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from kaaro.renderers import MessagePackParser, MessagePackRenderer, ORJSONParser, ORJSONRenderer
+from tasks.models import Task
+from tasks.serializers import TaskRowSerializer, TaskSerializer
+from tasks.tests.test import User, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def customer():
+    return make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+
+
+@pytest.fixture
+def tasks(customer):
+    service = make_service()
+    return [
+        Task.objects.create(
+            customer=customer, service=service, contact_name="Ali", contact_phone="0912", address="Tehran",
+            note=note, latitude=lat, longitude=lng, scheduled_start=start,
+        )
+        for note, lat, lng, start in (
+            (None, None, None, None),
+            ("پنجره شکسته", "35.712345", "51.400001", timezone.now() + timedelta(days=1)),
+        )
+    ]
+
+
+class TestORJSONRenderer:
+    def test_matches_json_renderer(self):
+        data = {
+            "decimal": Decimal("35.712345"),
+            "utc": datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+            "local": timezone.localtime(datetime(2026, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)),
+            "date": datetime(2026, 1, 2).date(),
+            "duration": timedelta(minutes=90),
+            "uuid": UUID("12345678-1234-5678-1234-567812345678"),
+            "set": {1},
+            "text": "line\u2028para\u2029 فارسی",
+            "nested": [None, True, 1.5, {"a": []}],
+        }
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_task_pages_match(self, tasks):
+        queryset = Task.objects.select_related("service", "customer", "specialist").order_by("id")
+        for data in (TaskSerializer(queryset, many=True).data, TaskRowSerializer(TaskRowSerializer.prepare(queryset)).data):
+            assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_int_keys(self):
+        data = {"specialist": {0: ["A valid integer is required."]}}
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_numpy_and_indent(self):
+        assert ORJSONRenderer().render({"n": np.array([1, 2])}) == b'{"n":[1,2]}'
+        indented = ORJSONRenderer().render({"a": 1}, "application/json; indent=4")
+        assert indented == b'{\n    "a": 1\n}'
+        assert ORJSONRenderer().render(None) == b""
+
+
+class TestParsers:
+    def test_orjson_parser(self):
+        assert ORJSONParser().parse(io.BytesIO('{"a": [1, "ب"]}'.encode())) == {"a": [1, "ب"]}
+        with pytest.raises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b"{nope"))
+        with pytest.raises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b"NaN"))
+
+    def test_msgpack_round_trip(self):
+        data = {"lat": Decimal("35.5"), "at": datetime(2026, 1, 2, tzinfo=dt_timezone.utc), "ids": [1, 2]}
+        rendered = MessagePackRenderer().render(data)
+        assert MessagePackParser().parse(io.BytesIO(rendered)) == {"lat": 35.5, "at": "2026-01-02T00:00:00Z", "ids": [1, 2]}
+        with pytest.raises(ParseError):
+            MessagePackParser().parse(io.BytesIO(b"\xc1"))
+
+
+class TestNegotiation:
+    def test_json_by_default(self, api_client, customer, tasks):
+        res = auth_client(api_client, customer).get(reverse("task-list"))
+        assert res.status_code == 200
+        assert res["Content-Type"] == "application/json"
+        assert [row["id"] for row in res.json()["results"]] == [tasks[1].id, tasks[0].id]
+
+    def test_msgpack_via_accept(self, api_client, customer, tasks):
+        client = auth_client(api_client, customer)
+        as_json = client.get(reverse("task-list")).json()
+        res = client.get(reverse("task-list"), HTTP_ACCEPT="application/msgpack")
+        assert res.status_code == 200
+        assert res["Content-Type"] == "application/msgpack"
+        assert msgpack.unpackb(res.content) == as_json
+
+    def test_list_item_errors_render(self, api_client, customer):
+        start = timezone.now() + timedelta(days=1)
+        window = {"start": start.isoformat(), "end": (start + timedelta(days=1)).isoformat()}
+        res = auth_client(api_client, customer).get(reverse("task-free-slots"), {**window, "specialist": ["1", "abc"]})
+        assert res.status_code == 400
+        assert res.json() == {"specialist": {"1": ["A valid integer is required."]}}
+
+    def test_msgpack_request_body(self, api_client, customer):
+        service = make_service()
+        body = msgpack.packb({"service": service.id, "contact_name": "Ali", "contact_phone": "0912", "address": "x"})
+        res = auth_client(api_client, customer).post(
+            reverse("task-list"), body, content_type="application/msgpack", HTTP_ACCEPT="application/msgpack"
+        )
+        assert res.status_code == 201
+        assert msgpack.unpackb(res.content)["contact_name"] == "Ali"
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from specialists.models import SpecialistProfile
+from tasks import routes, state_machine
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+def tour_km(points, order, origin=None):
+    stops = ([origin] if origin else []) + [points[i] for i in order]
+    lat, lng = np.array(stops, dtype=float).T
+    dist = routes.haversine_matrix(lat, lng)
+    return sum(dist[k, k + 1] for k in range(len(stops) - 1))
+
+
+class TestPlan:
+    def test_straight_line(self):
+        points = [(35.70, 51.40 + 0.01 * k) for k in (3, 0, 4, 1, 2)]
+        order, km, converged = routes.plan(points)
+        assert [points[i][1] for i in order] in (
+            [51.40, 51.41, 51.42, 51.43, 51.44], [51.44, 51.43, 51.42, 51.41, 51.40],
+        )
+        assert converged
+        assert km == pytest.approx(tour_km(points, order))
+
+        order, _, _ = routes.plan(points, origin=(35.70, 51.45))
+        assert points[order[0]][1] == 51.44
+
+    def test_two_opt_beats_nearest_neighbour(self):
+        rng = np.random.default_rng(7)
+        points = [tuple(p) for p in rng.uniform([35.6, 51.2], [35.8, 51.6], size=(60, 2))]
+        lat, lng = np.array(points).T
+        dist = np.zeros((61, 61))
+        dist[1:, 1:] = routes.haversine_matrix(lat, lng)
+        greedy = routes.nearest_neighbour(dist)
+
+        order, km, converged = routes.plan(points, budget=5)
+        assert converged
+        assert sorted(order) == list(range(60))
+        assert km < dist[greedy[:-1], greedy[1:]].sum()
+
+    def test_budget_returns_a_valid_tour(self):
+        rng = np.random.default_rng(1)
+        points = [tuple(p) for p in rng.uniform([35.6, 51.2], [35.8, 51.6], size=(80, 2))]
+        order, _, converged = routes.plan(points, budget=0)
+        assert not converged
+        assert sorted(order) == list(range(80))
+
+
+class TestRouteEndpoint:
+    @pytest.fixture
+    def setup(self):
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(specialist)
+        service = make_service()
+        tasks = []
+        for lng in ("51.430000", "51.400000", "51.420000", None):
+            task = Task.objects.create(
+                customer=customer, service=service, contact_name="A", contact_phone="0912", address="x",
+                latitude="35.700000" if lng else None, longitude=lng,
+            )
+            state_machine.accept(task.id, specialist)
+            tasks.append(task)
+        return customer, specialist, tasks
+
+    def test_orders_from_profile_location(self, api_client, setup):
+        _, specialist, tasks = setup
+        SpecialistProfile.objects.create(user=specialist, latitude="35.700000", longitude="51.390000")
+        body = auth_client(api_client, specialist).get(reverse("task-route")).json()
+        assert [t["id"] for t in body["results"]] == [tasks[1].id, tasks[2].id, tasks[0].id]
+        assert [t["id"] for t in body["unrouted"]] == [tasks[3].id]
+        assert body["optimized"] is True
+        assert body["distance_km"] == pytest.approx(3.6, abs=0.1)
+
+        body = auth_client(api_client, specialist).get(reverse("task-route"), {"origin": "35.7,51.44"}).json()
+        assert [t["id"] for t in body["results"]] == [tasks[0].id, tasks[2].id, tasks[1].id]
+
+    def test_cached_until_task_set_changes(self, api_client, setup, monkeypatch):
+        customer, specialist, tasks = setup
+        client = auth_client(api_client, specialist)
+        client.get(reverse("task-route"))
+
+        calls = []
+        real_plan = routes.plan
+        monkeypatch.setattr(routes, "plan", lambda *args, **kwargs: calls.append(1) or real_plan(*args, **kwargs))
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("task-route"))
+        assert calls == []
+        assert len([q for q in queries if "tasks_task" in q["sql"]]) == 1
+
+        state_machine.cancel(tasks[2].id, customer)
+        body = client.get(reverse("task-route")).json()
+        assert calls == [1]
+        assert {t["id"] for t in body["results"]} == {tasks[0].id, tasks[1].id}
+
+    def test_specialists_only(self, api_client, setup):
+        customer, _, _ = setup
+        assert auth_client(api_client, customer).get(reverse("task-route")).status_code == 403
@@ -0,0 +1,89 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from tasks import archive, state_machine
+from tasks.models import Task, TaskArchive
+from tasks.serializers import TaskRowSerializer, TaskSerializer
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def setup():
+    customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+    customer.first_name, customer.last_name = "Mina", "Karimi"
+    customer.save()
+    specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(specialist)
+    service = make_service()
+    tasks = [
+        Task.objects.create(
+            customer=customer, service=service, contact_name="A", contact_phone="0912", address="x", note=note,
+            latitude=lat, longitude=lng, scheduled_start=start,
+        )
+        for note, lat, lng, start in (
+            (None, None, None, None),
+            ("call first", "35.712345", "51.400001", timezone.now() + timedelta(days=1)),
+            ("", "-33.000001", "151.5", None),
+        )
+    ]
+    state_machine.accept(tasks[1].id, specialist)
+    return customer, specialist, tasks
+
+
+def rendered(data):
+    return JSONRenderer().render(data)
+
+
+class TestTaskRowSerializer:
+    def test_matches_task_serializer(self, setup):
+        queryset = Task.objects.select_related("service", "customer", "specialist").order_by("id")
+        expected = TaskSerializer(queryset, many=True).data
+        data = TaskRowSerializer(TaskRowSerializer.prepare(queryset)).data
+        assert data == expected
+        assert rendered(data) == rendered(expected)
+        assert "specialist_display" not in data[0]
+
+    def test_matches_with_a_custom_datetime_format(self, setup, settings):
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, "DATETIME_FORMAT": "%Y-%m-%d %H:%M"}
+        queryset = Task.objects.select_related("service", "customer", "specialist").order_by("id")
+        data = TaskRowSerializer(TaskRowSerializer.prepare(queryset)).data
+        assert data == TaskSerializer(queryset, many=True).data
+        assert len(data[0]["created_at"]) == 16
+
+    def test_matches_for_archive_rows(self, setup):
+        customer, _, tasks = setup
+        state_machine.cancel(tasks[0].id, customer)
+        Task.objects.filter(pk=tasks[0].id).update(updated_at=timezone.now() - timedelta(days=60))
+        archive.archive()
+
+        queryset = TaskArchive.objects.select_related("service", "customer", "specialist").order_by("id")
+        assert rendered(TaskRowSerializer(TaskRowSerializer.prepare(queryset)).data) == rendered(
+            TaskSerializer(queryset, many=True).data
+        )
+
+    def test_list_endpoint(self, api_client, setup, django_assert_num_queries):
+        customer, _, tasks = setup
+        client = auth_client(api_client, customer)
+        with django_assert_num_queries(2):  # user + page
+            res = client.get(reverse("task-list"), {"limit": 2})
+        queryset = Task.objects.select_related("service", "customer", "specialist").order_by("-created_at", "-id")
+        assert res.content == rendered({"next": res.json()["next"], "results": TaskSerializer(queryset[:2], many=True).data})
+
+        rest = client.get(res.json()["next"]).json()["results"]
+        assert [t["id"] for t in rest] == [tasks[0].id]
+
+    def test_available_near(self, api_client, setup):
+        _, specialist, tasks = setup
+        res = auth_client(api_client, specialist).get(
+            reverse("task-available"), {"near": "-33,151.5", "radius_km": 10}
+        )
+        assert res.status_code == 200
+        expected = [TaskSerializer(Task.objects.get(pk=tasks[2].id)).data]
+        assert res.json()["results"] == json.loads(rendered(expected))
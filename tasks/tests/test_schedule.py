@@ -0,0 +1,175 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from specialists.models import SpecialistProfile
+from tasks import dispatch, schedule, state_machine
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+BASE = (timezone.now() + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+
+
+def at(hours):
+    return BASE + timedelta(hours=hours)
+
+
+@pytest.fixture
+def customer():
+    return make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+
+
+@pytest.fixture
+def specialist():
+    user = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(user)
+    return user
+
+
+@pytest.fixture
+def service():
+    return make_service()  # 60 minutes
+
+
+def make_task(customer, service, start=None, **extra):
+    return Task.objects.create(
+        customer=customer, service=service, contact_name="A", contact_phone="0912", address="x",
+        scheduled_start=start, **extra
+    )
+
+
+class TestSlots:
+    def test_end_follows_service_duration(self, customer, service):
+        task = make_task(customer, service, at(0))
+        assert task.scheduled_end == at(1)
+
+        task.scheduled_start = at(2)
+        task.save(update_fields=["scheduled_start"])
+        task.refresh_from_db()
+        assert task.scheduled_end == at(3)
+        assert make_task(customer, service).scheduled_end is None
+
+    def test_create_endpoint(self, api_client, customer, service):
+        client = auth_client(api_client, customer)
+        payload = {"service": service.id, "contact_name": "A", "contact_phone": "0912", "address": "x"}
+        res = client.post(reverse("task-list"), {**payload, "scheduled_start": at(0).isoformat()}, format="json")
+        assert res.status_code == 201
+        assert Task.objects.get(pk=res.json()["id"]).scheduled_end == at(1)
+
+        past = (timezone.now() - timedelta(hours=1)).isoformat()
+        res = client.post(reverse("task-list"), {**payload, "scheduled_start": past}, format="json")
+        assert res.status_code == 400
+
+
+class TestAcceptConflicts:
+    def test_overlap_is_rejected(self, customer, specialist, service, django_assert_num_queries):
+        first = make_task(customer, service, at(0))
+        overlapping = make_task(customer, service, at(0.5))
+        adjacent = make_task(customer, service, at(1))
+        unscheduled = make_task(customer, service)
+
+        state_machine.accept(first.id, specialist)
+        with pytest.raises(state_machine.ScheduleConflict):
+            state_machine.accept(overlapping.id, specialist)
+        assert Task.objects.get(pk=overlapping.id).status == Task.Status.PENDING
+
+        with django_assert_num_queries(4):
+            state_machine.accept(adjacent.id, specialist)
+        state_machine.accept(unscheduled.id, specialist)
+
+    def test_finished_tasks_free_the_slot(self, customer, specialist, service):
+        first = make_task(customer, service, at(0))
+        second = make_task(customer, service, at(0))
+        state_machine.accept(first.id, specialist)
+        state_machine.cancel(first.id, customer)
+        state_machine.accept(second.id, specialist)
+
+    def test_endpoint_answers_409(self, api_client, customer, specialist, service):
+        first = make_task(customer, service, at(0))
+        second = make_task(customer, service, at(0))
+        state_machine.accept(first.id, specialist)
+        res = auth_client(api_client, specialist).post(reverse("task-accept", args=[second.id]))
+        assert res.status_code == 409
+
+    def test_claim_next_skips_conflicts(self, customer, specialist, service):
+        booked = make_task(customer, service, at(0))
+        state_machine.accept(booked.id, specialist)
+        make_task(customer, service, at(0))
+        free = make_task(customer, service, at(3))
+        task = state_machine.claim_next(specialist, Task.objects.order_by("created_at", "id"))
+        assert task.id == free.id
+
+    def test_dispatch_plan_drops_conflicts(self, customer, specialist, service):
+        booked = make_task(customer, service, at(0))
+        state_machine.accept(booked.id, specialist)
+        clash, free, later_clash = (make_task(customer, service, at(h)) for h in (0.5, 2, 2.5))
+        plan = {clash.id: specialist.id, free.id: specialist.id, later_clash.id: specialist.id}
+        assert schedule.drop_conflicts(plan) == {free.id: specialist.id}
+
+        SpecialistProfile.objects.create(user=specialist, is_available=True, latitude="35.7", longitude="51.4")
+        for task in (clash, free, later_clash):
+            Task.objects.filter(pk=task.id).update(latitude="35.7", longitude="51.4")
+        assert dispatch.plan() == {free.id: specialist.id}
+
+
+class TestCalendar:
+    def test_merges_and_checks(self):
+        cal = schedule.Calendar([(1, at(0), at(1)), (1, at(3), at(4)), (1, at(0.5), at(2)), (2, at(0), at(9))])
+        assert cal.busy(1) == [(at(0), at(2)), (at(3), at(4))]
+        assert cal.fits(1, at(2), at(3))
+        assert not cal.fits(1, at(1.5), at(2.5))
+        assert not cal.fits(1, at(2.5), at(3.5))
+        assert cal.fits(3, at(0), at(1))
+        cal.add(1, at(2), at(3))
+        assert cal.busy(1) == [(at(0), at(4))]
+
+    def test_specialist_calendar(self, api_client, customer, specialist, service):
+        inside, outside = make_task(customer, service, at(1)), make_task(customer, service, at(30))
+        for task in (inside, outside):
+            state_machine.accept(task.id, specialist)
+        res = auth_client(api_client, specialist).get(
+            reverse("task-calendar"), {"start": at(0).isoformat(), "end": at(24).isoformat()}
+        )
+        assert res.status_code == 200
+        assert [t["id"] for t in res.json()] == [inside.id]
+
+    def test_free_slots(self, api_client, customer, specialist, service):
+        other = make_user("+989124444444", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(other)
+        SpecialistProfile.objects.create(user=specialist, is_available=True)
+        SpecialistProfile.objects.create(user=other, is_available=True)
+        for hours in (1, 2, 5):
+            state_machine.accept(make_task(customer, service, at(hours)).id, specialist)
+
+        staff = make_user("+989125555555", role=User.RoleChoices.CUSTOMER)
+        User.objects.filter(pk=staff.id).update(is_staff=True)
+        window = {"start": at(0).isoformat(), "end": at(8).isoformat()}
+        body = auth_client(APIClient(), staff).get(reverse("task-free-slots"), {**window, "minutes": 90}).json()
+        assert body["minutes"] == 90
+        slots = {row["specialist"]: row["slots"] for row in body["results"]}
+        assert len(slots[specialist.id]) == 2  # 3h-5h and 6h-8h; the 1h gap before 1h is too short
+        assert len(slots[other.id]) == 1
+
+        # the customer only sees the specialist their tasks are booked with
+        client = auth_client(api_client, customer)
+        body = client.get(reverse("task-free-slots"), window).json()
+        assert [row["specialist"] for row in body["results"]] == [specialist.id]
+
+        body = client.get(reverse("task-free-slots"), {**window, "service": service.id, "specialist": specialist.id}).json()
+        assert body["minutes"] == 60
+        assert [row["specialist"] for row in body["results"]] == [specialist.id]
+        assert len(body["results"][0]["slots"]) == 3
+
+        assert client.get(reverse("task-free-slots"), {**window, "specialist": other.id}).status_code == 403
+        other_client = auth_client(APIClient(), other)
+        assert other_client.get(reverse("task-free-slots"), {**window, "specialist": specialist.id}).status_code == 403
+        body = other_client.get(reverse("task-free-slots"), window).json()
+        assert [row["specialist"] for row in body["results"]] == [other.id]
+
+        bad = {"start": at(0).isoformat(), "end": at(24 * 40).isoformat()}
+        assert client.get(reverse("task-free-slots"), bad).status_code == 400
@@ -0,0 +1,82 @@
+import pytest
+from django.contrib.admin.sites import site
+from django.test import RequestFactory
+from django.urls import reverse
+
+from tasks.models import Task
+from tasks.search import search
+from tasks.tests.test import User, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def customer():
+    return make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+
+
+@pytest.fixture
+def tasks(customer):
+    service = make_service()
+    rows = [
+        ("Ali Rezaei", "09121234567", "Tehran, Valiasr St", "leaking kitchen sink"),
+        ("Sara Ahmadi", "09351112233", "Isfahan, Chaharbagh", None),
+        ("Ali Karimi", "09127654321", "Tehran, Enghelab St", "sink and sink drain"),
+        ("Reza Mohammadi", "09190000000", "Shiraz", "paint the kitchen"),
+    ]
+    return [
+        Task.objects.create(
+            customer=customer, service=service, contact_name=name, contact_phone=phone, address=address, note=note
+        )
+        for name, phone, address, note in rows
+    ]
+
+
+def ids(queryset):
+    return [t.id for t in queryset]
+
+
+class TestSearch:
+    def test_prefix_terms_across_fields(self, tasks):
+        assert set(ids(search(Task.objects.all(), "ali"))) == {tasks[0].id, tasks[2].id}
+        assert ids(search(Task.objects.all(), "0935")) == [tasks[1].id]
+        assert ids(search(Task.objects.all(), "ali tehran valiasr")) == [tasks[0].id]
+        assert ids(search(Task.objects.all(), "kitch")) != []
+        assert ids(search(Task.objects.all(), "nothing-like-this")) == []
+        assert ids(search(Task.objects.all(), '"*) OR (')) == []
+
+    def test_ranked(self, tasks):
+        # "sink" twice in a short note beats one mention
+        assert ids(search(Task.objects.all(), "sink")) == [tasks[2].id, tasks[0].id]
+
+    def test_index_follows_writes(self, tasks):
+        Task.objects.filter(pk=tasks[3].id).update(note="broken window")
+        assert ids(search(Task.objects.all(), "window")) == [tasks[3].id]
+        assert ids(search(Task.objects.all(), "paint")) == []
+
+        tasks[1].contact_name = "Sara Nazari"
+        tasks[1].save()
+        assert ids(search(Task.objects.all(), "nazari")) == [tasks[1].id]
+
+        Task.objects.filter(pk=tasks[0].id).delete()
+        assert ids(search(Task.objects.all(), "valiasr")) == []
+
+    def test_endpoint_paginates_by_rank(self, api_client, customer, tasks):
+        client = auth_client(api_client, customer)
+        first = client.get(reverse("task-list"), {"search": "sink", "limit": 1}).json()
+        assert [i["id"] for i in first["results"]] == [tasks[2].id]
+        second = client.get(first["next"]).json()
+        assert [i["id"] for i in second["results"]] == [tasks[0].id]
+        assert second["next"] is None
+
+        res = client.get(reverse("task-list"), {"search": "sink", "history": 1})
+        assert res.status_code == 400
+
+    def test_admin_uses_index(self, tasks, customer):
+        model_admin = site._registry[Task]
+        request = RequestFactory().get("/")
+        results, _ = model_admin.get_search_results(request, Task.objects.all(), "karimi")
+        assert ids(results) == [tasks[2].id]
+
+        results, _ = model_admin.get_search_results(request, Task.objects.all(), str(customer.phone_number))
+        assert len(results) == 4
@@ -0,0 +1,94 @@
+import pytest
+from django.urls import reverse
+from rest_framework.exceptions import NotFound, PermissionDenied
+
+from tasks import state_machine
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def task():
+    customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+    return Task.objects.create(
+        customer=customer,
+        service=make_service(),
+        contact_name="A",
+        contact_phone="09120000001",
+        address="Addr1",
+    )
+
+
+@pytest.fixture
+def specialist():
+    user = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(user)
+    return user
+
+
+class TestStateMachine:
+    def test_accept_is_update_insert_counter_and_select(self, task, specialist, django_assert_num_queries):
+        # conditional UPDATE + event INSERT + counter UPDATE + one SELECT with the joins
+        with django_assert_num_queries(4):
+            accepted = state_machine.accept(task.id, specialist)
+
+        assert accepted.status == Task.Status.ACCEPTED
+        assert accepted.specialist_id == specialist.id
+        # relations are already loaded; serializing needs no further queries
+        with django_assert_num_queries(0):
+            assert accepted.service.title == "Cleaning"
+            assert accepted.customer.full_name
+            assert accepted.specialist.full_name
+
+    def test_second_accept_loses(self, task, specialist):
+        other = make_user("+989124444444", role=User.RoleChoices.SPECIALIST)
+        state_machine.accept(task.id, specialist)
+
+        with pytest.raises(state_machine.TransitionError):
+            state_machine.accept(task.id, other)
+
+        task.refresh_from_db()
+        assert task.specialist_id == specialist.id
+
+    def test_full_lifecycle(self, task, specialist):
+        state_machine.accept(task.id, specialist)
+        state_machine.start(task.id, specialist)
+        done = state_machine.complete(task.id, specialist)
+        assert done.status == Task.Status.DONE
+
+    def test_cancel_cannot_overwrite_in_progress(self, task, specialist):
+        state_machine.accept(task.id, specialist)
+        state_machine.start(task.id, specialist)
+
+        with pytest.raises(state_machine.TransitionError):
+            state_machine.cancel(task.id, task.customer)
+
+        task.refresh_from_db()
+        assert task.status == Task.Status.IN_PROGRESS
+
+    def test_cancel_of_accepted_task_keeps_specialist(self, task, specialist):
+        state_machine.accept(task.id, specialist)
+        canceled = state_machine.cancel(task.id, task.customer)
+        assert canceled.status == Task.Status.CANCELED
+        assert canceled.specialist_id == specialist.id
+
+    def test_foreign_actor_and_missing_task(self, task, specialist):
+        state_machine.accept(task.id, specialist)
+        stranger = make_user("+989125555555", role=User.RoleChoices.SPECIALIST)
+
+        with pytest.raises(PermissionDenied):
+            state_machine.start(task.id, stranger)
+        with pytest.raises(PermissionDenied):
+            state_machine.cancel(task.id, stranger)
+        with pytest.raises(NotFound):
+            state_machine.accept(task.id + 1000, stranger)
+
+    def test_endpoints_map_errors(self, api_client, task, specialist):
+        client = auth_client(api_client, specialist)
+        assert client.post(reverse("task-accept", kwargs={"pk": task.id + 1000})).status_code == 404
+        assert client.post(reverse("task-accept", kwargs={"pk": task.id})).status_code == 200
+        res = client.post(reverse("task-accept", kwargs={"pk": task.id}))
+        assert res.status_code == 400
+        assert res.json() == {"detail": "Task is not available."}
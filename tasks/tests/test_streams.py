@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import pytest
+from django.http import StreamingHttpResponse
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks import streams
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, auth_client, make_service, make_user
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def parse(frame):
+    lines = dict(line.split(": ", 1) for line in frame.decode().strip().splitlines())
+    return lines["event"], json.loads(lines["data"])
+
+
+class TestLocalBroker:
+    def test_filters_by_service_and_area_and_shares_frames(self):
+        broker = streams.LocalBroker()
+        frame = streams.event_frame("task.created", {"id": 1})
+
+        async def scenario():
+            everyone = broker.subscribe()
+            cleaning = broker.subscribe(service_ids=[1])
+            tehran = broker.subscribe(near=(35.7, 51.4, 5))
+
+            broker.publish({"service": 1, "lat": 35.71, "lng": 51.41}, frame)
+            broker.publish({"service": 2, "lat": 29.6, "lng": 52.5}, frame)
+            await asyncio.sleep(0)
+
+            return everyone.queue.qsize(), cleaning.queue.qsize(), tehran.queue.qsize(), everyone.queue.get_nowait()
+
+        sizes = asyncio.run(scenario())
+        assert sizes[:3] == (2, 1, 1)
+        assert sizes[3] is frame
+
+
+class TestTaskStream:
+    def test_stream_pushes_new_and_removed_tasks(self, api_client, monkeypatch):
+        broker = streams.LocalBroker()
+        monkeypatch.setattr(streams, "_broker", broker)
+
+        service = make_service()
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(specialist)
+
+        client = AsyncClient()
+        client.cookies["accessToken"] = str(RefreshToken.for_user(specialist).access_token)
+
+        async def read():
+            res = await client.get(reverse("task-stream"), headers={"accept": "text/event-stream"})
+            assert res.status_code == 200
+            assert res["Content-Type"] == "text/event-stream"
+            frames = res.streaming_content.__aiter__()
+            assert await frames.__anext__() == b"retry: 3000\n\n"
+
+            task = await asyncio.to_thread(
+                Task.objects.create,
+                customer=customer,
+                service=service,
+                contact_name="A",
+                contact_phone="0912",
+                address="Addr",
+            )
+            await asyncio.to_thread(streams.publish_created, Task, tasks=[task])
+            created = await frames.__anext__()
+
+            await asyncio.to_thread(Task.objects.filter(id=task.id).update, status=Task.Status.ACCEPTED)
+            task.status = Task.Status.ACCEPTED
+            await asyncio.to_thread(streams.publish_removed, Task, task=task, previous_status=Task.Status.PENDING)
+            removed = await frames.__anext__()
+            await frames.aclose()
+            return task, created, removed
+
+        task, created, removed = asyncio.run(read())
+        assert parse(created)[0] == "task.created"
+        assert parse(created)[1]["id"] == task.id
+        assert parse(removed) == ("task.removed", {"id": task.id, "status": Task.Status.ACCEPTED})
+        assert not broker._subscribers
+
+    def test_create_and_accept_publish_through_signals(self, api_client, monkeypatch):
+        published = []
+        monkeypatch.setattr(streams, "_broker", type("Recorder", (), {"publish": lambda self, m, f: published.append(f)})())
+
+        service = make_service()
+        customer = make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+        res = auth_client(api_client, customer).post(
+            reverse("task-list"),
+            data={"service": service.id, "contact_name": "A", "contact_phone": "0912", "address": "x"},
+            format="json",
+        )
+        task_id = res.json()["id"]
+
+        specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(specialist)
+        auth_client(api_client, specialist).post(reverse("task-accept", kwargs={"pk": task_id}))
+
+        assert [parse(f)[0] for f in published] == ["task.created", "task.removed"]
+
+    def test_stream_needs_asgi(self, api_client):
+        specialist = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        approve_specialist(specialist)
+        res = auth_client(api_client, specialist).get(reverse("task-stream"), HTTP_ACCEPT="text/event-stream")
+        assert res.status_code == 501
+        assert not isinstance(res, StreamingHttpResponse)
+
+    def test_stream_requires_approved_specialist(self, api_client):
+        user = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+        res = auth_client(api_client, user).get(reverse("task-stream"), HTTP_ACCEPT="text/event-stream")
+        assert res.status_code == 403
@@ -0,0 +1,83 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from specialists.models import SpecialistProfile
+from tasks import state_machine, workload
+from tasks.models import Task
+from tasks.tests.test import User, approve_specialist, make_service, make_user
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def customer():
+    return make_user("+989121111111", role=User.RoleChoices.CUSTOMER)
+
+
+@pytest.fixture
+def specialist():
+    user = make_user("+989123333333", role=User.RoleChoices.SPECIALIST)
+    approve_specialist(user)
+    SpecialistProfile.objects.create(user=user)
+    return user
+
+
+def make_tasks(customer, n):
+    service = make_service()
+    return [
+        Task.objects.create(customer=customer, service=service, contact_name="A", contact_phone="0912", address="x")
+        for _ in range(n)
+    ]
+
+
+def counters(user):
+    return SpecialistProfile.objects.values_list("accepted_count", "in_progress_count", "done_count").get(user=user)
+
+
+class TestWorkloadCounters:
+    def test_transitions_shift_counters(self, customer, specialist):
+        first, second, third = make_tasks(customer, 3)
+        for task in (first, second, third):
+            state_machine.accept(task.id, specialist)
+        assert counters(specialist) == (3, 0, 0)
+
+        state_machine.start(first.id, specialist)
+        state_machine.complete(first.id, specialist)
+        state_machine.start(second.id, specialist)
+        assert counters(specialist) == (1, 1, 1)
+
+        state_machine.cancel(third.id, customer)
+        assert counters(specialist) == (0, 1, 1)
+
+    def test_pending_cancel_touches_no_profile(self, customer, specialist):
+        (task,) = make_tasks(customer, 1)
+        state_machine.cancel(task.id, customer)
+        assert counters(specialist) == (0, 0, 0)
+
+    def test_batch_assignment(self, customer, specialist):
+        other = make_user("+989124444444", role=User.RoleChoices.SPECIALIST)
+        SpecialistProfile.objects.create(user=other)
+        tasks = make_tasks(customer, 3)
+
+        state_machine.assign_batch({tasks[0].id: specialist.id, tasks[1].id: specialist.id, tasks[2].id: other.id})
+        assert counters(specialist) == (2, 0, 0)
+        assert counters(other) == (1, 0, 0)
+
+
+class TestReconcile:
+    def test_rebuilds_drifted_counters(self, customer, specialist):
+        tasks = make_tasks(customer, 2)
+        for task in tasks:
+            state_machine.accept(task.id, specialist)
+        SpecialistProfile.objects.filter(user=specialist).update(accepted_count=7, done_count=-1)
+
+        assert workload.reconcile(dry_run=True) == 1
+        assert counters(specialist) == (7, 0, -1)
+
+        out = StringIO()
+        call_command("reconcile_workload", stdout=out)
+        assert "1 specialist profile(s) fixed" in out.getvalue()
+        assert counters(specialist) == (2, 0, 0)
+        assert workload.reconcile() == 0
@@ -0,0 +1,94 @@
+import math
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def encode_geohash(latitude, longitude, precision):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude, longitude = float(latitude), float(longitude)
+
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision):
+    # (lat_degrees, lng_degrees) covered by one cell of the given precision
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def km_per_degree_lng(latitude):
+    return KM_PER_DEGREE_LAT * max(math.cos(math.radians(float(latitude))), 0.01)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    latitude, longitude = float(latitude), float(longitude)
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    d_lng = radius_km / km_per_degree_lng(latitude)
+    return (
+        max(latitude - d_lat, -90.0),
+        min(latitude + d_lat, 90.0),
+        max(longitude - d_lng, -180.0),
+        min(longitude + d_lng, 180.0),
+    )
+
+
+# Geohash prefixes that together cover the box, using the finest precision that fits in max_cells.
+def covering_cells(min_lat, max_lat, min_lng, max_lng, max_precision, max_cells=16):
+    for precision in range(max_precision, 0, -1):
+        cell_lat, cell_lng = geohash_cell_size(precision)
+        rows = math.floor((max_lat + 90.0) / cell_lat) - math.floor((min_lat + 90.0) / cell_lat) + 1
+        cols = math.floor((max_lng + 180.0) / cell_lng) - math.floor((min_lng + 180.0) / cell_lng) + 1
+        if rows * cols > max_cells:
+            continue
+
+        first_row = math.floor((min_lat + 90.0) / cell_lat)
+        first_col = math.floor((min_lng + 180.0) / cell_lng)
+        cells = set()
+        for row in range(first_row, first_row + rows):
+            for col in range(first_col, first_col + cols):
+                center_lat = min(-90.0 + (row + 0.5) * cell_lat, 90.0)
+                center_lng = min(-180.0 + (col + 0.5) * cell_lng, 180.0)
+                cells.add(encode_geohash(center_lat, center_lng, precision))
+        return sorted(cells)
+
+    return [""]
+
+
+def geohash_prefix_range(prefix):
+    # Every geohash starting with prefix sorts in [prefix, prefix + "~"), which keeps the lookup on a b-tree range scan.
+    return prefix, prefix + "~"
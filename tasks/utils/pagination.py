@@ -0,0 +1,171 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from tasks.defaults import TASK_PAGE_MAX_LIMIT
+
+
+# Cursor pagination over the queryset's own ordering, e.g. ("-created_at", "-id").
+# The cursor holds the ordering values of the last row, so page N is the same
+# "WHERE (created_at, id) < (...) ORDER BY ... LIMIT n" index range scan as page 1.
+class KeysetPagination(BasePagination):
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    max_limit = TASK_PAGE_MAX_LIMIT
+    invalid_cursor_message = "Invalid cursor."
+
+    def prepare(self, queryset, request):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_ordering(queryset)
+        self.model = queryset.model
+        self.annotations = queryset.query.annotations
+        self.next_position = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.prepare(queryset, request)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position))
+
+        rows = list(queryset[: self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        rows = rows[: self.limit]
+        self.next_position = self.row_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def paginate_querysets(self, querysets, request):
+        # one page over several querysets with the same ordering and disjoint ids (hot + archive tables)
+        self.prepare(querysets[0], request)
+
+        position = self.decode_cursor(request)
+        rows = []
+        for queryset in querysets:
+            if position is not None:
+                queryset = queryset.filter(self.position_filter(position))
+            rows += queryset[: self.limit + 1]
+        rows.sort(key=self.row_position, reverse=self.ordering[0][1])
+
+        self.has_next = len(rows) > self.limit
+        rows = rows[: self.limit]
+        self.next_position = self.row_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.limit_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+    def get_limit(self, request):
+        default = api_settings.PAGE_SIZE or 10
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, default))
+        except (TypeError, ValueError):
+            return default
+        return max(1, min(limit, self.max_limit))
+
+    def get_ordering(self, queryset):
+        ordering = [
+            (name[1:], True) if name.startswith("-") else (name, False)
+            for name in queryset.query.order_by
+        ]
+        if not ordering or ordering[-1][0] not in ("id", "pk"):
+            raise ImproperlyConfigured("KeysetPagination needs an ordering that ends with the primary key.")
+        if len({descending for _, descending in ordering}) != 1:
+            raise ImproperlyConfigured("KeysetPagination needs every ordering key in the same direction.")
+        return ordering
+
+    def position_filter(self, position):
+        descending = self.ordering[0][1]
+        op = "lt" if descending else "gt"
+
+        q = Q()
+        equal = {}
+        for (name, _), value in zip(self.ordering, position):
+            q |= Q(**equal, **{f"{name}__{op}": value})
+            equal[name] = value
+
+        # redundant leading bound so the planner can range-scan the index
+        first_name, _ = self.ordering[0]
+        return Q(**{f"{first_name}__{op}e": position[0]}) & q
+
+    def row_position(self, row):
+        if isinstance(row, dict):
+            return [row[name] for name, _ in self.ordering]
+        return [getattr(row, name) for name, _ in self.ordering]
+
+    def encode_cursor(self, position):
+        values = [v.isoformat() if isinstance(v, (datetime, date)) else v for v in position]
+        values = [str(v) if isinstance(v, Decimal) else v for v in values]
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            values = json.loads(raw)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [self.to_python(name, value) for (name, _), value in zip(self.ordering, values)]
+        except (binascii.Error, ValueError, TypeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def to_python(self, name, value):
+        if name in self.annotations:
+            field = self.annotations[name].output_field
+        else:
+            try:
+                field = self.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                field = self.model._meta.pk
+        value = field.to_python(value)
+        if value is None:
+            raise ValueError
+        return value
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
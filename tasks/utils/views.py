@@ -2,11 +2,19 @@ from rest_framework.response import Response
 
 
 class PaginatedQuerySetMixin:
-    def paginate_and_respond(self, queryset):
+    def paginate_and_respond(self, queryset, page_filter=None, serializer_class=None):
+        serialize = serializer_class or (lambda rows: self.get_serializer(rows, many=True))
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return super().get_paginated_response(serializer.data)
+            if page_filter is not None:
+                page = page_filter(page)
+            return self.get_paginated_response(serialize(page).data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        if page_filter is not None:
+            queryset = page_filter(list(queryset))
+        return Response(serialize(queryset).data)
+
+    def paginate_rows_and_respond(self, queryset, page_filter=None):
+        # read-only pages from .values() rows through the view's row_serializer_class
+        row_serializer = self.row_serializer_class
+        return self.paginate_and_respond(row_serializer.prepare(queryset), page_filter, row_serializer)
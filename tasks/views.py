@@ -1,61 +1,152 @@
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.mixins import CreateModelMixin, ListModelMixin, RetrieveModelMixin
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from kaaro import fieldsets
+from kaaro.renderers import ORJSONRenderer
+from specialists.models import SpecialistProfile
 from specialists.permission import IsApprovedSpecialist
-from tasks.models import Task
-from tasks.serializers import TaskCreateSerializer, TaskSerializer
+from tasks import bulk, dashboard, events, exports, feeds, heatmap, leases, routes, schedule, state_machine, streams
+from tasks.idempotency import idempotent
+from tasks.defaults import (
+    TASK_FEED_DELTA_MAX_ROWS,
+    TASK_HEATMAP_CELL_SIZES,
+    TASK_HEATMAP_DEFAULT_CELL,
+    TASK_LEASE_SECONDS,
+)
+from tasks.models import Task, TaskArchive
+from tasks.serializers import (
+    FreeSlotsQuerySerializer,
+    ScheduleWindowSerializer,
+    SlotSerializer,
+    TaskBulkCreateSerializer,
+    TaskCreateSerializer,
+    TaskRowSerializer,
+    TaskSerializer,
+)
+from tasks.signals import send_created
+from tasks.utils.pagination import KeysetPagination
 from tasks.utils.views import PaginatedQuerySetMixin
-from tasks.filters import TaskFilter
+from tasks.filters import TaskArchiveFilter, TaskFilter, TaskSearchFilter, parse_near_params, parse_point
 
 
 class TaskViewSet(CreateModelMixin, ListModelMixin, RetrieveModelMixin, GenericViewSet, PaginatedQuerySetMixin):
     permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter]
     filterset_class = TaskFilter
-    search_fields = ("contact_name", "contact_phone", "address")
     ordering_fields = ("created_at", "status")
-    ordering = ("-created_at",)
+    ordering = ("-created_at", "-id")
+    pagination_class = KeysetPagination
+    row_serializer_class = TaskRowSerializer  # list pages skip model instances; see TaskRowSerializer
 
     def get_serializer_class(self):
         return TaskCreateSerializer if self.action == "create" else TaskSerializer
 
     def get_queryset(self):
-        user = self.request.user
-
-        base = (
-            Task.objects
-            .select_related("service", "customer", "specialist")
-            .only(
-                "id",
-                "service__id", "service__title",
-                "customer__id", "customer__first_name", "customer__last_name",
-                "specialist__id", "specialist__first_name", "specialist__last_name",
-                "status",
-                "contact_name", "contact_phone", "address",
-                "latitude", "longitude",
-                "note",
-                "created_at",
-            )
-        )
+        return self.scoped(Task.objects)
 
-        if user.role == user.RoleChoices.CUSTOMER:
-            return base.filter(customer=user).order_by("-created_at")
-
-        if user.role == user.RoleChoices.SPECIALIST:
-            return base.filter(specialist=user).order_by("-created_at")
+    def get_archive_queryset(self):
+        return self.scoped(TaskArchive.objects)
 
-        return Task.objects.none()
+    def scoped(self, manager):
+        user = self.request.user
 
+        if user.role == user.RoleChoices.CUSTOMER:
+            base = manager.filter(customer=user)
+        elif user.role == user.RoleChoices.SPECIALIST:
+            base = manager.filter(specialist=user)
+        else:
+            return manager.none()
+
+        # ?fields= / ?exclude= narrow the columns and joins as well as the payload
+        return TaskSerializer.project(base.order_by("-created_at", "-id"), self.request)
+
+    def wants_sparse(self):
+        return TaskSerializer.requested_fields(self.request) is not None
+
+    def wants_history(self):
+        return self.request.query_params.get("history") in ("1", "true")
+
+    def filter_archive_queryset(self, queryset):
+        filterset = TaskArchiveFilter(self.request.query_params, queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
+
+    def list(self, request, *args, **kwargs):
+        # full pages take the .values() fast path; sparse fieldsets go through TaskSerializer
+        sparse = self.wants_sparse()
+        if not self.wants_history():
+            queryset = self.filter_queryset(self.get_queryset())
+            return self.paginate_and_respond(queryset) if sparse else self.paginate_rows_and_respond(queryset)
+
+        # ?history=1: terminal tasks moved to the archive are merged into the same keyset pages
+        if request.query_params.get("search"):
+            raise ValidationError({"search": "Search covers live tasks only; drop history=1."})
+        hot = self.filter_queryset(self.get_queryset())
+        cold = self.filter_archive_queryset(self.get_archive_queryset())
+        if sparse:
+            page = self.paginator.paginate_querysets([hot, cold], request)
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        page = self.paginator.paginate_querysets([TaskRowSerializer.prepare(qs) for qs in (hot, cold)], request)
+        return self.get_paginated_response(TaskRowSerializer(page).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            if not self.wants_history():
+                raise
+        task = get_object_or_404(self.filter_archive_queryset(self.get_archive_queryset()), pk=kwargs["pk"])
+        return Response(self.get_serializer(task).data)
+
+    def pending_queryset(self, qs, newest_first=True):
+        qs = qs.filter(status=Task.Status.PENDING, specialist__isnull=True)
+
+        near = parse_near_params(self.request.query_params)
+        if near is not None:
+            return qs.near(*near).order_by("distance_sq", "id")
+        if newest_first:
+            return qs.order_by("-created_at", "-id")
+        return qs.order_by("created_at", "id")
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        task = serializer.save()
+        with transaction.atomic():
+            task = serializer.save()
+            events.record_created([task], actor=request.user)
+        send_created(task)
         return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["post"], url_path="bulk", url_name="bulk")
+    @idempotent
+    def bulk_create(self, request):
+        payload = TaskBulkCreateSerializer(data=request.data, context={"max_items": bulk.max_items()})
+        payload.is_valid(raise_exception=True)
+        items = payload.validated_data["tasks"]
+        partial = payload.validated_data["mode"] == "partial"
+
+        created, results = bulk.create(items, request.user, partial=partial)
+        if created == len(items):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({"created": created, "results": results}, status=code)
+
     @action(
         detail=False,
         methods=["get"],
@@ -63,44 +154,271 @@ class TaskViewSet(CreateModelMixin, ListModelMixin, RetrieveModelMixin, GenericV
         permission_classes=[IsApprovedSpecialist],
     )
     def available(self, request):
-        qs = (
-            Task.objects
-            .select_related("service")
-            .only(
-                "id",
-                "service__id", "service__title",
-                "status",
-                "contact_name",
-                "address",
-                "latitude", "longitude",
-                "created_at",
+        selected = TaskSerializer.requested_fields(request)  # 400 on unknown names, before any 304
+        feed = feeds.feed_for_params(request.query_params)
+        version = feeds.current_version(feed)
+        lease_state = feeds.lease_state()
+        tag = feeds.etag(feed, version, lease_state, request.user.id, request.query_params)
+        if feeds.etag_matches(request, tag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": tag})
+
+        since = request.query_params.get("since")
+        if since:
+            response = self.available_delta(since, version, lease_state)
+        else:
+            qs = (
+                Task.objects
+                .select_related("service")
+                .only(
+                    "id",
+                    "service__id", "service__title",
+                    "status",
+                    "contact_name",
+                    "address",
+                    "latitude", "longitude",
+                    "scheduled_start", "scheduled_end",
+                    "created_at",
+                )
+            )
+            qs = self.filter_queryset(self.pending_queryset(qs))
+            response = None
+            if feeds.is_cacheable(request.query_params, feed):
+                response = self.available_cached(feed, version, qs)
+            if response is None:
+                response = self.paginate_rows_and_respond(
+                    qs, page_filter=lambda rows: leases.exclude_leased_rows(rows, request.user.id)
+                )
+            # cached payloads and .values() rows are full TaskSerializer output; trim them here
+            response.data["results"] = fieldsets.trim(response.data["results"], selected)
+
+        response["ETag"] = tag
+        response["X-Feed-Cursor"] = feeds.encode_cursor(version, lease_state)
+        return response
+
+    def available_cached(self, feed, version, qs):
+        # same page as the database path, served from the materialized feed when it is current
+        paginator = self.paginator
+        paginator.prepare(qs, self.request)
+        page = feeds.cached_page(
+            feed,
+            version,
+            paginator.decode_cursor(self.request),
+            paginator.limit,
+            page_filter=lambda ids: leases.exclude_leased_ids(ids, self.request.user.id),
+        )
+        if page is None:
+            return None
+        results, paginator.next_position = page
+        return paginator.get_paginated_response(results)
+
+    def available_delta(self, since, version, lease_state):
+        since_version, since_leases, issued_at = feeds.decode_cursor(since)
+        body = {"cursor": feeds.encode_cursor(version, lease_state), "added": [], "removed": [], "reset": False}
+        if since_version == version and since_leases == lease_state:
+            return Response(body)
+
+        tasks = Task.objects.select_related("service", "customer", "specialist")
+        batches = []
+        if since_version != version:
+            qs = tasks.filter(updated_at__gte=feeds.delta_window_start(issued_at))
+            near = parse_near_params(self.request.query_params)
+            if near is not None:
+                qs = qs.near(*near)
+            batches.append(self.filter_queryset(qs).order_by("updated_at", "id"))
+        if since_leases != lease_state:
+            # leases never touch updated_at, so re-check the holders of every available task in scope
+            batches.append(self.filter_queryset(self.pending_queryset(tasks)))
+
+        rows = {}
+        for qs in batches:
+            batch = list(qs[: TASK_FEED_DELTA_MAX_ROWS + 1])
+            if len(batch) > TASK_FEED_DELTA_MAX_ROWS:
+                body["reset"] = True
+                return Response(body)
+            rows.update((t.id, t) for t in batch)
+        rows = sorted(rows.values(), key=lambda t: (t.updated_at, t.id))
+
+        available = [t for t in rows if t.status == Task.Status.PENDING and t.specialist_id is None]
+        visible = leases.exclude_leased(available, self.request.user.id)
+        visible_ids = {t.id for t in visible}
+        body["added"] = TaskSerializer(visible, many=True, context={"request": self.request}).data
+        body["removed"] = [t.id for t in rows if t.id not in visible_ids]
+        return Response(body)
+
+    @action(detail=False, methods=["get"], url_path="export", permission_classes=[IsAdminUser])
+    def export(self, request):
+        # ?output=ndjson|csv with the list filters; ?history=1 appends the archive
+        output = request.query_params.get("output", "ndjson")
+        if output not in exports.FORMATS:
+            raise ValidationError({"output": f"Expected one of: {', '.join(exports.FORMATS)}."})
+
+        querysets = [self.filter_queryset(Task.objects.all())]
+        if self.wants_history():
+            if request.query_params.get("search"):
+                raise ValidationError({"search": "Search covers live tasks only; drop history=1."})
+            querysets.append(self.filter_archive_queryset(TaskArchive.objects.all()))
+
+        if isinstance(request._request, ASGIRequest):
+            content = exports.async_lines(querysets, output)
+        else:
+            content = exports.lines(exports.records(*querysets), output)
+        response = StreamingHttpResponse(content, content_type=exports.FORMATS[output])
+        filename = f"tasks-{timezone.localdate():%Y%m%d}.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=["get"], url_path="calendar", permission_classes=[IsApprovedSpecialist])
+    def calendar(self, request):
+        # the specialist's booked slots overlapping ?start=&end=
+        window = ScheduleWindowSerializer(data=request.query_params)
+        window.is_valid(raise_exception=True)
+        tasks = schedule.calendar(request.user, window.validated_data["start"], window.validated_data["end"])
+        return Response(TaskSerializer(tasks, many=True).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="free-slots", url_name="free-slots")
+    def free_slots(self, request):
+        # gaps of ?minutes= (or the ?service='s duration) in ?start=&end= for each ?specialist=;
+        # staff see every available specialist, others only their own or their booked ones
+        params = FreeSlotsQuerySerializer(
+            data={**request.query_params.dict(), "specialist": request.query_params.getlist("specialist")}
+        )
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        service = data.get("service")
+        minutes = data.get("minutes") or (service.base_duration_minutes if service else 60)
+        specialist_ids = data.get("specialist")
+        if request.user.is_staff:
+            specialist_ids = specialist_ids or schedule.available_specialist_ids()
+        else:
+            visible = schedule.visible_specialist_ids(request.user)
+            if specialist_ids and not set(specialist_ids) <= visible:
+                raise PermissionDenied("You can only see the free slots of specialists you have booked.")
+            specialist_ids = specialist_ids or sorted(visible)
+
+        slots = schedule.free_slots(specialist_ids, data["start"], data["end"], minutes)
+        body = [
+            {
+                "specialist": specialist_id,
+                "slots": SlotSerializer([{"start": s, "end": e} for s, e in gaps], many=True).data,
+            }
+            for specialist_id, gaps in slots.items()
+        ]
+        return Response({"minutes": minutes, "results": body}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="route", permission_classes=[IsApprovedSpecialist])
+    def route(self, request):
+        # the specialist's ACCEPTED tasks in visiting order, from ?origin=lat,lng or their profile location
+        origin = parse_point(request.query_params, "origin")
+        if origin is None:
+            location = (
+                SpecialistProfile.objects
+                .filter(user=request.user, latitude__isnull=False, longitude__isnull=False)
+                .values_list("latitude", "longitude")
+                .first()
+            )
+            origin = tuple(map(float, location)) if location else None
+
+        plan = routes.get(request.user, origin)
+        return Response(
+            {
+                "distance_km": plan["distance_km"],
+                "optimized": plan["optimized"],
+                "results": TaskSerializer(plan["tasks"], many=True).data,
+                "unrouted": TaskSerializer(plan["unrouted"], many=True).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["get"], url_path="heatmap", permission_classes=[IsAdminUser])
+    def heatmap(self, request):
+        # PENDING demand per grid cell; ?cell= picks the grid, ?service_type= narrows the answer
+        cell = request.query_params.get("cell", TASK_HEATMAP_DEFAULT_CELL)
+        if cell not in TASK_HEATMAP_CELL_SIZES:
+            raise ValidationError({"cell": f"Expected one of: {', '.join(TASK_HEATMAP_CELL_SIZES)}."})
+
+        data = heatmap.get(cell)
+        service_types = request.query_params.getlist("service_type")
+        if service_types:
+            data = {**data, "types": [t for t in data["types"] if str(t["service_type"]) in service_types]}
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="summary")
+    def summary(self, request):
+        return Response(dashboard.get(request.user), status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="stream",
+        permission_classes=[IsApprovedSpecialist],
+        renderer_classes=[streams.EventStreamRenderer, ORJSONRenderer],
+    )
+    def stream(self, request):
+        # the event stream is an endless async generator; WSGI would buffer it forever
+        if not isinstance(request._request, ASGIRequest):
+            return Response(
+                {"detail": "The task stream needs an ASGI server (uvicorn kaaro.asgi:application)."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
             )
-            .filter(status=Task.Status.PENDING, specialist__isnull=True)
-            .order_by("-created_at")
+
+        try:
+            service_ids = [int(v) for v in request.query_params.getlist("service")]
+        except ValueError:
+            raise ValidationError({"service": "Must be a service id."})
+
+        near = parse_near_params(request.query_params)
+        response = StreamingHttpResponse(
+            streams.event_stream(service_ids=service_ids, near=near),
+            content_type="text/event-stream",
         )
-        qs = self.filter_queryset(qs)
-        return self.paginate_and_respond(qs)
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
 
     @action(
-        detail=True,
+        detail=False,
         methods=["post"],
-        url_path="accept",
+        url_path="claim-next",
         permission_classes=[IsApprovedSpecialist],
     )
-    def accept(self, request, pk=None):
-        specialist = request.user
+    @idempotent
+    def claim_next(self, request):
+        qs = self.filter_queryset(self.pending_queryset(Task.objects.all(), newest_first=False))
+        task = state_machine.claim_next(request.user, qs)
+        if task is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
 
-        with transaction.atomic():
-            task = Task.objects.select_for_update().get(pk=pk)
+    @action(
+        detail=True,
+        methods=["post", "delete"],
+        url_path="lease",
+        permission_classes=[IsApprovedSpecialist],
+    )
+    def lease(self, request, pk=None):
+        if request.method == "DELETE":
+            if leases.release(pk, request.user.id):
+                feeds.leases_changed()
+            return Response(status=status.HTTP_204_NO_CONTENT)
 
-            if task.status != Task.Status.PENDING or task.specialist_id is not None:
-                return Response({"detail": "Task is not available."}, status=status.HTTP_400_BAD_REQUEST)
+        task = get_object_or_404(Task.objects.only("id", "status", "specialist_id"), pk=pk)
+        if task.status != Task.Status.PENDING or task.specialist_id is not None:
+            return Response({"detail": "Task is not available."}, status=status.HTTP_400_BAD_REQUEST)
 
-            task.status = Task.Status.ACCEPTED
-            task.specialist = specialist
-            task.save(update_fields=["status", "specialist"])
+        if not leases.acquire(task.id, request.user.id):
+            return Response({"detail": "Task is reserved by another specialist."}, status=status.HTTP_409_CONFLICT)
+        feeds.leases_changed()
+        return Response({"task": task.id, "expires_in": TASK_LEASE_SECONDS}, status=status.HTTP_200_OK)
 
-        task.refresh_from_db()
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="accept",
+        permission_classes=[IsApprovedSpecialist],
+    )
+    @idempotent
+    def accept(self, request, pk=None):
+        task = state_machine.accept(pk, request.user)
         return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
 
     @action(
@@ -109,22 +427,9 @@ class TaskViewSet(CreateModelMixin, ListModelMixin, RetrieveModelMixin, GenericV
         url_path="start",
         permission_classes=[IsApprovedSpecialist],
     )
+    @idempotent
     def start(self, request, pk=None):
-        specialist = request.user
-
-        with transaction.atomic():
-            task = Task.objects.select_for_update().get(pk=pk)
-
-            if task.specialist_id != specialist.id:
-                return Response({"detail": "You can only start your own accepted task."}, status=status.HTTP_403_FORBIDDEN)
-
-            if task.status != Task.Status.ACCEPTED:
-                return Response({"detail": "Task must be in ACCEPTED status to start."}, status=status.HTTP_400_BAD_REQUEST)
-
-            task.status = Task.Status.IN_PROGRESS
-            task.save(update_fields=["status"])
-
-        task.refresh_from_db()
+        task = state_machine.start(pk, request.user)
         return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
 
     @action(
@@ -133,37 +438,13 @@ class TaskViewSet(CreateModelMixin, ListModelMixin, RetrieveModelMixin, GenericV
         url_path="done",
         permission_classes=[IsApprovedSpecialist],
     )
+    @idempotent
     def done(self, request, pk=None):
-        specialist = request.user
-
-        with transaction.atomic():
-            task = Task.objects.select_for_update().get(pk=pk)
-
-            if task.specialist_id != specialist.id:
-                return Response({"detail": "You can only complete your own task."}, status=status.HTTP_403_FORBIDDEN)
-
-            if task.status != Task.Status.IN_PROGRESS:
-                return Response({"detail": "Task must be IN_PROGRESS to be completed."}, status=status.HTTP_400_BAD_REQUEST)
-
-            task.status = Task.Status.DONE
-            task.save(update_fields=["status"])
-
-        task.refresh_from_db()
+        task = state_machine.complete(pk, request.user)
         return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["post"], url_path="cancel", permission_classes=[IsAuthenticated])
+    @idempotent
     def cancel(self, request, pk=None):
-        user = request.user
-        task = Task.objects.get(pk=pk)
-
-        if task.customer_id != user.id:
-            return Response({"detail": "You can only cancel your own task."}, status=status.HTTP_403_FORBIDDEN)
-
-        if task.status not in (Task.Status.PENDING, Task.Status.ACCEPTED):
-            return Response({"detail": "Task cannot be canceled now."}, status=status.HTTP_400_BAD_REQUEST)
-
-        task.status = Task.Status.CANCELED
-        task.save(update_fields=["status"])
-
-        task.refresh_from_db()
+        task = state_machine.cancel(pk, request.user)
         return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
@@ -0,0 +1,73 @@
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from specialists.models import SpecialistProfile
+from tasks.models import Task, TaskArchive
+
+# Per-specialist task counters on SpecialistProfile, shifted with F() updates inside the
+# transition's transaction so "how busy is this specialist" is a single-row read.
+
+COUNTERS = {
+    Task.Status.ACCEPTED: "accepted_count",
+    Task.Status.IN_PROGRESS: "in_progress_count",
+    Task.Status.DONE: "done_count",
+}
+
+
+def _changes(from_status, to_status, delta):
+    changes = {}
+    if from_status in COUNTERS:
+        changes[COUNTERS[from_status]] = F(COUNTERS[from_status]) - delta
+    if to_status in COUNTERS:
+        changes[COUNTERS[to_status]] = F(COUNTERS[to_status]) + delta
+    return changes
+
+
+def shift(task_id, from_status, to_status):
+    # the task row already carries its specialist after the transition, so read it in the same UPDATE
+    changes = _changes(from_status, to_status, 1)
+    if changes:
+        specialist_id = Subquery(Task.objects.filter(pk=task_id).values("specialist_id")[:1])
+        SpecialistProfile.objects.filter(user_id=specialist_id).update(**changes)
+
+
+def shift_many(counts, from_status, to_status):
+    # counts: {specialist_id: number of tasks}; one UPDATE for all of them
+    if not counts:
+        return
+    delta = Case(*(When(user_id=sid, then=Value(n)) for sid, n in counts.items()), output_field=IntegerField())
+    changes = _changes(from_status, to_status, delta)
+    if changes:
+        SpecialistProfile.objects.filter(user_id__in=counts).update(**changes)
+
+
+def count_subquery(model, status):
+    rows = (
+        model.objects
+        .filter(specialist_id=OuterRef("user_id"), status=status)
+        .order_by()
+        .values("specialist_id")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return Coalesce(Subquery(rows[:1]), 0)
+
+
+def expected_counts():
+    counts = {field: count_subquery(Task, status) for status, field in COUNTERS.items()}
+    # archived tasks are all terminal, so only the done counter needs the archive
+    counts["done_count"] = counts["done_count"] + count_subquery(TaskArchive, Task.Status.DONE)
+    return counts
+
+
+def reconcile(dry_run=False):
+    # rebuilds every profile's counters from the tasks table; returns how many had drifted
+    expected = expected_counts()
+    annotated = SpecialistProfile.objects.annotate(**{f"expected_{f}": e for f, e in expected.items()})
+    drifted = Q()
+    for field in COUNTERS.values():
+        drifted |= ~Q(**{field: F(f"expected_{field}")})
+    count = annotated.filter(drifted).count()
+    if count and not dry_run:
+        SpecialistProfile.objects.update(**expected)
+    return count
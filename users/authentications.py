@@ -1,9 +1,11 @@
 import logging
 
+from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 
-from users import defaults
+from users import defaults, snapshots
 
 logger = logging.getLogger(__name__)
 
@@ -15,3 +17,20 @@ class CookieJWTAuthentication(JWTAuthentication):
             return self.get_user(validated_token), validated_token
         except (TokenError, InvalidToken):
             return None
+
+    def get_user(self, validated_token):
+        # same checks as JWTAuthentication.get_user, against the cached snapshot (users.snapshots)
+        if api_settings.CHECK_REVOKE_TOKEN or api_settings.USER_ID_FIELD != "id":
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        snapshot = snapshots.get(user_id)
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not snapshot["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return snapshots.to_user(snapshot)
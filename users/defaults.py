@@ -2,4 +2,7 @@ ACCESS_TOKEN_COOKIE_KEY_NAME = 'accessToken'
 REFRESH_TOKEN_COOKIE_KEY_NAME = 'refreshToken'
 ACCESS_TOKEN_LIFETIME = 3 * 24 * 60 * 60  # in seconds
 REFRESH_TOKEN_LIFETIME = 7 # in days
-OTP_EXPIRY_SECONDS = 120 # OTP Expiry time in seconds (2 minutes)
\ No newline at end of file
+OTP_EXPIRY_SECONDS = 120 # OTP Expiry time in seconds (2 minutes)
+USER_SNAPSHOT_TTL = 60 * 60  # auth snapshots in the cache, in seconds
+USER_SNAPSHOT_LOCAL_TTL = 5  # seconds an in-process snapshot is used before its version is re-checked
+USER_SNAPSHOT_LOCAL_SIZE = 10_000  # users kept in each process's LRU
\ No newline at end of file
@@ -1,6 +1,7 @@
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
+from kaaro.fieldsets import SparseFieldsetMixin
 from .utils import normalize_phone_number
 
 User = get_user_model()
@@ -37,7 +38,7 @@ class OTPLoginSerializer(serializers.Serializer):
     def validate_phone_number(self, value):
         return normalize_phone_number(value)
 
-class UserInfoSerializer(serializers.ModelSerializer):
+class UserInfoSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     role = serializers.CharField(source="role.name", allow_null=True)
     
     class Meta:
@@ -51,4 +52,5 @@ class UserInfoSerializer(serializers.ModelSerializer):
             "status",
             "role",
             "is_phone_verified",
-        )
\ No newline at end of file
+        )
+        field_sources = {"full_name": ("first_name", "last_name")}
\ No newline at end of file
@@ -0,0 +1,151 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from specialists.models import SpecialistRequest
+from users.defaults import USER_SNAPSHOT_LOCAL_SIZE, USER_SNAPSHOT_LOCAL_TTL, USER_SNAPSHOT_TTL
+from users.models import User
+
+# Slim copy of what authentication and permission checks read from request.user, so an
+# authenticated request normally costs no query on users_user.
+#
+# Each user has a version token in the cache, replaced whenever the user or their
+# specialist request is saved or deleted; snapshots are stored under (id, version), so a
+# replaced token orphans every older copy at once. In front of the cache sits a per-process
+# LRU whose entries are trusted for USER_SNAPSHOT_LOCAL_TTL seconds before the token is
+# re-checked; saves in this process evict their entry straight away. QuerySet.update()
+# bypasses the signals and must call invalidate() itself.
+
+FIELDS = ("id", "role", "status", "is_active", "is_staff", "first_name", "last_name")  # names: customer_display
+
+
+def version_key(user_id):
+    return f"user_snapshot_version_{user_id}"
+
+
+def snapshot_key(user_id, version):
+    return f"user_snapshot_{user_id}_{version}"
+
+
+class LocalLRU:
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()  # user id -> (version, snapshot, checked_at)
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None:
+                self.entries.move_to_end(user_id)
+            return entry
+
+    def put(self, user_id, version, snapshot):
+        with self.lock:
+            self.entries[user_id] = (version, snapshot, time.monotonic())
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def pop(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local = LocalLRU(USER_SNAPSHOT_LOCAL_SIZE)
+
+
+def current_version(user_id):
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def load(user_id):
+    row = (
+        User.objects.filter(pk=user_id)
+        .values(*FIELDS, "specialist_request__id", "specialist_request__status")
+        .first()
+    )
+    if row is None:
+        return None
+    request_id = row.pop("specialist_request__id")
+    request_status = row.pop("specialist_request__status")
+    row["specialist_request"] = None if request_id is None else {"id": request_id, "status": request_status}
+    return row
+
+
+def get(user_id):
+    # snapshot dict for user_id, or None if there is no such user
+    user_id = User._meta.pk.to_python(user_id)  # token claims carry the id as a string
+    entry = local.get(user_id)
+    if entry is not None and time.monotonic() - entry[2] < USER_SNAPSHOT_LOCAL_TTL:
+        return entry[1]
+
+    version = current_version(user_id)
+    if entry is not None and entry[0] == version:
+        snapshot = entry[1]
+    else:
+        key = snapshot_key(user_id, version)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = load(user_id)
+            if snapshot is None:
+                return None
+            cache.set(key, snapshot, timeout=USER_SNAPSHOT_TTL)
+    local.put(user_id, version, snapshot)
+    return snapshot
+
+
+def to_user(snapshot):
+    # a User as if loaded with .only(*FIELDS); any other field is fetched on first access
+    fields = User._meta.concrete_fields
+    values = [snapshot.get(f.attname, DEFERRED) for f in fields]
+    user = User.from_db(DEFAULT_DB_ALIAS, [f.attname for f in fields], values)
+
+    specialist_request = None
+    if snapshot["specialist_request"] is not None:
+        specialist_request = SpecialistRequest.from_db(
+            DEFAULT_DB_ALIAS,
+            ["id", "user_id", "status"],
+            [snapshot["specialist_request"]["id"], user.pk, snapshot["specialist_request"]["status"]],
+        )
+        SpecialistRequest.user.field.set_cached_value(specialist_request, user)
+    # a cached None makes user.specialist_request raise DoesNotExist without a query
+    User.specialist_request.related.set_cached_value(user, specialist_request)
+    return user
+
+
+def invalidate(user_id):
+    local.pop(user_id)
+    cache.set(version_key(user_id), uuid.uuid4().hex, timeout=None)
+
+
+def invalidate_on_commit(user_id):
+    # once now, and again after commit so a snapshot read from pre-commit rows doesn't survive
+    invalidate(user_id)
+    transaction.on_commit(lambda: invalidate(user_id))
+
+
+@receiver([post_save, post_delete], sender=User)
+def on_user_change(sender, instance, **kwargs):
+    invalidate_on_commit(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=SpecialistRequest)
+def on_specialist_request_change(sender, instance, **kwargs):
+    invalidate_on_commit(instance.user_id)
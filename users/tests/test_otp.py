@@ -88,3 +88,16 @@ class TestUserInfo:
         assert res.status_code == 200
 
         assert res.json()["phone_number"] == str(user.phone_number)
+
+    def test_user_info_sparse_fieldset(self, api_client):
+        user = User.objects.create_user(phone_number="+989121234567", password="x12345678")
+        user.first_name, user.last_name = "Mina", "Karimi"
+        user.save()
+        api_client.cookies[defaults.ACCESS_TOKEN_COOKIE_KEY_NAME] = str(RefreshToken.for_user(user).access_token)
+
+        res = api_client.get("/users/info/", {"fields": "id,full_name"})
+        assert res.status_code == 200
+        assert res.json() == {"id": user.id, "full_name": "Mina Karimi"}
+
+        res = api_client.get("/users/info/", {"exclude": "id,phone_number,first_name,last_name,full_name,status,role,is_phone_verified"})
+        assert res.status_code == 400
@@ -0,0 +1,108 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from specialists.models import SpecialistRequest
+from tasks.tests.test import make_service
+from users import defaults, snapshots
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def user():
+    user = User.objects.create_user(phone_number="+989121234567", password="x12345678")
+    user.first_name, user.last_name = "Mina", "Karimi"
+    user.save()
+    return user
+
+
+@pytest.fixture
+def client(api_client, user):
+    api_client.cookies[defaults.ACCESS_TOKEN_COOKIE_KEY_NAME] = str(RefreshToken.for_user(user).access_token)
+    return api_client
+
+
+def user_queries(client, path="/specialists/request/"):
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(path)
+    return res, [q["sql"] for q in ctx.captured_queries if 'FROM "users_user"' in q["sql"]]
+
+
+class TestUserSnapshot:
+    def test_authenticated_requests_skip_user_query(self, client, user):
+        snapshots.local.clear()
+        cache.clear()
+        _, queries = user_queries(client)
+        assert len(queries) == 1
+
+        _, queries = user_queries(client)
+        assert queries == []
+
+        # another process: nothing local, the snapshot comes from the cache
+        snapshots.local.clear()
+        _, queries = user_queries(client)
+        assert queries == []
+
+    def test_snapshot_user(self, user):
+        sr = SpecialistRequest.objects.create(user=user, status=SpecialistRequest.Status.APPROVED)
+        cached = snapshots.to_user(snapshots.get(str(user.id)))
+        assert (cached.pk, cached.role, cached.is_active, cached.is_staff) == (user.pk, user.role, True, False)
+        with CaptureQueriesContext(connection) as ctx:
+            assert cached.specialist_request.status == SpecialistRequest.Status.APPROVED
+            assert cached.specialist_request.pk == sr.pk
+        assert ctx.captured_queries == []
+
+        assert cached.full_name == "Mina Karimi"
+        assert ctx.captured_queries == []
+        # anything outside the snapshot is loaded on first access
+        assert cached.phone_number == user.phone_number
+
+        sr.delete()
+        cached = snapshots.to_user(snapshots.get(user.id))
+        assert getattr(cached, "specialist_request", None) is None
+
+    def test_task_create_renders_names_from_snapshot(self, client, user):
+        service = make_service()
+        client.get("/specialists/request/")  # warm the snapshot
+        with CaptureQueriesContext(connection) as ctx:
+            res = client.post(
+                reverse("task-list"),
+                data={"service": service.id, "contact_name": "A", "contact_phone": "0912", "address": "x"},
+                format="json",
+            )
+        assert res.status_code == 201
+        assert res.json()["customer_display"] == "Mina Karimi"
+        assert not [q for q in ctx.captured_queries if 'FROM "users_user"' in q["sql"]]
+
+    def test_saves_invalidate(self, client, user):
+        user_queries(client)
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+        res, _ = user_queries(client)
+        assert res.status_code == 401
+
+        user.delete()
+        assert snapshots.get(user.id) is None
+
+    def test_other_processes_see_new_version_after_local_ttl(self, user, monkeypatch):
+        assert snapshots.get(user.id)["role"] == User.RoleChoices.CUSTOMER
+        # a save in another process only replaces the version token in the shared cache
+        User.objects.filter(pk=user.id).update(role=User.RoleChoices.SPECIALIST)
+        cache.set(snapshots.version_key(user.id), "other", timeout=None)
+        assert snapshots.get(user.id)["role"] == User.RoleChoices.CUSTOMER
+
+        monkeypatch.setattr(snapshots, "USER_SNAPSHOT_LOCAL_TTL", 0)
+        assert snapshots.get(user.id)["role"] == User.RoleChoices.SPECIALIST
+
+    def test_local_lru_is_bounded(self):
+        lru = snapshots.LocalLRU(2)
+        lru.put(1, "v", {})
+        lru.put(2, "v", {})
+        lru.get(1)
+        lru.put(3, "v", {})
+        assert list(lru.entries) == [1, 3]
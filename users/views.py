@@ -103,10 +103,5 @@ class UserInfoView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = (
-            User.objects.select_related("specialist_request").only(
-                "id", "phone_number", "first_name", "last_name",
-                "status", "is_phone_verified", "role",
-                "specialist_request__status", "specialist_request__created_at",)
-            .get(id=request.user.id))
-        return Response(UserInfoSerializer(user).data)
\ No newline at end of file
+        user = UserInfoSerializer.project(User.objects.all(), request).get(id=request.user.id)
+        return Response(UserInfoSerializer(user, context={"request": request}).data)
\ No newline at end of file